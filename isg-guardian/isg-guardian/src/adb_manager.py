@@ -6,12 +6,114 @@ ADB连接管理模块
 - 自动建立ADB连接
 - 连接状态检测和恢复
 - 特殊环境的连接设置
+- 持久化的设备Shell通道
+- 可选的原生ADB协议传输（不经过adb命令行）
+- 基于 host:track-devices 的事件驱动连接状态跟踪
+- 设备属性快照缓存
+- 后台重连调度（指数退避、随机抖动、熔断状态）
 """
 
 import asyncio
+import random
+import re
+import shlex
 import subprocess
 import time
-from typing import Optional, List
+from typing import AsyncIterator, Callable, Dict, Optional, List
+
+from adb_protocol import ADBClient, ADBProtocolError, parse_device_list
+from adb_shell import STREAM_LIMIT, ADBShellSession, run_adb_shell_once
+from command_runner import TIMEOUT_RETURNCODE, command_kind, get_runner
+from flight_recorder import FlightRecorder
+from logcat_stream import LogcatStream
+
+# 需要交给 /bin/sh 解释的设置命令特征
+SHELL_METACHARACTERS = set('|&;<>()$`*?~')
+
+
+# getprop 输出行格式: [ro.product.model]: [XXX]
+GETPROP_LINE = re.compile(r'^\[(?P<key>[^\]]+)\]: \[(?P<value>.*)\]$')
+
+# get_device_info 字段与系统属性的对应关系
+DEVICE_INFO_PROPERTIES = {
+    'model': 'ro.product.model',
+    'brand': 'ro.product.brand',
+    'version': 'ro.build.version.release',
+    'sdk': 'ro.build.version.sdk',
+    'serial': 'ro.serialno'
+}
+
+
+def parse_getprop(output: str) -> Dict[str, str]:
+    """解析 `getprop` 全量输出
+    
+    Args:
+        output: getprop命令输出
+        
+    Returns:
+        Dict[str, str]: 属性字典
+    """
+    properties = {}
+    for line in output.splitlines():
+        match = GETPROP_LINE.match(line.strip())
+        if match:
+            properties[match.group('key')] = match.group('value')
+    return properties
+
+
+class DevicePropertyCache:
+    """设备属性快照缓存
+    
+    一次 `getprop` 加载全部属性，在TTL内或重连之前直接复用
+    """
+    
+    def __init__(self, ttl: float):
+        """初始化属性缓存
+        
+        Args:
+            ttl: 缓存有效期（秒），0表示仅在重连时刷新
+        """
+        self.ttl = ttl
+        self.properties: Dict[str, str] = {}
+        self.loaded_at: Optional[float] = None
+        self.hits = 0
+        self.misses = 0
+        
+    @property
+    def valid(self) -> bool:
+        """缓存是否仍然有效"""
+        if self.loaded_at is None:
+            return False
+        return not self.ttl or time.monotonic() - self.loaded_at < self.ttl
+        
+    def update(self, properties: Dict[str, str]):
+        """写入新的属性快照"""
+        self.properties = properties
+        self.loaded_at = time.monotonic()
+        
+    def invalidate(self):
+        """使缓存失效，下次访问时重新加载"""
+        self.loaded_at = None
+        
+    def get_stats(self) -> dict:
+        """获取缓存统计
+        
+        Returns:
+            dict: 命中/未命中次数、属性数量和缓存年龄
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self.properties),
+            'age': int(time.monotonic() - self.loaded_at) if self.loaded_at is not None else None,
+            'ttl': self.ttl
+        }
+
+
+# 熔断器状态
+CIRCUIT_CLOSED = 'closed'        # 正常
+CIRCUIT_OPEN = 'open'            # 连续失败，等待退避结束
+CIRCUIT_HALF_OPEN = 'half_open'  # 退避结束，正在试探重连
 
 
 class ADBManager:
@@ -35,8 +137,51 @@ class ADBManager:
         self.retry_delay = self.adb_config.get('retry_delay', 5)
         self.setup_commands = self.adb_config.get('setup_commands', [])
         self.auto_connect = self.adb_config.get('auto_connect', True)
+        self.persistent_shell = self.adb_config.get('persistent_shell', True)
+        self.shell_timeout = self.adb_config.get('shell_timeout', 15)
+        self.transport = self.adb_config.get('transport', 'cli')
+        self.track_devices = self.adb_config.get('track_devices', True)
+        self.property_cache = DevicePropertyCache(self.adb_config.get('property_cache_ttl', 3600))
+        # 设备共享的logcat流，由主进程在守护模式下启动
+        self.logcat = LogcatStream(config, self, FlightRecorder.from_config(config))
+        
+        # 重连调度
+        self.backoff_base = self.adb_config.get('reconnect_backoff_base', self.retry_delay)
+        self.backoff_max = self.adb_config.get('reconnect_backoff_max', 300)
+        self.backoff_jitter = self.adb_config.get('reconnect_jitter', 0.2)
+        self.failure_threshold = self.adb_config.get('circuit_failure_threshold', self.retry_count)
+        self.setup_settle_time = self.adb_config.get('setup_settle_time', 2)
+        self.circuit_state = CIRCUIT_CLOSED
+        self.consecutive_failures = 0
+        self.reconnect_attempts = 0
+        self.next_attempt_at: Optional[float] = None
         self.connection_established = False
+        # 每次建立或断开连接时递增，供各处缓存判断是否需要重新加载
+        self.connection_generation = 0
         self.target_device = f"{self.host}:{self.port}"
+        self.shell_session = ADBShellSession(
+            ['adb', '-s', self.target_device, 'shell'],
+            timeout=self.shell_timeout
+        )
+        self.client = ADBClient(
+            self.adb_config.get('server_host', '127.0.0.1'),
+            self.adb_config.get('server_port', 5037),
+            timeout=self.shell_timeout
+        )
+        
+        # 设备状态跟踪
+        self.devices: List[dict] = []
+        self.device_states: Dict[str, str] = {}
+        self.tracking = False
+        self._track_task: Optional[asyncio.Task] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._connection_callbacks: List[Callable] = []
+        self._last_status: Optional[dict] = None
+        
+    @property
+    def native(self) -> bool:
+        """是否使用原生ADB协议传输"""
+        return self.transport == 'native'
         
     def get_adb_prefix(self) -> str:
         """获取带设备指定的ADB命令前缀
@@ -46,51 +191,157 @@ class ADBManager:
         """
         return f"adb -s {self.target_device}"
         
+    async def shell(self, command: str, timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """在目标设备上执行shell命令
+        
+        原生传输下直接通过adb server执行；命令行传输下默认复用持久Shell通道，
+        通道断开时自动重建
+        
+        Args:
+            command: 设备端shell命令
+            timeout: 超时时间（秒）
+            
+        Returns:
+            subprocess.CompletedProcess: 命令执行结果
+        """
+        if not self.native and not self.persistent_shell:
+            return await run_adb_shell_once(command, self.target_device)
+            
+        start = time.monotonic()
+        if self.native:
+            result = await self.client.shell(self.target_device, command, timeout)
+        else:
+            result = await self.shell_session.run(command, timeout)
+            
+        get_runner().record(
+            command_kind(command),
+            time.monotonic() - start,
+            ok=result.returncode == 0,
+            timed_out=result.returncode == TIMEOUT_RETURNCODE
+        )
+        return result
+        
+    async def exec_out(self, command: str, timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """执行设备端命令并以bytes返回原始输出（adb exec-out），用于拉取二进制文件
+        
+        不占用持久Shell通道
+        
+        Args:
+            command: 设备端命令
+            timeout: 超时时间（秒）
+            
+        Returns:
+            subprocess.CompletedProcess: 命令执行结果，stdout为bytes
+        """
+        if self.native:
+            start = time.monotonic()
+            result = await self.client.exec_out(self.target_device, command, timeout)
+            get_runner().record(
+                command_kind(command, 'exec-out'),
+                time.monotonic() - start,
+                ok=result.returncode == 0,
+                timed_out=result.returncode == TIMEOUT_RETURNCODE
+            )
+            return result
+        return await get_runner().run(
+            ['adb', '-s', self.target_device, 'exec-out', command],
+            timeout=timeout or self.shell_timeout,
+            kind=command_kind(command, 'exec-out'),
+            text=False
+        )
+        
+    async def shell_stream(self, command: str) -> AsyncIterator[str]:
+        """流式执行设备端命令，逐行产出输出
+        
+        用于logcat等长时间运行的命令，迭代结束或被关闭时释放通道
+        
+        Args:
+            command: 设备端shell命令
+            
+        Yields:
+            str: 去除换行符的输出行
+        """
+        if self.native:
+            async for line in self.client.shell_stream(self.target_device, command):
+                yield line
+            return
+            
+        process = await asyncio.create_subprocess_exec(
+            'adb', '-s', self.target_device, 'shell', command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=STREAM_LIMIT
+        )
+        try:
+            while True:
+                raw = await process.stdout.readline()
+                if not raw:
+                    break
+                yield raw.decode('utf-8', errors='ignore').rstrip('\r\n')
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+        
     async def start(self):
         """启动ADB管理器"""
         print("🔌 ADB连接管理器启动")
         
+        if self.track_devices:
+            self._track_task = asyncio.ensure_future(self._track_device_states())
+        
         if self.auto_connect:
             success = await self.establish_connection()
             if success:
                 print("✅ ADB连接已建立")
             else:
-                print("⚠️ ADB连接建立失败，将在监控过程中重试")
+                print("⚠️ ADB连接建立失败，已转入后台重连")
+                self._schedule_reconnect()
         else:
             print("ℹ️ ADB自动连接已禁用")
             
+    @property
+    def circuit_open(self) -> bool:
+        """ADB是否处于熔断状态（连续重连失败，正在退避）"""
+        return self.circuit_state == CIRCUIT_OPEN
+        
+    @property
+    def reconnecting(self) -> bool:
+        """后台重连任务是否在进行中"""
+        return self._reconnect_task is not None and not self._reconnect_task.done()
+        
     async def establish_connection(self) -> bool:
         """建立ADB连接
         
+        先尝试直接connect（快速路径）；失败时才执行设置命令（如重启adbd）后再连接一次。
+        重试与退避由后台重连调度负责。
+        
         Returns:
             bool: 连接是否成功建立
         """
         print(f"🔌 正在建立ADB连接到 {self.host}:{self.port}")
         
         try:
-            # 执行预设置命令
-            if self.setup_commands:
-                print("🔧 执行ADB设置命令...")
+            success = await self._attempt_connection()
+            
+            if not success and self.setup_commands:
+                # 执行预设置命令
+                print("🔧 直接连接失败，执行ADB设置命令...")
                 for cmd in self.setup_commands:
                     await self._run_setup_command(cmd)
-                    await asyncio.sleep(1)  # 命令间等待
                     
-            # 等待服务启动
-            await asyncio.sleep(2)
-            
-            # 尝试连接
-            for attempt in range(self.retry_count):
-                print(f"🔄 连接尝试 {attempt + 1}/{self.retry_count}")
-                
+                # 等待adbd重新监听
+                await asyncio.sleep(self.setup_settle_time)
                 success = await self._attempt_connection()
-                if success:
-                    self.connection_established = True
-                    return True
-                    
-                if attempt < self.retry_count - 1:
-                    print(f"⏳ 等待 {self.retry_delay} 秒后重试...")
-                    await asyncio.sleep(self.retry_delay)
-                    
+                
+            if success:
+                self.connection_established = True
+                # 新连接建立后旧的Shell通道和属性快照已失效
+                await self.shell_session.close()
+                self.property_cache.invalidate()
+                self.connection_generation += 1
+                return True
+                
             print("❌ ADB连接建立失败")
             return False
             
@@ -98,6 +349,76 @@ class ADBManager:
             print(f"❌ ADB连接过程异常: {e}")
             return False
             
+    def get_reconnect_status(self) -> dict:
+        """获取重连调度状态（不发起ADB请求）
+        
+        Returns:
+            dict: 熔断状态、连续失败次数、距下次重连的秒数等
+        """
+        next_in = None
+        if self.next_attempt_at is not None:
+            next_in = max(0, int(self.next_attempt_at - time.monotonic()))
+            
+        return {
+            'circuit_state': self.circuit_state,
+            'consecutive_failures': self.consecutive_failures,
+            'reconnect_attempts': self.reconnect_attempts,
+            'reconnecting': self.reconnecting,
+            'next_attempt_in': next_in
+        }
+        
+    async def _reconnect_loop(self) -> bool:
+        """后台重连循环
+        
+        失败后按指数退避并加入随机抖动等待，连续失败达到阈值后进入熔断状态，
+        退避结束后以半开状态试探重连。
+        
+        Returns:
+            bool: 最终是否重连成功（任务被取消时不返回）
+        """
+        while True:
+            if self.tracking and self.device_states.get(self.target_device) == 'device':
+                # 设备已恢复（如adb server自动重连）
+                break
+                
+            if self.circuit_state == CIRCUIT_OPEN:
+                self.circuit_state = CIRCUIT_HALF_OPEN
+                
+            self.reconnect_attempts += 1
+            self.next_attempt_at = None
+            if await self.establish_connection():
+                break
+                
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold:
+                if self.circuit_state == CIRCUIT_CLOSED:
+                    print(f"⚡ ADB连续 {self.consecutive_failures} 次重连失败，进入熔断状态")
+                self.circuit_state = CIRCUIT_OPEN
+                
+            delay = self._backoff_delay(self.consecutive_failures)
+            self.next_attempt_at = time.monotonic() + delay
+            print(f"⏳ {delay:.1f} 秒后重试ADB连接 (已失败 {self.consecutive_failures} 次)")
+            await asyncio.sleep(delay)
+            
+        if self.consecutive_failures:
+            print(f"✅ ADB连接已恢复 (失败 {self.consecutive_failures} 次后)")
+        self.circuit_state = CIRCUIT_CLOSED
+        self.consecutive_failures = 0
+        self.next_attempt_at = None
+        return True
+        
+    def _backoff_delay(self, failures: int) -> float:
+        """计算带随机抖动的指数退避时间
+        
+        Args:
+            failures: 连续失败次数（从1开始）
+            
+        Returns:
+            float: 等待秒数
+        """
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (failures - 1)))
+        return delay * random.uniform(1 - self.backoff_jitter, 1 + self.backoff_jitter)
+        
     async def _run_setup_command(self, command: str):
         """执行设置命令
         
@@ -106,17 +427,17 @@ class ADBManager:
         """
         try:
             print(f"🔧 执行: {command}")
-            process = await asyncio.create_subprocess_shell(
-                command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
+            # 普通命令直接执行，包含管道/重定向等语法时才交给sh解释
+            if SHELL_METACHARACTERS & set(command):
+                argv = ['sh', '-c', command]
+            else:
+                argv = shlex.split(command)
+            result = await get_runner().run(argv, timeout=self.shell_timeout, kind='setup')
             
-            if process.returncode == 0:
+            if result.returncode == 0:
                 print(f"✅ 命令执行成功")
             else:
-                error_msg = stderr.decode('utf-8', errors='ignore').strip()
+                error_msg = result.stderr.strip()
                 if error_msg:
                     print(f"⚠️ 命令警告: {error_msg}")
                     
@@ -130,16 +451,13 @@ class ADBManager:
             bool: 连接是否成功
         """
         try:
-            # 使用adb connect命令
-            connect_cmd = f"adb connect {self.host}:{self.port}"
-            process = await asyncio.create_subprocess_shell(
-                connect_cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
-            
-            output = stdout.decode('utf-8', errors='ignore').strip()
+            if self.native:
+                await self._ensure_server()
+                output = (await self.client.connect(self.host, self.port)).strip()
+            else:
+                # 使用adb connect命令
+                result = await self._run_adb_cli('connect', f"{self.host}:{self.port}")
+                output = result.stdout.strip()
             print(f"🔌 ADB连接输出: {output}")
             
             # 检查连接是否成功
@@ -160,21 +478,12 @@ class ADBManager:
             bool: 设备是否可用
         """
         try:
-            process = await asyncio.create_subprocess_shell(
-                "adb devices",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
-            
-            output = stdout.decode('utf-8', errors='ignore')
+            devices = await self._list_devices() or []
             
             # 检查是否有设备连接
-            lines = output.strip().split('\n')
-            for line in lines[1:]:  # 跳过标题行
-                if '\tdevice' in line:
-                    device_id = line.split('\t')[0]
-                    print(f"✅ 检测到设备: {device_id}")
+            for device in devices:
+                if device['status'] == 'device':
+                    print(f"✅ 检测到设备: {device['id']}")
                     return True
                     
             print("❌ 未检测到可用设备")
@@ -190,16 +499,14 @@ class ADBManager:
         Returns:
             dict: 连接状态信息
         """
+        if self.tracking:
+            return self.get_connection_status()
+            
         try:
             # 检查设备列表
-            process = await asyncio.create_subprocess_shell(
-                "adb devices",
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
+            devices = await self._list_devices()
             
-            if process.returncode != 0:
+            if devices is None:
                 return {
                     'connected': False,
                     'error': 'ADB command failed',
@@ -207,27 +514,8 @@ class ADBManager:
                     'target_device': f"{self.host}:{self.port}"
                 }
                 
-            output = stdout.decode('utf-8', errors='ignore')
-            lines = output.strip().split('\n')
-            
-            devices = []
-            target_connected = False
-            target_device = f"{self.host}:{self.port}"
-            
-            for line in lines[1:]:  # 跳过标题行
-                if '\t' in line:
-                    device_id, status = line.split('\t')
-                    devices.append({'id': device_id, 'status': status})
-                    
-                    if device_id == target_device and status == 'device':
-                        target_connected = True
-                        
-            return {
-                'connected': target_connected,
-                'devices': devices,
-                'target_device': target_device,
-                'device_count': len([d for d in devices if d['status'] == 'device'])
-            }
+            self._last_status = self._build_status(devices)
+            return self._last_status
             
         except Exception as e:
             return {
@@ -237,38 +525,189 @@ class ADBManager:
                 'target_device': f"{self.host}:{self.port}"
             }
             
+    def get_connection_status(self) -> dict:
+        """获取最近已知的连接状态（不发起ADB请求）
+        
+        设备跟踪生效时为实时状态，否则为最近一次轮询的结果
+        
+        Returns:
+            dict: 连接状态信息，格式同 check_connection_status
+        """
+        if self.tracking:
+            return self._build_status(self.devices)
+        if self._last_status:
+            return self._last_status
+        return {
+            'connected': False,
+            'devices': [],
+            'target_device': self.target_device,
+            'device_count': 0
+        }
+        
+    def add_connection_callback(self, callback: Callable):
+        """注册目标设备状态变化回调
+        
+        Args:
+            callback: 回调函数 callback(old_state, new_state)，可以是协程函数；
+                      状态为 'device' / 'offline' / 'unauthorized' 等，设备不在列表中时为None
+        """
+        self._connection_callbacks.append(callback)
+        
+    def _build_status(self, devices: List[dict]) -> dict:
+        """根据设备列表构建连接状态字典"""
+        return {
+            'connected': any(
+                d['id'] == self.target_device and d['status'] == 'device' for d in devices
+            ),
+            'devices': devices,
+            'target_device': self.target_device,
+            'device_count': len([d for d in devices if d['status'] == 'device'])
+        }
+        
+    async def _track_device_states(self):
+        """维持 host:track-devices 订阅，订阅中断时回退为轮询并自动重新订阅"""
+        delay = 1
+        while True:
+            try:
+                await self._ensure_server()
+                async for devices in self.client.track_devices():
+                    if not self.tracking:
+                        print("📡 ADB设备状态订阅已建立")
+                        self.tracking = True
+                        delay = 1
+                    self._update_device_states(devices)
+            except asyncio.CancelledError:
+                self.tracking = False
+                raise
+            except (OSError, ADBProtocolError, asyncio.IncompleteReadError,
+                    asyncio.TimeoutError, ValueError) as e:
+                print(f"⚠️ ADB设备状态订阅中断: {e}")
+                
+            self.tracking = False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
+            
+    def _update_device_states(self, devices: List[dict]):
+        """更新设备状态表，目标设备状态变化时触发回调"""
+        old_state = self.device_states.get(self.target_device)
+        self.devices = devices
+        self.device_states = {d['id']: d['status'] for d in devices}
+        new_state = self.device_states.get(self.target_device)
+        
+        if old_state == new_state:
+            return
+            
+        print(f"🔀 ADB设备状态变化: {old_state or 'disconnected'} → {new_state or 'disconnected'}")
+        
+        if old_state == 'device' and new_state != 'device':
+            # 连接断开，立即重连而不是等待下一个监控周期
+            asyncio.ensure_future(self.shell_session.close())
+            self.property_cache.invalidate()
+            self.connection_generation += 1
+            if self.auto_connect:
+                self._schedule_reconnect()
+        elif new_state == 'device' and self.reconnecting and self.next_attempt_at is not None:
+            # 设备在退避等待期间自行恢复，无需继续重连
+            self._reconnect_task.cancel()
+            self.circuit_state = CIRCUIT_CLOSED
+            self.consecutive_failures = 0
+            self.next_attempt_at = None
+            
+        for callback in self._connection_callbacks:
+            try:
+                result = callback(old_state, new_state)
+                if asyncio.iscoroutine(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                print(f"❌ ADB状态回调执行失败: {e}")
+                
+    def _schedule_reconnect(self) -> asyncio.Task:
+        """调度后台重连任务，已有重连进行中时复用同一任务"""
+        if not self.reconnecting:
+            self._reconnect_task = asyncio.ensure_future(self._reconnect_loop())
+        return self._reconnect_task
+        
+    async def _list_devices(self) -> Optional[List[dict]]:
+        """获取adb server上的设备列表
+        
+        Returns:
+            Optional[List[dict]]: 设备列表，获取失败时返回None
+        """
+        if self.native:
+            try:
+                return await self.client.devices()
+            except (OSError, ADBProtocolError, asyncio.TimeoutError) as e:
+                print(f"❌ 获取设备列表失败: {e}")
+                await self._ensure_server()
+                return None
+                
+        result = await self._run_adb_cli('devices')
+        if result.returncode != 0:
+            return None
+        return parse_device_list(result.stdout)
+        
+    async def _ensure_server(self):
+        """确保adb server已运行（原生传输依赖server的smart socket接口）"""
+        try:
+            await self.client.version()
+        except (OSError, ADBProtocolError, asyncio.TimeoutError):
+            print("🔧 adb server未响应，正在启动...")
+            await self._run_adb_cli('start-server')
+            
+    async def _run_adb_cli(self, *args: str) -> subprocess.CompletedProcess:
+        """执行adb命令行（不经过中间shell）
+        
+        Args:
+            *args: adb参数，如 ('connect', '127.0.0.1:5555')
+            
+        Returns:
+            subprocess.CompletedProcess: 命令执行结果
+        """
+        return await get_runner().run(['adb', *args], timeout=self.shell_timeout)
+            
     async def ensure_connection(self) -> bool:
         """确保ADB连接正常
         
+        连接断开时只调度后台重连并立即返回，不会阻塞调用方
+        
         Returns:
-            bool: 连接是否正常
+            bool: 当前连接是否正常
         """
         if not self.auto_connect:
+            if self.tracking:
+                return any(state == 'device' for state in self.device_states.values())
             return await self.check_device_availability()
             
-        # 检查当前连接状态
+        # 检查当前连接状态（设备跟踪生效时为内存查询）
         status = await self.check_connection_status()
         
         if status['connected']:
             return True
             
-        # 如果未连接，尝试重新建立连接
-        print("🔄 检测到ADB连接断开，正在重新连接...")
-        return await self.establish_connection()
+        # 如果未连接，在后台重连（与状态回调触发的重连共用同一任务）
+        if not self.reconnecting:
+            print("🔄 检测到ADB连接断开，已调度后台重连...")
+            self._schedule_reconnect()
+        return False
         
     async def disconnect(self):
         """断开ADB连接"""
+        if self._track_task:
+            self._track_task.cancel()
+            self._track_task = None
+        if self._reconnect_task and not self._reconnect_task.done():
+            self._reconnect_task.cancel()
+        await self.logcat.stop()
+        await self.shell_session.close()
+        
         if not self.connection_established:
             return
             
         try:
-            disconnect_cmd = f"adb disconnect {self.host}:{self.port}"
-            process = await asyncio.create_subprocess_shell(
-                disconnect_cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            await process.communicate()
+            if self.native:
+                await self.client.disconnect(self.host, self.port)
+            else:
+                await self._run_adb_cli('disconnect', f"{self.host}:{self.port}")
             
             self.connection_established = False
             print(f"🔌 已断开ADB连接: {self.host}:{self.port}")
@@ -276,6 +715,34 @@ class ADBManager:
         except Exception as e:
             print(f"❌ 断开ADB连接失败: {e}")
             
+    async def get_properties(self, refresh: bool = False) -> Dict[str, str]:
+        """获取设备系统属性快照
+        
+        缓存有效时直接返回；否则执行一次全量 `getprop` 并解析
+        
+        Args:
+            refresh: 是否强制刷新
+            
+        Returns:
+            Dict[str, str]: 属性字典，获取失败时返回空字典
+        """
+        if not refresh and self.property_cache.valid:
+            self.property_cache.hits += 1
+            return self.property_cache.properties
+            
+        self.property_cache.misses += 1
+        result = await self.shell('getprop')
+        properties = parse_getprop(result.stdout) if result.returncode == 0 else {}
+        
+        if not properties:
+            error_msg = result.stderr.strip() or f"返回码 {result.returncode}"
+            print(f"❌ 获取设备属性失败: {error_msg}")
+            return {}
+            
+        self.property_cache.update(properties)
+        print(f"📱 已加载设备属性快照 ({len(properties)} 项)")
+        return properties
+        
     async def get_device_info(self) -> dict:
         """获取设备信息
         
@@ -283,54 +750,21 @@ class ADBManager:
             dict: 设备信息
         """
         try:
-            # 获取设备属性，使用设备指定
-            adb_prefix = self.get_adb_prefix()
-            commands = {
-                'model': f'{adb_prefix} shell getprop ro.product.model',
-                'brand': f'{adb_prefix} shell getprop ro.product.brand',
-                'version': f'{adb_prefix} shell getprop ro.build.version.release',
-                'sdk': f'{adb_prefix} shell getprop ro.build.version.sdk',
-                'serial': f'{adb_prefix} shell getprop ro.serialno'
-            }
+            properties = await self.get_properties()
             
-            device_info = {}
+            device_info = {
+                key: properties.get(prop) or 'Unknown'
+                for key, prop in DEVICE_INFO_PROPERTIES.items()
+            }
             
-            for key, cmd in commands.items():
-                try:
-                    process = await asyncio.create_subprocess_shell(
-                        cmd,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE
-                    )
-                    stdout, stderr = await process.communicate()
-                    
-                    if process.returncode == 0:
-                        value = stdout.decode('utf-8', errors='ignore').strip()
-                        if value:
-                            device_info[key] = value
-                            print(f"📱 {key}: {value}")
-                        else:
-                            device_info[key] = 'Unknown'
-                            print(f"⚠️ {key}: 空值")
-                    else:
-                        error_msg = stderr.decode('utf-8', errors='ignore').strip()
-                        device_info[key] = 'Unknown'
-                        print(f"❌ {key} 获取失败: {error_msg}")
-                        
-                except Exception as e:
-                    device_info[key] = 'Unknown'
-                    print(f"❌ {key} 执行异常: {e}")
-                    
             # 添加诊断信息
             if all(value == 'Unknown' for value in device_info.values()):
                 print(f"⚠️ 所有设备信息都为Unknown，可能是ADB连接问题")
                 print(f"   目标设备: {self.target_device}")
-                print(f"   使用的ADB前缀: {adb_prefix}")
-            else:
-                print(f"✅ 成功获取部分设备信息")
+                print(f"   使用的ADB前缀: {self.get_adb_prefix()}")
                 
             return device_info
             
         except Exception as e:
             print(f"❌ 获取设备信息失败: {e}")
-            return {}
\ No newline at end of file
+            return {}
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+ADB原生协议客户端模块
+
+不经过 `adb` 命令行，直接通过adb server的smart socket接口(默认5037端口)通信，包括:
+- host服务: version / devices / connect / disconnect / features
+- 设备状态变化订阅 (host:track-devices)
+- 设备shell命令（优先使用shell v2协议获取退出码）
+- 以异步迭代器形式流式读取shell输出（如logcat）
+- 二进制安全的命令输出读取 (exec:，等同于 adb exec-out)
+"""
+
+import asyncio
+import struct
+import subprocess
+import uuid
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+
+# 单行读取上限，与持久Shell通道保持一致
+STREAM_LIMIT = 1024 * 1024
+
+# shell v2 数据包类型
+SHELL_V2_STDOUT = 1
+SHELL_V2_STDERR = 2
+SHELL_V2_EXIT = 3
+
+
+class ADBProtocolError(Exception):
+    """ADB协议错误（服务端返回FAIL或响应格式异常）"""
+
+
+class ADBClient:
+    """ADB smart socket 客户端
+
+    每个请求使用一条独立的TCP连接，连接本身即为请求的生命周期，
+    因此多个请求可以并发执行而无需进程创建开销。
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 5037, timeout: float = 15.0):
+        """初始化客户端
+
+        Args:
+            host: adb server地址
+            port: adb server端口
+            timeout: 单次请求默认超时时间（秒）
+        """
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._features: Dict[str, Set[str]] = {}
+
+    async def version(self) -> int:
+        """获取adb server协议版本
+
+        Returns:
+            int: 协议版本号
+        """
+        return int(await self._host_query('host:version'), 16)
+
+    async def devices(self) -> List[dict]:
+        """获取设备列表
+
+        Returns:
+            List[dict]: 设备列表，格式与 `adb devices` 解析结果一致
+        """
+        return parse_device_list(await self._host_query('host:devices'))
+
+    async def track_devices(self) -> AsyncIterator[List[dict]]:
+        """订阅设备列表变化
+
+        adb server在订阅建立时推送一次完整列表，之后每次设备状态变化推送一次
+
+        Yields:
+            List[dict]: 当前完整的设备列表
+
+        Raises:
+            asyncio.IncompleteReadError: adb server关闭了订阅连接
+        """
+        reader, writer = await asyncio.wait_for(self._open('host:track-devices'), timeout=self.timeout)
+        try:
+            while True:
+                yield parse_device_list(await read_length_prefixed(reader))
+        finally:
+            writer.close()
+
+    async def connect(self, host: str, port: int) -> str:
+        """连接网络ADB设备
+
+        Args:
+            host: 设备地址
+            port: 设备端口
+
+        Returns:
+            str: adb server返回的连接结果文本
+        """
+        self._features.pop(f"{host}:{port}", None)
+        return await self._host_query(f'host:connect:{host}:{port}')
+
+    async def disconnect(self, host: str, port: int) -> str:
+        """断开网络ADB设备
+
+        Args:
+            host: 设备地址
+            port: 设备端口
+
+        Returns:
+            str: adb server返回的结果文本
+        """
+        self._features.pop(f"{host}:{port}", None)
+        return await self._host_query(f'host:disconnect:{host}:{port}')
+
+    async def features(self, serial: str) -> Set[str]:
+        """获取设备支持的特性列表（带缓存）
+
+        Args:
+            serial: 设备序列号
+
+        Returns:
+            Set[str]: 特性集合，如 {'shell_v2', 'cmd', ...}
+        """
+        if serial not in self._features:
+            response = await self._host_query(f'host-serial:{serial}:features')
+            self._features[serial] = set(filter(None, response.strip().split(',')))
+        return self._features[serial]
+
+    async def shell(self, serial: str, command: str,
+                    timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """在设备上执行shell命令
+
+        Args:
+            serial: 设备序列号
+            command: 设备端shell命令
+            timeout: 超时时间（秒）
+
+        Returns:
+            subprocess.CompletedProcess: 命令执行结果，超时返回码为124
+        """
+        try:
+            return await asyncio.wait_for(
+                self._shell(serial, command),
+                timeout=timeout or self.timeout
+            )
+        except asyncio.TimeoutError:
+            return subprocess.CompletedProcess(command, 124, "", "timeout")
+        except (OSError, ADBProtocolError, asyncio.IncompleteReadError) as e:
+            return subprocess.CompletedProcess(command, 255, "", str(e))
+
+    async def exec_out(self, serial: str, command: str,
+                       timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """执行命令并以bytes返回原始输出（不经过pty，不转换换行符）
+
+        Args:
+            serial: 设备序列号
+            command: 设备端命令
+            timeout: 超时时间（秒）
+
+        Returns:
+            subprocess.CompletedProcess: stdout为bytes；exec服务没有退出码，成功时返回码为0
+        """
+        async def read_all():
+            reader, writer = await self._open_transport(serial, f"exec:{command}")
+            try:
+                return await reader.read()
+            finally:
+                writer.close()
+
+        try:
+            stdout = await asyncio.wait_for(read_all(), timeout=timeout or self.timeout)
+            return subprocess.CompletedProcess(command, 0, stdout, "")
+        except asyncio.TimeoutError:
+            return subprocess.CompletedProcess(command, 124, b"", "timeout")
+        except (OSError, ADBProtocolError) as e:
+            return subprocess.CompletedProcess(command, 255, b"", str(e))
+
+    async def shell_stream(self, serial: str, command: str) -> AsyncIterator[str]:
+        """流式执行shell命令，逐行产出stdout
+
+        Args:
+            serial: 设备序列号
+            command: 设备端shell命令
+
+        Yields:
+            str: 去除换行符的输出行
+        """
+        use_v2 = await self._supports_shell_v2(serial)
+        service = f"shell,v2,raw:{command}" if use_v2 else f"shell:{command}"
+        reader, writer = await self._open_transport(serial, service)
+
+        try:
+            if not use_v2:
+                while True:
+                    raw = await reader.readline()
+                    if not raw:
+                        break
+                    yield raw.decode('utf-8', errors='ignore').rstrip('\r\n')
+                return
+
+            pending = b""
+            while True:
+                packet_id, data = await _read_v2_packet(reader)
+                if packet_id is None or packet_id == SHELL_V2_EXIT:
+                    break
+                if packet_id != SHELL_V2_STDOUT:
+                    continue
+                pending += data
+                *lines, pending = pending.split(b"\n")
+                for line in lines:
+                    yield line.decode('utf-8', errors='ignore').rstrip('\r')
+            if pending:
+                yield pending.decode('utf-8', errors='ignore').rstrip('\r')
+        finally:
+            writer.close()
+
+    async def _shell(self, serial: str, command: str) -> subprocess.CompletedProcess:
+        """执行shell命令并收集完整输出"""
+        if await self._supports_shell_v2(serial):
+            reader, writer = await self._open_transport(serial, f"shell,v2,raw:{command}")
+            stdout, stderr = bytearray(), bytearray()
+            returncode = 255
+            try:
+                while True:
+                    packet_id, data = await _read_v2_packet(reader)
+                    if packet_id is None:
+                        break
+                    if packet_id == SHELL_V2_STDOUT:
+                        stdout.extend(data)
+                    elif packet_id == SHELL_V2_STDERR:
+                        stderr.extend(data)
+                    elif packet_id == SHELL_V2_EXIT:
+                        returncode = data[0] if data else 255
+                        break
+            finally:
+                writer.close()
+
+            return subprocess.CompletedProcess(
+                command,
+                returncode,
+                stdout.decode('utf-8', errors='ignore'),
+                stderr.decode('utf-8', errors='ignore')
+            )
+
+        # 旧设备不支持shell v2: 通过结束哨兵获取退出码，stderr与stdout合并
+        marker = f"__ISG_RC_{uuid.uuid4().hex}__"
+        reader, writer = await self._open_transport(serial, f"shell:{command}; echo \"{marker}$?\"")
+        try:
+            output = (await reader.read()).decode('utf-8', errors='ignore').replace('\r\n', '\n')
+        finally:
+            writer.close()
+
+        index = output.rfind(marker)
+        if index < 0:
+            return subprocess.CompletedProcess(command, 255, output, "missing exit marker")
+        code = output[index + len(marker):].strip()
+        returncode = int(code) if code.isdigit() else 255
+        return subprocess.CompletedProcess(command, returncode, output[:index], "")
+
+    async def _supports_shell_v2(self, serial: str) -> bool:
+        """设备是否支持shell v2协议"""
+        try:
+            return 'shell_v2' in await self.features(serial)
+        except ADBProtocolError:
+            return False
+
+    async def _open(self, service: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """连接adb server并发送一个服务请求
+
+        Args:
+            service: 服务名，如 'host:devices'
+
+        Returns:
+            Tuple[StreamReader, StreamWriter]: 已收到OKAY的连接
+
+        Raises:
+            ADBProtocolError: 服务端返回FAIL
+        """
+        reader, writer = await asyncio.open_connection(self.host, self.port, limit=STREAM_LIMIT)
+        try:
+            await _send_request(reader, writer, service)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    async def _open_transport(self, serial: str,
+                              service: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """切换到指定设备的传输通道并发送设备服务请求"""
+        reader, writer = await self._open(f'host:transport:{serial}')
+        try:
+            await _send_request(reader, writer, service)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    async def _host_query(self, service: str) -> str:
+        """执行返回单个长度前缀数据块的host服务"""
+        async def query():
+            reader, writer = await self._open(service)
+            try:
+                return await read_length_prefixed(reader)
+            finally:
+                writer.close()
+
+        return await asyncio.wait_for(query(), timeout=self.timeout)
+
+
+async def _send_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, service: str):
+    """发送长度前缀的请求并校验OKAY/FAIL状态"""
+    payload = service.encode('utf-8')
+    writer.write(f"{len(payload):04x}".encode('ascii') + payload)
+    await writer.drain()
+
+    status = await reader.readexactly(4)
+    if status == b"OKAY":
+        return
+    if status == b"FAIL":
+        raise ADBProtocolError(await read_length_prefixed(reader))
+    raise ADBProtocolError(f"未知响应: {status!r}")
+
+
+async def read_length_prefixed(reader: asyncio.StreamReader) -> str:
+    """读取一个4位十六进制长度前缀的数据块
+
+    Args:
+        reader: 连接读取端
+
+    Returns:
+        str: 数据块内容
+    """
+    length = int(await reader.readexactly(4), 16)
+    data = await reader.readexactly(length) if length else b""
+    return data.decode('utf-8', errors='ignore')
+
+
+async def _read_v2_packet(reader: asyncio.StreamReader) -> Tuple[Optional[int], bytes]:
+    """读取一个shell v2数据包，连接关闭时返回 (None, b'')"""
+    try:
+        header = await reader.readexactly(5)
+    except asyncio.IncompleteReadError:
+        return None, b""
+    packet_id, length = header[0], struct.unpack('<I', header[1:])[0]
+    return packet_id, await reader.readexactly(length)
+
+
+def parse_device_list(output: str) -> List[dict]:
+    """解析设备列表文本（`adb devices` 输出或 host:devices 响应）
+
+    Args:
+        output: 设备列表文本
+
+    Returns:
+        List[dict]: [{'id': ..., 'status': ...}, ...]
+    """
+    devices = []
+    for line in output.strip().split('\n'):
+        if '\t' in line:
+            device_id, status = line.split('\t', 1)
+            devices.append({'id': device_id.strip(), 'status': status.strip()})
+    return devices
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+ADB持久Shell会话模块
+
+维护一条长期存在的 `adb -s <target> shell` 通道，包括:
+- 基于哨兵行的请求/响应分帧（命令输出 + 退出码）
+- 监控器、守护器、日志收集器共享同一通道，请求串行执行
+- 通道断开或超时后自动重建
+"""
+
+import asyncio
+import subprocess
+import uuid
+from typing import List, Optional
+
+from command_runner import TIMEOUT_RETURNCODE, command_kind, get_runner
+
+
+# 单行读取上限，避免大块无换行输出触发LimitOverrunError
+STREAM_LIMIT = 1024 * 1024
+
+
+class ADBShellSession:
+    """持久化ADB Shell会话
+
+    每条命令以 `{ <command>\\n} </dev/null` 的形式写入设备shell，随后输出一行
+    `<marker> <exit_code>` 作为结束哨兵。读取到哨兵即视为该命令结束，
+    哨兵之前的输出即为命令的stdout。
+    """
+
+    def __init__(self, argv: List[str], timeout: float = 15.0):
+        """初始化Shell会话
+
+        Args:
+            argv: 启动shell通道的命令，如 ['adb', '-s', '127.0.0.1:5555', 'shell']
+            timeout: 单条命令默认超时时间（秒）
+        """
+        self.argv = argv
+        self.timeout = timeout
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.spawn_count = 0
+        self.command_count = 0
+        self._marker = f"__ISG_END_{uuid.uuid4().hex}__"
+        self._lock: Optional[asyncio.Lock] = None
+        self._stderr_buffer = bytearray()
+        self._stderr_task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        """通道进程是否仍然存活"""
+        return self.process is not None and self.process.returncode is None
+
+    async def run(self, command: str, timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """在持久通道上执行一条设备端命令
+
+        Args:
+            command: 设备端shell命令
+            timeout: 超时时间（秒），默认使用会话超时
+
+        Returns:
+            subprocess.CompletedProcess: 命令执行结果，超时返回码为124
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            try:
+                if not self.alive:
+                    await self._spawn()
+                return await asyncio.wait_for(
+                    self._execute(command),
+                    timeout=timeout or self.timeout
+                )
+            except asyncio.TimeoutError:
+                print(f"⏰ ADB Shell命令超时，重建通道: {command}")
+                await self._kill()
+                return subprocess.CompletedProcess(command, TIMEOUT_RETURNCODE, "", "timeout")
+            except (OSError, EOFError, ValueError) as e:
+                # 通道断开、写入失败或输出超长，下次调用时自动重建
+                await self._kill()
+                return subprocess.CompletedProcess(command, 255, "", str(e))
+
+    async def close(self):
+        """关闭Shell通道"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if not self.alive:
+                return
+            try:
+                self.process.stdin.write(b"exit\n")
+                await self.process.stdin.drain()
+                await asyncio.wait_for(self.process.wait(), timeout=2)
+            except (OSError, asyncio.TimeoutError):
+                pass
+            await self._kill()
+
+    async def _spawn(self):
+        """启动新的shell通道进程"""
+        self.process = await asyncio.create_subprocess_exec(
+            *self.argv,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=STREAM_LIMIT
+        )
+        self._stderr_buffer.clear()
+        self._stderr_task = asyncio.ensure_future(self._drain_stderr(self.process))
+        self.spawn_count += 1
+        print(f"🔗 ADB Shell通道已建立 (第 {self.spawn_count} 次)")
+
+    async def _kill(self):
+        """终止当前通道进程"""
+        process, self.process = self.process, None
+        if process and process.returncode is None:
+            try:
+                process.kill()
+                await process.wait()
+            except ProcessLookupError:
+                pass
+        if self._stderr_task:
+            self._stderr_task.cancel()
+            self._stderr_task = None
+
+    async def _drain_stderr(self, process: asyncio.subprocess.Process):
+        """持续读取通道的stderr，避免管道写满阻塞设备端"""
+        try:
+            while True:
+                chunk = await process.stderr.read(4096)
+                if not chunk:
+                    break
+                self._stderr_buffer.extend(chunk)
+        except asyncio.CancelledError:
+            pass
+
+    async def _execute(self, command: str) -> subprocess.CompletedProcess:
+        """写入一条命令并读取到结束哨兵为止
+
+        Args:
+            command: 设备端shell命令
+
+        Returns:
+            subprocess.CompletedProcess: 命令执行结果
+
+        Raises:
+            EOFError: 通道在命令完成前关闭
+        """
+        self.command_count += 1
+        frame = f"{{ {command}\n}} </dev/null; echo \"{self._marker} $?\"\n"
+        self.process.stdin.write(frame.encode('utf-8'))
+        await self.process.stdin.drain()
+
+        output = []
+        returncode = 1
+        while True:
+            raw = await self.process.stdout.readline()
+            if not raw:
+                raise EOFError("ADB Shell通道已关闭")
+
+            line = raw.decode('utf-8', errors='ignore')
+            index = line.find(self._marker)
+            if index < 0:
+                output.append(line)
+                continue
+
+            # 命令输出末尾没有换行时，哨兵会与最后一行粘连
+            if index > 0:
+                output.append(line[:index])
+            code = line[index + len(self._marker):].strip()
+            returncode = int(code) if code.lstrip('-').isdigit() else 1
+            break
+
+        # 让stderr读取任务处理完已到达的数据
+        await asyncio.sleep(0)
+        stderr = self._stderr_buffer.decode('utf-8', errors='ignore')
+        self._stderr_buffer.clear()
+
+        return subprocess.CompletedProcess(command, returncode, ''.join(output), stderr)
+
+
+async def run_adb_shell_once(command: str, target: Optional[str] = None) -> subprocess.CompletedProcess:
+    """以一次性adb进程执行设备端命令（无ADB管理器时的回退路径）
+
+    Args:
+        command: 设备端shell命令
+        target: 目标设备序列号，为空时使用adb默认设备
+
+    Returns:
+        subprocess.CompletedProcess: 命令执行结果
+    """
+    argv = ['adb'] + (['-s', target] if target else []) + ['shell', command]
+    return await get_runner().run(argv, kind=command_kind(command))
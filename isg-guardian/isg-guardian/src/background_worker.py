@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+后台任务模块
+
+将MQTT发布、状态日志写入等不影响监控判断的工作移出主循环，包括:
+- 有界队列按提交顺序执行任务，可配置并发执行数
+- 队列满时丢弃最旧的任务，避免MQTT代理不可用时积压；被丢弃的任务交给回调处理（如记录索引）
+- 停止时在限定时间内处理完剩余任务
+"""
+
+import asyncio
+from typing import Awaitable, Callable, List, Optional
+
+
+class BackgroundWorker:
+    """后台任务队列（默认单并发，严格按提交顺序执行）"""
+
+    def __init__(self, name: str, max_queue: int = 100, concurrency: int = 1,
+                 on_drop: Optional[Callable[[Callable[..., Awaitable], tuple], None]] = None):
+        """初始化后台任务队列
+
+        Args:
+            name: 队列名称（用于日志）
+            max_queue: 最大排队任务数
+            concurrency: 同时执行的任务数
+            on_drop: 队列满时被丢弃任务的回调，参数为任务的协程函数和调用参数
+        """
+        self.name = name
+        self.on_drop = on_drop
+        self.max_queue = max_queue
+        self.concurrency = max(1, concurrency)
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def pending(self) -> int:
+        """排队中的任务数"""
+        return self._queue.qsize() if self._queue else 0
+
+    def start(self):
+        """启动后台消费任务"""
+        if not self._tasks:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._tasks = [asyncio.ensure_future(self._consume()) for _ in range(self.concurrency)]
+
+    def submit(self, func: Callable[..., Awaitable], *args):
+        """提交一个任务，不等待其执行
+
+        未启动时直接在当前事件循环中调度执行
+
+        Args:
+            func: 协程函数
+            *args: 调用参数
+        """
+        if self._queue is None:
+            asyncio.ensure_future(self._execute(func, args))
+            return
+        if self._queue.full():
+            dropped_func, dropped_args = self._queue.get_nowait()
+            self._queue.task_done()
+            self.dropped += 1
+            self._handle_drop(dropped_func, dropped_args)
+        self._queue.put_nowait((func, args))
+
+    def _handle_drop(self, func: Callable[..., Awaitable], args: tuple):
+        """记录被丢弃的任务，回调异常只记录不外抛"""
+        if self.on_drop is None:
+            print(f"⚠️ 后台任务队列 {self.name} 已满，丢弃最早的任务 (累计丢弃 {self.dropped} 个)")
+            return
+        try:
+            self.on_drop(func, args)
+        except Exception as e:
+            print(f"❌ 处理被丢弃的任务失败 ({self.name}): {e}")
+
+    async def stop(self, timeout: float = 5.0):
+        """处理完剩余任务后停止
+
+        Args:
+            timeout: 等待剩余任务的最长时间（秒）
+        """
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ 后台任务队列 {self.name} 停止超时，丢弃 {self.pending} 个任务")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    async def _consume(self):
+        """按顺序取出并执行任务"""
+        while True:
+            func, args = await self._queue.get()
+            try:
+                await self._execute(func, args)
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, func: Callable[..., Awaitable], args: tuple):
+        """执行单个任务，异常只记录不外抛"""
+        try:
+            await func(*args)
+            self.completed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failed += 1
+            print(f"❌ 后台任务执行失败 ({self.name}): {e}")
+
+    def get_stats(self) -> dict:
+        """获取队列统计
+
+        Returns:
+            dict: 排队、完成、失败、丢弃的任务数
+        """
+        return {
+            'pending': self.pending,
+            'completed': self.completed,
+            'failed': self.failed,
+            'dropped': self.dropped
+        }
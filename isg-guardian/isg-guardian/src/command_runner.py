@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+命令执行模块
+
+为所有子进程调用提供统一的执行入口，包括:
+- 以argv列表直接执行，不经过中间shell
+- 单次调用超时，超时后强制结束子进程
+- 信号量限制同时存在的子进程数量
+- 按命令类型统计耗时分布和失败次数
+"""
+
+import asyncio
+import subprocess
+import time
+from typing import Dict, List, Optional
+
+
+# 耗时分布桶上界（毫秒），最后一个桶收纳更慢的调用
+LATENCY_BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# 超时/命令不存在时的返回码，与coreutils timeout及shell保持一致
+TIMEOUT_RETURNCODE = 124
+NOT_FOUND_RETURNCODE = 127
+
+
+class LatencyHistogram:
+    """单一命令类型的耗时直方图"""
+
+    __slots__ = ('counts', 'total', 'total_ms', 'max_ms', 'failures', 'timeouts')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.failures = 0
+        self.timeouts = 0
+
+    def record(self, duration_ms: float, ok: bool, timed_out: bool = False):
+        """记录一次调用
+
+        Args:
+            duration_ms: 调用耗时（毫秒）
+            ok: 是否成功
+            timed_out: 是否超时
+        """
+        index = len(LATENCY_BUCKETS_MS)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if duration_ms <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.total += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        if not ok:
+            self.failures += 1
+        if timed_out:
+            self.timeouts += 1
+
+    def percentile(self, fraction: float) -> float:
+        """根据直方图估算分位数（返回所在桶的上界，毫秒）"""
+        if not self.total:
+            return 0.0
+        target = fraction * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> dict:
+        """导出统计数据"""
+        buckets = {f"le_{bound}ms": count for bound, count in zip(LATENCY_BUCKETS_MS, self.counts)}
+        buckets['inf'] = self.counts[-1]
+        return {
+            'count': self.total,
+            'failures': self.failures,
+            'timeouts': self.timeouts,
+            'avg_ms': round(self.total_ms / self.total, 1) if self.total else 0.0,
+            'p95_ms': self.percentile(0.95),
+            'max_ms': round(self.max_ms, 1),
+            'buckets': buckets
+        }
+
+
+class CommandRunner:
+    """统一的异步命令执行器"""
+
+    def __init__(self, max_concurrency: int = 4, default_timeout: float = 30.0):
+        """初始化命令执行器
+
+        Args:
+            max_concurrency: 同时运行的子进程上限
+            default_timeout: 默认超时时间（秒）
+        """
+        self.max_concurrency = max_concurrency
+        self.default_timeout = default_timeout
+        self.metrics: Dict[str, LatencyHistogram] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def run(self, argv: List[str], timeout: Optional[float] = None,
+                  kind: Optional[str] = None, input: Optional[bytes] = None,
+                  text: bool = True, expect_timeout: bool = False) -> subprocess.CompletedProcess:
+        """执行命令并等待结束
+
+        Args:
+            argv: 命令参数列表
+            timeout: 超时时间（秒），默认使用执行器超时
+            kind: 统计用的命令类型，默认取程序名和第一个参数
+            input: 写入stdin的数据
+            text: 是否将输出解码为文本，为False时stdout/stderr保持bytes
+            expect_timeout: 运行到超时属于正常情况（如持续连接的探测命令），超时时不输出提示，
+                也不计入失败和超时统计
+
+        Returns:
+            subprocess.CompletedProcess: 执行结果；超时返回码为124，命令不存在为127
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        kind = kind or ' '.join(argv[:2])
+        timeout = timeout or self.default_timeout
+
+        async with self._semaphore:
+            start = time.monotonic()
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *argv,
+                    stdin=asyncio.subprocess.PIPE if input is not None else asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+            except FileNotFoundError as e:
+                self.record(kind, time.monotonic() - start, ok=False)
+                return subprocess.CompletedProcess(argv, NOT_FOUND_RETURNCODE, "" if text else b"", str(e))
+
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(input), timeout=timeout)
+            except asyncio.TimeoutError:
+                await _kill(process)
+                if expect_timeout:
+                    self.record(kind, time.monotonic() - start, ok=True)
+                else:
+                    self.record(kind, time.monotonic() - start, ok=False, timed_out=True)
+                    print(f"⏰ 命令超时已终止 ({timeout}s): {' '.join(argv)}")
+                return subprocess.CompletedProcess(argv, TIMEOUT_RETURNCODE, "" if text else b"", "timeout")
+            except asyncio.CancelledError:
+                await _kill(process)
+                raise
+
+        self.record(kind, time.monotonic() - start, ok=process.returncode == 0)
+        if not text:
+            return subprocess.CompletedProcess(argv, process.returncode, stdout, stderr)
+        return subprocess.CompletedProcess(
+            argv,
+            process.returncode,
+            stdout.decode('utf-8', errors='ignore'),
+            stderr.decode('utf-8', errors='ignore')
+        )
+
+    def record(self, kind: str, duration: float, ok: bool, timed_out: bool = False):
+        """记录一次调用耗时（也供不经过子进程的ADB调用使用）
+
+        Args:
+            kind: 命令类型
+            duration: 耗时（秒）
+            ok: 是否成功
+            timed_out: 是否超时
+        """
+        histogram = self.metrics.get(kind)
+        if histogram is None:
+            histogram = self.metrics[kind] = LatencyHistogram()
+        histogram.record(duration * 1000, ok, timed_out)
+
+    def get_metrics(self) -> Dict[str, dict]:
+        """获取各命令类型的统计数据
+
+        Returns:
+            Dict[str, dict]: 命令类型 -> 统计数据，按累计耗时降序
+        """
+        ordered = sorted(self.metrics.items(), key=lambda item: item[1].total_ms, reverse=True)
+        return {kind: histogram.to_dict() for kind, histogram in ordered}
+
+    def format_summary(self, limit: int = 8) -> str:
+        """生成便于日志输出的统计摘要"""
+        lines = []
+        for kind, stats in list(self.get_metrics().items())[:limit]:
+            lines.append(
+                f"   {kind}: {stats['count']}次 avg {stats['avg_ms']}ms "
+                f"p95≤{stats['p95_ms']:.0f}ms max {stats['max_ms']}ms "
+                f"失败 {stats['failures']} 超时 {stats['timeouts']}"
+            )
+        return '\n'.join(lines)
+
+
+async def _kill(process: asyncio.subprocess.Process):
+    """强制结束子进程并回收"""
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+        await process.wait()
+
+
+def command_kind(command: str, prefix: str = 'shell') -> str:
+    """根据设备端命令生成统计用的命令类型，如 'shell:pidof'
+
+    Args:
+        command: 设备端shell命令
+        prefix: 类型前缀
+
+    Returns:
+        str: 命令类型
+    """
+    parts = command.split()
+    return f"{prefix}:{parts[0] if parts else ''}"
+
+
+_runner: Optional[CommandRunner] = None
+
+
+def configure_runner(config: dict) -> CommandRunner:
+    """根据配置创建共享的命令执行器
+
+    Args:
+        config: 配置字典，读取 `runner` 段
+
+    Returns:
+        CommandRunner: 共享执行器
+    """
+    global _runner
+    runner_config = config.get('runner', {}) or {}
+    _runner = CommandRunner(
+        max_concurrency=runner_config.get('max_concurrency', 4),
+        default_timeout=runner_config.get('default_timeout', 30)
+    )
+    return _runner
+
+
+def get_runner() -> CommandRunner:
+    """获取共享的命令执行器（未配置时使用默认参数）"""
+    global _runner
+    if _runner is None:
+        _runner = CommandRunner()
+    return _runner
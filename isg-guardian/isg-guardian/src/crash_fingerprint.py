@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+崩溃指纹模块
+
+将崩溃日志归一化后计算指纹，用于识别重复出现的同一崩溃，包括:
+- 去掉logcat行前缀（时间、PID/TID、级别、标签）
+- 只取崩溃块（FATAL EXCEPTION / tombstone / ANR）中的异常行和栈顶若干帧，
+  忽略崩溃前进程输出的其他错误日志
+- 抹去PID、地址、数字等每次崩溃都不同的内容
+"""
+
+import hashlib
+import re
+from typing import List, Optional, Tuple
+
+
+# 日志来源标记，如 [PID-ERROR] / [AM] / [SYS] / [FR]
+SOURCE_PREFIX = re.compile(r'^\[[A-Z-]+\]\s*')
+# 进程崩溃前输出的错误日志，不属于崩溃块时不参与指纹计算
+PID_ERROR_SOURCE = '[PID-ERROR]'
+# logcat行前缀: threadtime/流缓冲区格式 "MM-DD HH:MM:SS.mmm  PID  TID L Tag: "
+# 或 time格式 "MM-DD HH:MM:SS.mmm L/Tag( PID): "
+LOGCAT_PREFIX = re.compile(
+    r'^(?:\d{4}-)?\d\d-\d\d\s+\d\d:\d\d:\d\d\.\d+\s+'
+    r'(?:\d+\s+\d+\s+[VDIWEFA]\s+[^:]*?|[VDIWEFA]/[^(:]*(?:\(\s*\d+\))?)\s*:\s?'
+)
+# 代表崩溃本身的行
+SIGNIFICANT_LINE = re.compile(
+    r'FATAL EXCEPTION|Exception|Error|^\s*at\s|Caused by|^\s*#\d+\s+pc\s|signal\s+\d+|Abort message|ANR in'
+)
+# 崩溃块的起始行: Java崩溃、native崩溃（tombstone分隔行或信号行）、ANR
+CRASH_BLOCK_START = re.compile(r'FATAL EXCEPTION|\*\*\* \*\*\* \*\*\*|\bsignal\s+\d+|ANR in')
+# 调用栈帧: Java "at ..." 或 native "#00 pc ..."
+STACK_FRAME = re.compile(r'^\s*at\s|^\s*#\d+\s+pc\s')
+HEX_ADDRESS = re.compile(r'0x[0-9a-fA-F]+')
+HEX_WORD = re.compile(r'\b[0-9a-fA-F]{8,}\b')
+NUMBER = re.compile(r'\d+')
+
+# 参与指纹计算的最多行数和栈帧数（只取栈顶，避免调用栈深处的差异）
+MAX_SIGNATURE_LINES = 30
+MAX_STACK_FRAMES = 10
+
+
+def _strip_prefixes(line: str) -> str:
+    """去掉日志来源标记和logcat行前缀"""
+    return LOGCAT_PREFIX.sub('', SOURCE_PREFIX.sub('', line.strip()), count=1)
+
+
+def _crash_block(lines: List[str]) -> List[str]:
+    """取出第一个崩溃块的消息（同一来源的连续日志）
+
+    没有崩溃块时返回[PID-ERROR]以外来源的日志，进程崩溃前的错误输出不能代表崩溃本身
+
+    Args:
+        lines: 崩溃日志行
+
+    Returns:
+        List[str]: 去掉前缀的消息
+    """
+    for start, line in enumerate(lines):
+        if CRASH_BLOCK_START.search(_strip_prefixes(line)):
+            source = SOURCE_PREFIX.match(line.strip())
+            source = source.group(0).strip() if source else None
+            block = []
+            for line in lines[start:]:
+                prefix = SOURCE_PREFIX.match(line.strip())
+                if (prefix.group(0).strip() if prefix else None) != source:
+                    break
+                block.append(_strip_prefixes(line))
+            return block
+    return [_strip_prefixes(line) for line in lines if not line.strip().startswith(PID_ERROR_SOURCE)]
+
+
+def normalize_crash_logs(lines: List[str]) -> List[str]:
+    """提取并归一化崩溃块中的异常行和栈顶帧
+
+    Args:
+        lines: 崩溃日志行
+
+    Returns:
+        List[str]: 归一化后的关键行（去除相邻重复）
+    """
+    normalized = []
+    frames = 0
+    for message in _crash_block(lines):
+        if not SIGNIFICANT_LINE.search(message):
+            continue
+        if STACK_FRAME.search(message):
+            if frames >= MAX_STACK_FRAMES:
+                break
+            frames += 1
+        message = HEX_ADDRESS.sub('<addr>', message)
+        message = HEX_WORD.sub('<hex>', message)
+        message = NUMBER.sub('N', message).strip()
+        if normalized and normalized[-1] == message:
+            continue
+        normalized.append(message)
+        if len(normalized) >= MAX_SIGNATURE_LINES:
+            break
+    return normalized
+
+
+def crash_fingerprint(crash_type: str, lines: List[str]) -> Tuple[Optional[str], str]:
+    """计算崩溃指纹
+
+    Args:
+        crash_type: 崩溃类型
+        lines: 崩溃日志行
+
+    Returns:
+        Tuple[Optional[str], str]: (16位十六进制指纹, 用于展示的摘要行)；
+        没有异常、调用栈等关键行时（强制停止、无堆栈的进程退出）无法区分不同事件，指纹为None
+    """
+    normalized = normalize_crash_logs(lines or [])
+    if not normalized:
+        return None, crash_type
+    digest = hashlib.sha1('\n'.join([crash_type] + normalized).encode('utf-8')).hexdigest()[:16]
+
+    # 摘要优先取异常/信号描述行，而不是 "FATAL EXCEPTION: main" 或调用栈
+    summary = next(
+        (line for line in normalized
+         if not line.startswith(('FATAL EXCEPTION', 'at ', '#')) and ('Exception' in line or 'Error' in line
+                                                                      or 'signal' in line)),
+        normalized[0] if normalized else crash_type
+    )
+    return digest, summary[:200]
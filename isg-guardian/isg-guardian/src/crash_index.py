@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+崩溃事件索引模块
+
+写入崩溃报告时同步追加一条索引记录（SQLite），包括:
+- 每次崩溃的时间、类型、PID、崩溃前运行时长和报告文件
+- 按天、按类型累计的次数和运行时长，"今日崩溃"、"近N天各类型次数"、MTBF只需查询少量汇总行
+- 按崩溃指纹汇总出现次数和首次/最近出现时间，"最常见崩溃"同样只查汇总表
+- 首次使用时从已有的崩溃报告回填，之后不再扫描日志目录
+"""
+
+import json
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crashes (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    day TEXT NOT NULL,
+    crash_type TEXT NOT NULL,
+    pid INTEGER,
+    uptime INTEGER NOT NULL DEFAULT 0,
+    report TEXT,
+    fingerprint TEXT
+);
+CREATE INDEX IF NOT EXISTS crashes_ts ON crashes (ts);
+CREATE TABLE IF NOT EXISTS daily_counts (
+    day TEXT NOT NULL,
+    crash_type TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    uptime_sum INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, crash_type)
+);
+CREATE TABLE IF NOT EXISTS signatures (
+    fingerprint TEXT PRIMARY KEY,
+    crash_type TEXT NOT NULL,
+    signature TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    report TEXT
+);
+"""
+
+
+def crash_index_path(config: dict) -> Path:
+    """获取崩溃索引文件路径
+
+    Args:
+        config: 配置字典，读取 `logging.crash_index_file`
+
+    Returns:
+        Path: 索引文件路径
+    """
+    return Path(config['logging'].get('crash_index_file', 'data/crash_index.db'))
+
+
+class CrashIndex:
+    """崩溃事件索引"""
+
+    def __init__(self, path: Path):
+        """初始化索引（首次访问时打开数据库）
+
+        Args:
+            path: SQLite数据库文件路径
+        """
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """数据库连接，首次访问时创建表结构"""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), timeout=5)
+            self._conn.executescript(SCHEMA)
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(crashes)")]
+            if 'fingerprint' not in columns:
+                # 早期版本的索引没有指纹列
+                self._conn.execute("ALTER TABLE crashes ADD COLUMN fingerprint TEXT")
+        return self._conn
+
+    def close(self):
+        """关闭数据库连接"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def record(self, timestamp: float, crash_type: str, pid: Optional[int] = None,
+               uptime: int = 0, report: Optional[str] = None,
+               fingerprint: Optional[str] = None, signature: Optional[str] = None) -> int:
+        """追加一条崩溃记录并更新当天计数和指纹计数
+
+        Args:
+            timestamp: 崩溃时间戳
+            crash_type: 崩溃类型
+            pid: 崩溃进程PID
+            uptime: 崩溃前运行时长（秒）
+            report: 崩溃报告文件名
+            fingerprint: 崩溃指纹
+            signature: 指纹对应的摘要行
+
+        Returns:
+            int: 该指纹累计出现次数（含本次），无指纹时为0
+        """
+        day = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
+        uptime = int(uptime or 0)
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO crashes (ts, day, crash_type, pid, uptime, report, fingerprint) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (timestamp, day, crash_type, pid, uptime, report, fingerprint)
+            )
+            self.conn.execute(
+                "INSERT OR IGNORE INTO daily_counts (day, crash_type) VALUES (?, ?)", (day, crash_type)
+            )
+            self.conn.execute(
+                "UPDATE daily_counts SET count = count + 1, uptime_sum = uptime_sum + ? "
+                "WHERE day = ? AND crash_type = ?",
+                (uptime, day, crash_type)
+            )
+            if fingerprint is None:
+                return 0
+            self.conn.execute(
+                "INSERT OR IGNORE INTO signatures (fingerprint, crash_type, signature, first_seen, last_seen, report) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (fingerprint, crash_type, signature, timestamp, timestamp, report)
+            )
+            self.conn.execute(
+                "UPDATE signatures SET count = count + 1, last_seen = MAX(last_seen, ?) WHERE fingerprint = ?",
+                (timestamp, fingerprint)
+            )
+            return self.conn.execute(
+                "SELECT count FROM signatures WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()[0]
+
+    def top_signatures(self, limit: int = 10) -> List[dict]:
+        """出现次数最多的崩溃指纹
+
+        Args:
+            limit: 最多返回的条数
+
+        Returns:
+            List[dict]: 指纹、类型、摘要、次数、首次/最近出现时间和完整报告文件名
+        """
+        rows = self.conn.execute(
+            "SELECT fingerprint, crash_type, signature, count, first_seen, last_seen, report "
+            "FROM signatures ORDER BY count DESC, last_seen DESC LIMIT ?", (limit,)
+        )
+        return [
+            {'fingerprint': fingerprint, 'crash_type': crash_type, 'signature': signature, 'count': count,
+             'first_seen': datetime.fromtimestamp(first_seen).isoformat(),
+             'last_seen': datetime.fromtimestamp(last_seen).isoformat(), 'report': report}
+            for fingerprint, crash_type, signature, count, first_seen, last_seen, report in rows
+        ]
+
+    def count_day(self, day: Optional[str] = None) -> int:
+        """某天的崩溃次数
+
+        Args:
+            day: 日期（YYYY-MM-DD），默认今天
+
+        Returns:
+            int: 崩溃次数
+        """
+        day = day or datetime.now().strftime('%Y-%m-%d')
+        row = self.conn.execute("SELECT COALESCE(SUM(count), 0) FROM daily_counts WHERE day = ?", (day,)).fetchone()
+        return row[0]
+
+    def _first_day(self, days: int) -> str:
+        return (datetime.now() - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+
+    def counts_by_type(self, days: int = 7) -> Dict[str, int]:
+        """近N天（含今天）各类型崩溃次数
+
+        Args:
+            days: 天数
+
+        Returns:
+            Dict[str, int]: 类型 -> 次数
+        """
+        rows = self.conn.execute(
+            "SELECT crash_type, SUM(count) FROM daily_counts WHERE day >= ? GROUP BY crash_type ORDER BY 2 DESC",
+            (self._first_day(days),)
+        )
+        return {crash_type: count for crash_type, count in rows}
+
+    def counts_by_day(self, days: int = 7) -> Dict[str, int]:
+        """近N天（含今天）每天的崩溃次数
+
+        Args:
+            days: 天数
+
+        Returns:
+            Dict[str, int]: 日期 -> 次数，只包含有崩溃的日期
+        """
+        rows = self.conn.execute(
+            "SELECT day, SUM(count) FROM daily_counts WHERE day >= ? GROUP BY day ORDER BY day",
+            (self._first_day(days),)
+        )
+        return {day: count for day, count in rows}
+
+    def mtbf(self, days: int = 7) -> Optional[float]:
+        """近N天的平均无故障运行时间（崩溃前运行时长的平均值）
+
+        Args:
+            days: 天数
+
+        Returns:
+            Optional[float]: 秒数，没有崩溃时返回None
+        """
+        count, uptime_sum = self.conn.execute(
+            "SELECT COALESCE(SUM(count), 0), COALESCE(SUM(uptime_sum), 0) FROM daily_counts WHERE day >= ?",
+            (self._first_day(days),)
+        ).fetchone()
+        return uptime_sum / count if count else None
+
+    def total(self) -> int:
+        """累计崩溃次数"""
+        return self.conn.execute("SELECT COALESCE(SUM(count), 0) FROM daily_counts").fetchone()[0]
+
+    def time_range(self) -> Optional[tuple]:
+        """最早和最近一次崩溃的时间戳
+
+        Returns:
+            Optional[tuple]: (最早, 最近)，没有记录时返回None
+        """
+        row = self.conn.execute("SELECT MIN(ts), MAX(ts) FROM crashes").fetchone()
+        return row if row[0] is not None else None
+
+    def recent(self, limit: int = 10) -> List[dict]:
+        """最近的崩溃记录（按时间倒序）
+
+        Args:
+            limit: 最多返回的条数
+
+        Returns:
+            List[dict]: 崩溃记录
+        """
+        rows = self.conn.execute(
+            "SELECT ts, crash_type, pid, uptime, report, fingerprint FROM crashes ORDER BY ts DESC LIMIT ?", (limit,)
+        )
+        return [
+            {'timestamp': datetime.fromtimestamp(ts).isoformat(), 'crash_type': crash_type,
+             'pid': pid, 'uptime': uptime, 'report': report, 'fingerprint': fingerprint}
+            for ts, crash_type, pid, uptime, report, fingerprint in rows
+        ]
+
+    def backfill(self, crash_log_dir: Path) -> int:
+        """索引为空时从已有的崩溃报告回填（只执行一次）
+
+        Args:
+            crash_log_dir: 崩溃日志目录
+
+        Returns:
+            int: 回填的记录数
+        """
+        if self.conn.execute("SELECT 1 FROM crashes LIMIT 1").fetchone():
+            return 0
+        count = 0
+        for report_file in sorted(Path(crash_log_dir).glob("crash_*.log")):
+            try:
+                with open(report_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                timestamp = datetime.fromisoformat(data['timestamp']).timestamp()
+            except (OSError, ValueError, KeyError, TypeError):
+                try:
+                    stamp = report_file.stem[len('crash_'):]
+                    timestamp = time.mktime(time.strptime(stamp, '%Y%m%d_%H%M%S'))
+                    data = {}
+                except ValueError:
+                    continue
+            self.record(
+                timestamp,
+                data.get('crash_type', 'unknown'),
+                data.get('pid'),
+                data.get('uptime_before_crash', data.get('uptime_before_stop', 0)),
+                report_file.name
+            )
+            count += 1
+        return count
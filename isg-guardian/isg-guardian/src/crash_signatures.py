@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+崩溃特征识别模块
+
+由 ProcessMonitor（判断进程退出是否为崩溃）和 CrashLogger（判断崩溃类型）共用，包括:
+- 可配置的规则表：正则或字面量、优先级、严重程度、TAG/PID约束
+- 所有规则合并为一个正则，每条日志只匹配一次；命中后才逐条确认具体规则
+  （含反向引用、全局标志或与其他规则分组名冲突等无法合并的规则单独匹配）
+- 一次遍历日志记录（logcat流记录或文本行）返回优先级最高的规则、证据行和严重程度
+
+直接运行本模块可对大体积logcat导出做性能测试:
+    python3 crash_signatures.py [logcat导出文件] [--package 包名]
+"""
+
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+
+# 文本日志行的字段: 可选的来源标记、时间，随后是 threadtime/epoch 格式 "PID TID L Tag: "
+# 或 time 格式 "L/Tag( PID): "
+TEXT_LINE = re.compile(
+    r'^(?:\[[A-Z-]+\]\s*)?(?:[\d.:\s-]*?\s)?'
+    r'(?:(?P<pid>\d+)\s+\d+\s+[VDIWEFA]\s+(?P<tag>[^:]*?)|[VDIWEFA]/(?P<tag2>[^(:]*?)\(\s*(?P<pid2>\d+)\))\s*:\s'
+)
+
+SEVERITY_LEVELS = {'info': 0, 'warning': 1, 'error': 2, 'critical': 3}
+
+# 反向引用（合并后分组编号会偏移，不能放进合并正则）
+BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+
+
+@dataclass
+class SignatureRule:
+    """崩溃特征规则
+
+    Attributes:
+        name: 规则名称，即崩溃类型
+        pattern: 正则表达式（literal为真时按字面量匹配）
+        priority: 优先级，同一批日志命中多条规则时取最高者
+        severity: 严重程度（info/warning/error/critical）
+        literal: pattern是否为字面量
+        ignore_case: 是否忽略大小写
+        tag: 只匹配该TAG的日志，为空时不限
+        scope: 归属约束 - pid: 必须来自目标进程；package: 来自目标进程或文本中包含包名；any: 不限
+    """
+    name: str
+    pattern: str
+    priority: int = 50
+    severity: str = 'error'
+    literal: bool = False
+    ignore_case: bool = False
+    tag: Optional[str] = None
+    scope: str = 'package'
+
+    @property
+    def regex(self) -> str:
+        """规则对应的正则文本"""
+        body = re.escape(self.pattern) if self.literal else self.pattern
+        return f"(?i:{body})" if self.ignore_case else body
+
+    @property
+    def branch(self) -> str:
+        """放入合并正则时的分支（非捕获分组，避免 | 与相邻规则结合）"""
+        return f"(?:{self.regex})"
+
+
+# 内置规则，按优先级区分（例如OOM的日志中同时出现ANR字样时仍判定为OOM）
+DEFAULT_RULES = [
+    SignatureRule('fatal_exception', 'FATAL EXCEPTION', 100, 'critical', literal=True),
+    SignatureRule('native_crash', r'signal 11 \(SIGSEGV\)|signal 7 \(SIGBUS\)', 95, 'critical'),
+    SignatureRule('oom', 'OutOfMemoryError', 90, 'critical', literal=True),
+    SignatureRule('abort', r'signal 6 \(SIGABRT\)|Abort message', 80, 'critical'),
+    SignatureRule('anr', r'ANR in|Application Not Responding|application not responding', 70, 'error'),
+    SignatureRule('lmk_killed', r'lowmemorykiller|lmkd.*[Kk]ill', 60, 'warning'),
+    SignatureRule('killed', 'SIGKILL', 50, 'warning', literal=True),
+    SignatureRule('crash', r'CRASH\b', 40, 'error'),
+]
+
+
+def load_rules(config: dict) -> List[SignatureRule]:
+    """合并内置规则和配置中的规则
+
+    配置中与内置规则同名的条目覆盖内置规则，其余追加
+
+    Args:
+        config: 配置字典，读取 `crash_signatures.rules`
+
+    Returns:
+        List[SignatureRule]: 规则列表
+    """
+    rules = {rule.name: rule for rule in DEFAULT_RULES}
+    for item in (config.get('crash_signatures', {}) or {}).get('rules', []) or []:
+        try:
+            rule = SignatureRule(**item)
+            re.compile(rule.regex)
+            rules[rule.name] = rule
+        except (TypeError, re.error) as e:
+            print(f"⚠️ 忽略无效的崩溃特征规则 {item}: {e}")
+    return list(rules.values())
+
+
+@dataclass
+class SignatureMatch:
+    """特征识别结果
+
+    Attributes:
+        rule: 命中的优先级最高的规则名称
+        severity: 严重程度
+        priority: 规则优先级
+        evidence: 命中该规则的日志行
+        matched_rules: 命中的全部规则名称（按优先级从高到低）
+    """
+    rule: str
+    severity: str
+    priority: int
+    evidence: List[str] = field(default_factory=list)
+    matched_rules: List[str] = field(default_factory=list)
+
+
+class SignatureEngine:
+    """崩溃特征识别引擎"""
+
+    def __init__(self, rules: List[SignatureRule], package_name: str = "", max_evidence: int = 20):
+        """初始化并编译规则
+
+        Args:
+            rules: 规则列表
+            package_name: 目标应用包名，用于 package 约束
+            max_evidence: 每条规则最多保留的证据行数
+        """
+        self.rules = sorted(rules, key=lambda rule: rule.priority, reverse=True)
+        self.package_name = package_name
+        self.max_evidence = max_evidence
+        self._compiled = [re.compile(rule.regex) for rule in self.rules]
+
+        # 能合并的规则拼成一个正则；无法合并的规则单独匹配，不影响其他规则
+        branches = []
+        self._separate: List[Pattern] = []
+        for rule, compiled in zip(self.rules, self._compiled):
+            if not BACKREFERENCE.search(rule.regex):
+                try:
+                    re.compile('|'.join(branches + [rule.branch]))
+                    branches.append(rule.branch)
+                    continue
+                except re.error:
+                    pass
+            print(f"ℹ️ 崩溃特征规则 {rule.name} 无法合并到统一正则，将单独匹配")
+            self._separate.append(compiled)
+        self._combined = re.compile('|'.join(branches)) if branches else None
+
+    @classmethod
+    def from_config(cls, config: dict) -> 'SignatureEngine':
+        """按配置创建引擎
+
+        Args:
+            config: 配置字典
+
+        Returns:
+            SignatureEngine: 引擎实例
+        """
+        return cls(load_rules(config), config['app']['package_name'])
+
+    def match_record(self, record, pid: Optional[int] = None) -> List[Tuple[int, str]]:
+        """匹配单条日志
+
+        Args:
+            record: logcat流记录（LogRecord）或文本日志行
+            pid: 目标进程PID
+
+        Returns:
+            List[Tuple[int, str]]: 命中的 (规则下标, 日志文本)，未命中时为空列表
+        """
+        if isinstance(record, str):
+            text = evidence = record
+            if not self._prefilter(text):
+                return []
+            parsed = TEXT_LINE.match(text)
+            record_pid = record_tag = None
+            if parsed:
+                record_pid = int(parsed.group('pid') or parsed.group('pid2'))
+                record_tag = (parsed.group('tag') or parsed.group('tag2') or '').strip()
+        else:
+            # 预过滤和逐条确认使用同一文本，证据行才格式化为完整日志行
+            text = f"{record.tag}: {record.message}"
+            if not self._prefilter(text):
+                return []
+            record_pid, record_tag = record.pid, record.tag
+            evidence = record.format()
+
+        hits = []
+        for index, rule in enumerate(self.rules):
+            if not self._compiled[index].search(text):
+                continue
+            if rule.tag and record_tag is not None and record_tag != rule.tag:
+                continue
+            if not self._in_scope(rule, pid, record_pid, text):
+                continue
+            hits.append((index, evidence))
+        return hits
+
+    def _prefilter(self, text: str) -> bool:
+        """文本是否可能命中任一规则"""
+        if self._combined is not None and self._combined.search(text):
+            return True
+        return any(pattern.search(text) for pattern in self._separate)
+
+    def _in_scope(self, rule: SignatureRule, pid: Optional[int], record_pid: Optional[int], text: str) -> bool:
+        """检查日志是否满足规则的归属约束（无法解析PID的文本行不做PID约束）"""
+        if rule.scope == 'any':
+            return True
+        same_pid = pid is not None and record_pid == pid
+        if rule.scope == 'pid':
+            return same_pid or (pid is None or record_pid is None)
+        return same_pid or (bool(self.package_name) and self.package_name in text)
+
+    def _candidate_lines(self, lines: List[str]) -> List[str]:
+        """对文本日志整体做一次合并正则扫描，只返回包含命中的行"""
+        text = '\n'.join(lines)
+        patterns = ([self._combined] if self._combined is not None else []) + self._separate
+        starts = set()
+        for pattern in patterns:
+            for match in pattern.finditer(text):
+                starts.add(text.rfind('\n', 0, match.start()) + 1)
+        candidates = []
+        for start in sorted(starts):
+            end = text.find('\n', start)
+            candidates.append(text[start:end if end >= 0 else len(text)])
+        return candidates
+
+    def classify(self, records: Iterable, pid: Optional[int] = None) -> Optional[SignatureMatch]:
+        """一次遍历日志并识别崩溃特征
+
+        文本日志行的列表先整体扫描一次，只对包含命中的行做规则确认
+
+        Args:
+            records: logcat流记录或文本日志行
+            pid: 目标进程PID
+
+        Returns:
+            Optional[SignatureMatch]: 识别结果，未命中任何规则时返回None
+        """
+        if isinstance(records, list) and records and isinstance(records[0], str):
+            records = self._candidate_lines(records)
+        evidence = {}
+        for record in records:
+            for index, text in self.match_record(record, pid):
+                lines = evidence.setdefault(index, [])
+                if len(lines) < self.max_evidence:
+                    lines.append(text)
+        if not evidence:
+            return None
+
+        ordered = sorted(evidence)
+        best = self.rules[ordered[0]]
+        return SignatureMatch(
+            rule=best.name,
+            severity=best.severity,
+            priority=best.priority,
+            evidence=evidence[ordered[0]],
+            matched_rules=[self.rules[index].name for index in ordered]
+        )
+
+
+def _legacy_detect(logs: List[str]) -> str:
+    """旧实现（拼接、转大写后依次做子串判断），仅用于性能对比"""
+    log_text = '\n'.join(logs).upper()
+    for marker, name in (('FATAL EXCEPTION', 'fatal_exception'), ('ANR', 'anr'), ('OUTOFMEMORYERROR', 'oom'),
+                         ('SIGSEGV', 'native_crash'), ('SIGABRT', 'abort'), ('SIGKILL', 'killed')):
+        if marker in log_text:
+            return name
+    return 'unknown'
+
+
+def _synthetic_dump(package_name: str, lines: int) -> List[str]:
+    """生成带少量崩溃日志的logcat文本（threadtime格式）"""
+    tags = ['ActivityManager', 'WifiService', 'chatty', 'SurfaceFlinger', 'PackageManager', 'iSG', 'NetworkMonitor']
+    dump = []
+    for i in range(lines):
+        pid = 1000 + i % 300
+        dump.append(
+            f"10-18 01:{i // 6000 % 60:02d}:{i // 100 % 60:02d}.{i % 1000:03d}  {pid}  {pid + 3} I {tags[i % len(tags)]}: "
+            f"routine message number {i} with some payload text for {package_name if i % 50 == 0 else 'other.app'}"
+        )
+    crash_at = lines * 3 // 4
+    dump[crash_at:crash_at] = [
+        "10-18 01:59:59.001  4321  4321 E AndroidRuntime: FATAL EXCEPTION: main",
+        f"10-18 01:59:59.001  4321  4321 E AndroidRuntime: Process: {package_name}, PID: 4321",
+        "10-18 01:59:59.002  4321  4321 E AndroidRuntime: java.lang.OutOfMemoryError: Failed to allocate",
+    ]
+    return dump
+
+
+def main():
+    """对logcat导出做崩溃特征识别性能测试"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="崩溃特征识别性能测试")
+    parser.add_argument('dump', nargs='?', help="logcat导出文件（threadtime格式），为空时生成测试数据")
+    parser.add_argument('--package', default='com.linknlink.app.device.isg', help="目标应用包名")
+    parser.add_argument('--lines', type=int, default=50000, help="生成测试数据的行数")
+    parser.add_argument('--rounds', type=int, default=5, help="重复次数")
+    args = parser.parse_args()
+
+    if args.dump:
+        with open(args.dump, 'r', encoding='utf-8', errors='ignore') as f:
+            logs = f.read().splitlines()
+    else:
+        logs = _synthetic_dump(args.package, args.lines)
+    size_mb = sum(len(line) + 1 for line in logs) / 1024 / 1024
+    print(f"📄 {len(logs)} 行, {size_mb:.1f} MB")
+
+    engine = SignatureEngine(DEFAULT_RULES, args.package)
+    for label, func in (("特征引擎", lambda: engine.classify(logs, pid=4321)),
+                        ("旧实现", lambda: _legacy_detect(logs))):
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            result = func()
+        elapsed = (time.perf_counter() - started) / args.rounds
+        if isinstance(result, SignatureMatch):
+            result = f"{result.rule} ({result.severity}, 命中 {', '.join(result.matched_rules)})"
+        print(f"⏱️ {label}: {elapsed * 1000:.1f} ms/次, {size_mb / elapsed:.1f} MB/s -> {result}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+崩溃前日志记录模块（飞行记录仪）
+
+将logcat流中与应用相关的日志持续写入固定大小的内存映射环形文件，包括:
+- 只记录应用进程（最近几个PID）的日志、提及包名的日志和所有Fatal级别日志
+- 文件头保存写入位置、圈数和最后一条记录的时间戳，写入每条记录后更新
+- 每条记录带校验和，进程在写入中途被杀时不完整的记录会被跳过
+- 守护进程重启后从文件头续写，已记录的日志不受影响
+- 崩溃时只记录当前写入位置，之后（后台任务中）从文件读取崩溃前N秒的日志，无需任何ADB调用
+- 读取时二分查找时间窗口的起点，只解码窗口内的记录
+"""
+
+import mmap
+import os
+import re
+import struct
+import zlib
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, List, Optional, Tuple
+
+from logcat_stream import PRIORITY_LEVELS, LogRecord
+
+
+MAGIC = b'ISGFLTR1'
+# 文件头: 魔数、数据区容量、写入位置、圈数、记录总数、最后一条记录的设备时间戳
+HEADER = struct.Struct('<8sIIIQd')
+HEADER_SIZE = 64
+# 记录头: 标记、内容长度、校验和、PID、TID、设备时间戳；内容为 "优先级 TAG \0 消息"
+RECORD = struct.Struct('<HHIIId')
+RECORD_MARK = 0xF17E
+RECORD_MARK_BYTES = struct.pack('<H', RECORD_MARK)
+MAX_PAYLOAD = 2048
+
+# 最多记住的应用进程PID数（崩溃进程的日志在应用重启后仍会被记录）
+TRACKED_PIDS = 4
+# 二分查找时间窗口起点的精度（字节），之后顺序解码
+SEEK_GRANULARITY = 4096
+
+
+@dataclass(frozen=True)
+class FlightMark:
+    """某一时刻的写入位置，崩溃时记录，之后读取截至该时刻的日志
+
+    Attributes:
+        write_offset: 写入位置
+        lap: 圈数
+        last_timestamp: 最后一条记录的设备时间戳
+    """
+    write_offset: int
+    lap: int
+    last_timestamp: float
+
+
+class FlightRecorder:
+    """内存映射的环形日志文件
+
+    记录不会跨越数据区末尾：剩余空间不足时清零剩余部分并从头开始写。
+    因此 [0, 写入位置) 是本圈的记录，[写入位置, 末尾) 是上一圈剩下的较旧记录。
+    """
+
+    def __init__(self, path: Path, capacity: int = 4 * 1024 * 1024, package_name: str = ""):
+        """初始化记录器（调用 open 后才会映射文件）
+
+        Args:
+            path: 环形文件路径
+            capacity: 数据区容量（字节）
+            package_name: 目标应用包名
+        """
+        self.path = Path(path)
+        self.capacity = max(capacity, 64 * 1024)
+        self.package_name = package_name
+        self.pids: Deque[int] = deque(maxlen=TRACKED_PIDS)
+        self._start_proc = re.compile(rf'Start proc (\d+):{re.escape(package_name)}\b') if package_name else None
+        self._fatal_level = PRIORITY_LEVELS['F']
+
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self.write_offset = 0
+        self.lap = 0
+        self.records = 0
+        self.last_timestamp = 0.0
+        self.resume_after = 0.0
+        self.written = 0
+
+    @classmethod
+    def from_config(cls, config: dict) -> Optional['FlightRecorder']:
+        """按配置创建记录器
+
+        Args:
+            config: 配置字典，读取 `logcat.flight_recorder*`
+
+        Returns:
+            Optional[FlightRecorder]: 记录器实例，未启用时返回None
+        """
+        logcat_config = config.get('logcat', {}) or {}
+        if not logcat_config.get('flight_recorder', True):
+            return None
+        return cls(
+            Path(logcat_config.get('flight_recorder_file', 'data/flight_recorder.bin')),
+            logcat_config.get('flight_recorder_kb', 4096) * 1024,
+            config['app']['package_name']
+        )
+
+    @property
+    def is_open(self) -> bool:
+        """文件是否已映射"""
+        return self._mmap is not None
+
+    def open(self):
+        """映射环形文件，文件有效时续写，否则重新创建"""
+        if self._mmap is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        size = HEADER_SIZE + self.capacity
+        self._file = open(self.path, 'a+b')
+        resumed = os.fstat(self._file.fileno()).st_size == size
+        if not resumed:
+            self._file.truncate(0)
+            self._file.truncate(size)
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+
+        if resumed:
+            magic, capacity, offset, lap, records, last_timestamp = HEADER.unpack_from(self._mmap, 0)
+            resumed = magic == MAGIC and capacity == self.capacity and offset <= capacity
+        if resumed:
+            self.write_offset, self.lap, self.records, self.last_timestamp = offset, lap, records, last_timestamp
+            self.resume_after = last_timestamp
+            print(f"📼 飞行记录仪续写: {self.path} ({self.records} 条历史记录)")
+        else:
+            self._mmap[:HEADER_SIZE] = bytes(HEADER_SIZE)
+            self.write_offset = self.lap = self.records = 0
+            self.last_timestamp = 0.0
+            self._write_header()
+            print(f"📼 飞行记录仪已创建: {self.path} ({self.capacity // 1024} KB)")
+
+    def close(self):
+        """将映射内容写回文件并关闭"""
+        if self._mmap is not None:
+            self._mmap.flush()
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def track_pid(self, pid: int):
+        """记录应用的新进程PID
+
+        Args:
+            pid: 进程ID
+        """
+        if pid and pid not in self.pids:
+            self.pids.append(pid)
+
+    def consider(self, record: LogRecord):
+        """按过滤条件决定是否记录一条日志（由logcat流对每条记录调用）
+
+        Args:
+            record: logcat记录
+        """
+        if self._mmap is None or record.timestamp <= self.resume_after:
+            # 续写时跳过logcat流预读的、上次运行已经记录过的日志
+            return
+        if record.pid in self.pids or record.level >= self._fatal_level:
+            self.append(record)
+        elif self.package_name and self.package_name in record.message:
+            if self._start_proc:
+                started = self._start_proc.search(record.message)
+                if started:
+                    self.track_pid(int(started.group(1)))
+            self.append(record)
+
+    def append(self, record: LogRecord):
+        """写入一条记录
+
+        Args:
+            record: logcat记录
+        """
+        payload = f"{record.priority}{record.tag}\0{record.message}".encode('utf-8', 'replace')[:MAX_PAYLOAD]
+        size = RECORD.size + len(payload)
+        if self.write_offset + size > self.capacity:
+            # 剩余空间清零，避免读取时把残留内容当作记录
+            start = HEADER_SIZE + self.write_offset
+            self._mmap[start:HEADER_SIZE + self.capacity] = bytes(self.capacity - self.write_offset)
+            self.write_offset = 0
+            self.lap += 1
+
+        fields = struct.pack('<IId', record.pid, record.tid, record.timestamp)
+        crc = zlib.crc32(payload, zlib.crc32(fields))
+        start = HEADER_SIZE + self.write_offset
+        RECORD.pack_into(self._mmap, start, RECORD_MARK, len(payload), crc,
+                         record.pid, record.tid, record.timestamp)
+        self._mmap[start + RECORD.size:start + size] = payload
+
+        # 记录写完后再更新文件头，中途被杀时该记录视为未写入
+        self.write_offset += size
+        self.records += 1
+        self.last_timestamp = record.timestamp
+        self._write_header()
+        self.written += 1
+
+    def mark(self) -> Optional[FlightMark]:
+        """记录当前写入位置（不读取任何记录，可在崩溃处理的关键路径上调用）
+
+        Returns:
+            Optional[FlightMark]: 当前写入位置，文件未映射时返回None
+        """
+        if self._mmap is None:
+            return None
+        return FlightMark(self.write_offset, self.lap, self.last_timestamp)
+
+    def _write_header(self):
+        HEADER.pack_into(self._mmap, 0, MAGIC, self.capacity, self.write_offset, self.lap,
+                         self.records, self.last_timestamp)
+
+    def _decode(self, offset: int) -> Optional[tuple]:
+        """解码数据区中某个位置的记录
+
+        Returns:
+            Optional[tuple]: (记录, 下一条记录的位置)，不是有效记录时返回None
+        """
+        if offset + RECORD.size > self.capacity:
+            return None
+        start = HEADER_SIZE + offset
+        mark, length, crc, pid, tid, timestamp = RECORD.unpack_from(self._mmap, start)
+        end = offset + RECORD.size + length
+        if mark != RECORD_MARK or end > self.capacity:
+            return None
+        payload = self._mmap[start + RECORD.size:HEADER_SIZE + end]
+        if zlib.crc32(payload, zlib.crc32(struct.pack('<IId', pid, tid, timestamp))) != crc:
+            return None
+        text = payload.decode('utf-8', 'replace')
+        tag, _, message = text[1:].partition('\0')
+        return LogRecord(timestamp, pid, tid, text[:1], tag, message), end
+
+    def _scan(self, offset: int, stop: int) -> List[LogRecord]:
+        """从某个位置开始顺序读取记录，直到 stop 或遇到无效记录"""
+        records = []
+        while offset < stop:
+            decoded = self._decode(offset)
+            if decoded is None:
+                break
+            record, offset = decoded
+            records.append(record)
+        return records
+
+    def _next_valid(self, offset: int, stop: int) -> Optional[Tuple[LogRecord, int]]:
+        """查找 offset 之后第一条校验通过的记录
+
+        Returns:
+            Optional[Tuple[LogRecord, int]]: (记录, 记录的位置)，[offset, stop) 中没有有效记录时返回None
+        """
+        while offset < stop:
+            found = self._mmap.find(RECORD_MARK_BYTES, HEADER_SIZE + offset, HEADER_SIZE + stop)
+            if found < 0:
+                break
+            offset = found - HEADER_SIZE
+            decoded = self._decode(offset)
+            if decoded is not None:
+                return decoded[0], offset
+            offset += 1
+        return None
+
+    def _seek(self, start: int, stop: int, since: float) -> int:
+        """二分查找 [start, stop) 中时间戳不早于 since 的记录的大致起点
+
+        记录按写入顺序排列，时间戳基本递增；返回位置之前的记录都早于 since
+        """
+        while stop - start > SEEK_GRANULARITY:
+            middle = (start + stop) // 2
+            found = self._next_valid(middle, stop)
+            if found is None or found[0].timestamp >= since:
+                stop = middle
+            else:
+                start = middle
+        return start
+
+    def _read_segment(self, start: int, stop: int, since: Optional[float]) -> List[LogRecord]:
+        """读取 [start, stop) 中的记录，指定 since 时跳过窗口之前的部分
+
+        起点处的记录可能已被部分覆盖（上一圈）或位于二分查找的中间位置，从第一条校验通过的记录开始顺序读取
+        """
+        if since is not None:
+            start = self._seek(start, stop, since)
+        found = self._next_valid(start, stop)
+        return self._scan(found[1], stop) if found else []
+
+    def read(self, seconds: Optional[float] = None, pid: Optional[int] = None,
+             until: Optional[FlightMark] = None) -> List[LogRecord]:
+        """按时间顺序读取记录
+
+        Args:
+            seconds: 只返回最后一条记录之前N秒内的记录（设备时间），为空时返回全部
+            pid: 只返回该进程的记录
+            until: 只返回该时刻之前的记录（崩溃后继续写入的记录不返回），秒数也从该时刻起算
+
+        Returns:
+            List[LogRecord]: 记录列表，文件未映射时为空列表
+        """
+        if self._mmap is None:
+            return []
+        latest = until.last_timestamp if until else self.last_timestamp
+        since = latest - seconds if seconds is not None else None
+
+        # 本圈第一条记录已早于时间窗口时，无需读取上一圈
+        records = []
+        first = self._decode(0) if self.write_offset else None
+        if self.lap and (since is None or first is None or first[0].timestamp > since):
+            records = self._read_segment(self.write_offset, self.capacity, since)
+        records.extend(self._read_segment(0, self.write_offset, since))
+
+        if since is not None:
+            records = [record for record in records if record.timestamp >= since]
+        if until is not None:
+            records = [record for record in records if record.timestamp <= until.last_timestamp]
+        if pid is not None:
+            records = [record for record in records if record.pid == pid]
+        return records
+
+    def get_stats(self) -> dict:
+        """获取记录统计
+
+        Returns:
+            dict: 文件容量、写入位置、圈数、累计记录数和本次运行写入的记录数
+        """
+        return {
+            'file': str(self.path),
+            'capacity_kb': self.capacity // 1024,
+            'write_offset': self.write_offset,
+            'lap': self.lap,
+            'records': self.records,
+            'written': self.written,
+            'tracked_pids': list(self.pids)
+        }
@@ -5,45 +5,312 @@
 负责应用的生命周期管理，包括:
 - 处理应用崩溃
 - 自动重启应用
-- 重启策略管理（限制重启次数、冷却机制）
+- 重启策略管理（可配置的限流/退避策略，状态持久化）
+- 启动就绪检测与重启耗时统计
+- 重启协调（串行执行、合并并发的重启请求）
 """
 
 import asyncio
+import fcntl
+import json
+import os
+import re
+import subprocess
+import time
+from collections import deque
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+from adb_shell import run_adb_shell_once
+from package_info import PackageInfoCache
+from restart_policy import RestartPolicyEngine
 # Import will be done locally to avoid circular imports
 
 
+# am start -W 输出中的字段，如 "TotalTime: 812"
+AM_START_FIELD = re.compile(r'^(\w+):\s*(.*)$', re.MULTILINE)
+
+# 等待进程出现的轮询间隔(秒)
+READY_POLL_INTERVAL = 0.2
+
+
+def parse_am_start(output: str) -> Dict[str, object]:
+    """解析 `am start -W` 的输出
+    
+    Args:
+        output: 命令输出
+        
+    Returns:
+        Dict[str, object]: 字段名 -> 值，ThisTime/TotalTime/WaitTime 转换为整数毫秒
+    """
+    fields: Dict[str, object] = {}
+    for name, value in AM_START_FIELD.findall(output):
+        value = value.strip()
+        if name in ('ThisTime', 'TotalTime', 'WaitTime'):
+            fields[name] = int(value) if value.isdigit() else None
+        else:
+            fields[name] = value
+    return fields
+
+
+class RestartTimings:
+    """最近若干次启动的耗时记录"""
+    
+    def __init__(self, max_records: int = 100):
+        """初始化耗时记录
+        
+        Args:
+            max_records: 保留的最大记录数
+        """
+        self.durations: Deque[float] = deque(maxlen=max_records)
+        self.total_times: Deque[int] = deque(maxlen=max_records)
+        self.wait_times: Deque[int] = deque(maxlen=max_records)
+        
+    def record(self, duration: float, total_time: Optional[int] = None, wait_time: Optional[int] = None):
+        """记录一次启动
+        
+        Args:
+            duration: 从开始启动到进程就绪的耗时（秒）
+            total_time: am start报告的TotalTime（毫秒）
+            wait_time: am start报告的WaitTime（毫秒）
+        """
+        self.durations.append(duration)
+        if total_time is not None:
+            self.total_times.append(total_time)
+        if wait_time is not None:
+            self.wait_times.append(wait_time)
+            
+    def summary(self) -> dict:
+        """计算耗时统计
+        
+        Returns:
+            dict: 启动次数及就绪耗时的最小/平均/P95值（秒），以及am start报告的平均耗时（毫秒）
+        """
+        if not self.durations:
+            return {"count": 0}
+        ordered = sorted(self.durations)
+        p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+        return {
+            "count": len(ordered),
+            "min": round(ordered[0], 2),
+            "avg": round(sum(ordered) / len(ordered), 2),
+            "p95": round(ordered[p95_index], 2),
+            "max": round(ordered[-1], 2),
+            "avg_total_time_ms": round(sum(self.total_times) / len(self.total_times)) if self.total_times else None,
+            "avg_wait_time_ms": round(sum(self.wait_times) / len(self.wait_times)) if self.wait_times else None
+        }
+
+
+class RestartCoordinator:
+    """重启协调器
+    
+    监控循环、MQTT重启按钮和CLI都可能发起重启。协调器保证同一时刻只有一个
+    启动/重启操作在执行，执行期间到达的请求合并到同一个结果，不再重复停止和启动应用。
+    配置了锁文件时还会与其他进程（如CLI）中的协调器互斥：持有锁的一方在锁文件中记录
+    本次操作的起止时间和结果，在其执行期间发起的请求（或观察到的进程退出）直接沿用该结果。
+    """
+    
+    def __init__(self, lock_file: Optional[Path] = None, max_records: int = 100):
+        """初始化协调器
+        
+        Args:
+            lock_file: 跨进程互斥使用的锁文件路径
+            max_records: 保留的排队耗时记录数
+        """
+        self.lock_file = lock_file
+        self.requests = 0
+        self.coalesced = 0
+        self.executed = 0
+        self.current_source: Optional[str] = None
+        self.queue_delays: Deque[float] = deque(maxlen=max_records)
+        self._inflight: Optional[asyncio.Future] = None
+        
+    @property
+    def busy(self) -> bool:
+        """是否有操作正在进行"""
+        return self._inflight is not None and not self._inflight.done()
+        
+    async def run(self, source: str, operation: Callable[[], Awaitable[bool]],
+                  observed_at: Optional[float] = None) -> bool:
+        """执行或合并一个启动/重启请求
+        
+        Args:
+            source: 请求来源，如 'crash' / 'mqtt' / 'cli'
+            operation: 实际执行的协程函数
+            observed_at: 触发请求的进程退出被观察到的时间戳，为空时取请求时间
+            
+        Returns:
+            bool: 操作是否成功（合并的请求返回进行中操作的结果）
+        """
+        self.requests += 1
+        if self.busy:
+            self.coalesced += 1
+            print(f"🔗 重启请求 ({source}) 已合并到进行中的操作 ({self.current_source})")
+            return await asyncio.shield(self._inflight)
+            
+        # busy检查与设置_inflight之间没有await，同一进程内的并发请求都会被合并
+        future = asyncio.get_event_loop().create_future()
+        self._inflight = future
+        self.current_source = source
+        requested = time.monotonic()
+        since = observed_at if observed_at is not None else time.time()
+        result = False
+        
+        try:
+            lock_handle = await self._acquire_file_lock()
+            try:
+                self.queue_delays.append(time.monotonic() - requested)
+                last_run = self._read_last_run(lock_handle)
+                if last_run and last_run['started_at'] <= since <= last_run['finished_at']:
+                    # 请求发起（或进程退出）时其他进程的操作正在进行，退出即由该操作引起
+                    self.coalesced += 1
+                    print(f"🔗 重启请求 ({source}) 发生在 {last_run.get('source')} 发起的重启期间 "
+                          f"(PID {last_run.get('pid')})，沿用其结果")
+                    result = bool(last_run.get('success'))
+                else:
+                    self.executed += 1
+                    started_at = time.time()
+                    result = await operation()
+                    self._write_last_run(lock_handle, source, started_at, result)
+            finally:
+                self._release_file_lock(lock_handle)
+        except Exception as e:
+            print(f"❌ 重启操作异常 ({source}): {e}")
+        finally:
+            self.current_source = None
+            # 被取消时合并进来的请求也能拿到结果
+            future.set_result(result)
+        return result
+        
+    async def _acquire_file_lock(self):
+        """获取跨进程锁，被其他进程持有时异步等待"""
+        if self.lock_file is None:
+            return None
+        self.lock_file.parent.mkdir(parents=True, exist_ok=True)
+        # 不截断文件，其中保存着上一次操作的记录
+        handle = open(self.lock_file, 'a+')
+        while True:
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return handle
+            except BlockingIOError:
+                await asyncio.sleep(0.2)
+            except OSError:
+                # 文件系统不支持锁时退化为进程内互斥
+                handle.close()
+                return None
+                
+    @staticmethod
+    def _read_last_run(handle) -> Optional[dict]:
+        """读取锁文件中上一次操作的记录（需持有锁）
+        
+        Returns:
+            Optional[dict]: 来源、进程ID、起止时间戳和结果，没有记录或无法解析时返回None
+        """
+        if handle is None:
+            return None
+        try:
+            handle.seek(0)
+            record = json.loads(handle.read() or 'null')
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 重启锁文件中的记录无法读取，已忽略: {e}")
+            return None
+        if not isinstance(record, dict) or not all(
+                isinstance(record.get(key), (int, float)) for key in ('started_at', 'finished_at')):
+            return None
+        return record
+            
+    @staticmethod
+    def _write_last_run(handle, source: str, started_at: float, success: bool):
+        """在释放锁之前记录本次操作，供等待锁的其他进程判断是否需要再次执行"""
+        if handle is None:
+            return
+        record = {
+            "source": source,
+            "pid": os.getpid(),
+            "started_at": started_at,
+            "finished_at": time.time(),
+            "success": bool(success)
+        }
+        try:
+            handle.seek(0)
+            handle.truncate()
+            handle.write(json.dumps(record))
+            handle.flush()
+        except OSError as e:
+            print(f"⚠️ 写入重启记录失败: {e}")
+            
+    @staticmethod
+    def _release_file_lock(handle):
+        """释放跨进程锁"""
+        if handle is not None:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+            handle.close()
+            
+    def get_stats(self) -> dict:
+        """获取协调统计
+        
+        Returns:
+            dict: 请求数、合并数、执行数和排队耗时
+        """
+        delays = sorted(self.queue_delays)
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "executed": self.executed,
+            "in_progress": self.current_source,
+            "avg_queue_delay": round(sum(delays) / len(delays), 3) if delays else 0.0,
+            "max_queue_delay": round(delays[-1], 3) if delays else 0.0
+        }
+
+
 class AppGuardian:
     """应用守护器
     
     负责监控应用状态并在必要时重启应用
     """
     
-    def __init__(self, config: dict, adb_manager=None):
+    def __init__(self, config: dict, adb_manager=None, data_dir: Optional[Path] = None, crash_logger=None):
         """初始化应用守护器
         
         Args:
             config: 配置字典
             adb_manager: ADB管理器实例
+            data_dir: 数据目录，用于保存重启策略状态和跨进程重启锁
+            crash_logger: 共享的崩溃日志收集器，为空时首次崩溃时创建
         """
         self.config = config
-        self.restart_count = 0
-        self.last_restart: Optional[datetime] = None
-        self.cooldown_until: Optional[datetime] = None
         self.adb_manager = adb_manager
+        self.crash_logger = crash_logger
+        self.policy = RestartPolicyEngine(config, data_dir / 'restart_state.json' if data_dir else None)
+        if self.policy.load():
+            print(f"📂 已恢复重启策略状态 (累计重启 {self.policy.total_restarts} 次)")
+        self.ready_timeout = config['app'].get('ready_timeout', 20)
+        self.restart_timings = RestartTimings()
+        self.last_launch: Optional[dict] = None
+        self.coordinator = RestartCoordinator(data_dir / 'restart.lock' if data_dir else None)
+        self.package_cache = PackageInfoCache(
+            self._shell,
+            config['app']['package_name'],
+            config['app'].get('package_check_interval', 60)
+        )
         
-    def _get_adb_prefix(self) -> str:
-        """获取ADB命令前缀
+    async def _shell(self, command: str, timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """在设备上执行shell命令
         
+        优先复用ADB管理器的持久Shell通道
+        
+        Args:
+            command: 设备端shell命令
+            timeout: 超时时间（秒）
+            
         Returns:
-            str: ADB命令前缀
+            subprocess.CompletedProcess: 命令执行结果
         """
         if self.adb_manager:
-            return self.adb_manager.get_adb_prefix()
-        else:
-            return "adb"
+            return await self.adb_manager.shell(command, timeout)
+        return await run_adb_shell_once(command)
         
     async def start(self):
         """启动守护器"""
@@ -52,119 +319,186 @@ class AppGuardian:
     async def handle_crash(self, status) -> bool:
         """处理应用崩溃
         
+        日志捕获和重启作为一个整体交给重启协调器，期间到达的其他重启请求合并到本次结果。
+        进程退出发生在其他进程（如CLI）的重启期间时，沿用该重启的结果，不记录崩溃也不再次重启
+        
         Args:
             status: 崩溃时的应用状态
             
         Returns:
             bool: 是否成功处理崩溃
         """
+        timestamp = getattr(status, 'timestamp', None)
+        observed_at = timestamp.timestamp() if isinstance(timestamp, datetime) else None
+        if self.coordinator.busy:
+            # 进程退出由正在进行的重启引起，不是崩溃
+            print(f"ℹ️ 进程退出发生在重启过程中 ({self.coordinator.current_source})，等待重启完成")
+            return await self.coordinator.run('crash', self._restart, observed_at)
+        return await self.coordinator.run('crash', lambda: self._handle_crash(status), observed_at)
+        
+    async def _handle_crash(self, status) -> bool:
+        """记录崩溃现场后立即重启应用，日志收集与重启并行进行"""
         print(f"💥 检测到应用异常 - PID: {status.pid}, 运行时长: {status.uptime}s")
         
-        # 捕获崩溃日志
+        restart_result = asyncio.get_event_loop().create_future()
+        
+        # 记录崩溃现场，日志收集和写入交给后台任务队列
         try:
-            from logger import CrashLogger
-            logger = CrashLogger(self.config)
-            
-            # 根据状态决定使用哪种日志捕获方法
-            if hasattr(status, 'crash_type') and status.crash_type == 'force_stop':
-                crash_file = await logger.capture_force_stop_event(status)
-            else:
-                crash_file = await logger.capture_crash_logs(status)
-                
-            if crash_file:
-                print(f"📝 事件日志已保存: {Path(crash_file).name}")
+            if self.crash_logger is None:
+                from logger import CrashLogger
+                self.crash_logger = CrashLogger(self.config, self.adb_manager)
+            self.crash_logger.submit_capture(status, restart_result)
         except ImportError as e:
             print(f"⚠️ 无法导入日志模块: {e}")
         
         # 尝试重启应用
-        return await self.restart_app()
+        started = time.monotonic()
+        success = False
+        try:
+            success = await self._restart()
+        finally:
+            restart_result.set_result({
+                "success": success,
+                "duration": round(time.monotonic() - started, 3),
+                "completed_at": datetime.now().isoformat(),
+                "pid": self.last_launch.get('pid') if success and self.last_launch else None
+            })
+        return success
+        
+    async def start_app(self, source: str = 'monitor') -> bool:
+        """启动应用并等待就绪
         
-    async def start_app(self) -> bool:
-        """启动应用
+        使用 `am start -S -W` 在一次调用中完成停止残留进程、启动和等待Activity显示，
+        随后确认进程已存在即视为就绪，不使用固定等待时间
         
+        Args:
+            source: 请求来源
+            
         Returns:
             bool: 启动是否成功
         """
+        return await self.coordinator.run(source, lambda: self._launch_and_wait(stop_first=True))
+        
+    async def _launch_and_wait(self, stop_first: bool) -> bool:
+        """启动应用、等待就绪并记录耗时
+        
+        Args:
+            stop_first: 是否由am start先强制停止应用（-S）
+            
+        Returns:
+            bool: 应用是否在超时时间内就绪
+        """
+        started = time.monotonic()
         try:
             print("🚀 启动 iSG 应用...")
-            
-            # 先确保应用完全停止
-            await self._force_stop_app()
-            await asyncio.sleep(2)
-            
-            # 启动应用
-            package = self.config['app']['package_name']
-            activity = self.config['app']['activity_name']
-            adb_prefix = self._get_adb_prefix()
-            cmd = f"{adb_prefix} shell am start -n {package}/{activity}"
-            
-            process = await asyncio.create_subprocess_shell(
-                cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode == 0:
-                print("✅ 应用启动成功")
-                await asyncio.sleep(3)  # 等待应用完全启动
-                return True
-            else:
-                error_msg = stderr.decode('utf-8', errors='ignore').strip()
-                print(f"❌ 应用启动失败: {error_msg}")
+            launch = await self._am_start(stop_first)
+            if launch is None:
+                return False
+                
+            pid = await self._wait_until_ready(started)
+            elapsed = time.monotonic() - started
+            if pid is None:
+                print(f"❌ 应用未在 {self.ready_timeout} 秒内就绪")
                 return False
                 
+            self.restart_timings.record(elapsed, launch.get('TotalTime'), launch.get('WaitTime'))
+            self.last_launch = {
+                "timestamp": datetime.now().isoformat(),
+                "pid": pid,
+                "duration": round(elapsed, 2),
+                "launch_state": launch.get('LaunchState'),
+                "total_time_ms": launch.get('TotalTime'),
+                "wait_time_ms": launch.get('WaitTime')
+            }
+            detail = f", TotalTime {launch['TotalTime']}ms" if launch.get('TotalTime') is not None else ""
+            print(f"✅ 应用启动成功 (PID: {pid}, 就绪耗时 {elapsed:.1f}s{detail})")
+            return True
+            
         except Exception as e:
             print(f"❌ 启动应用异常: {e}")
             return False
             
-    async def restart_app(self) -> bool:
-        """重启应用
+    async def _am_start(self, stop_first: bool) -> Optional[dict]:
+        """执行 `am start -W` 并解析启动结果
         
+        Args:
+            stop_first: 是否附加 -S 先强制停止应用
+            
         Returns:
-            bool: 重启是否成功
+            Optional[dict]: 启动字段（Status、LaunchState、TotalTime、WaitTime等），失败时返回None
         """
-        now = datetime.now()
+        package = self.config['app']['package_name']
+        activity = self.config['app']['activity_name']
+        flags = "-W -S" if stop_first else "-W"
+        result = await self._shell(f"am start {flags} -n {package}/{activity}", timeout=self.ready_timeout + 5)
         
-        # 检查冷却时间
-        if self.cooldown_until and now < self.cooldown_until:
-            remaining = int((self.cooldown_until - now).total_seconds())
-            print(f"⏳ 重启冷却中，还需等待 {remaining} 秒")
-            return False
+        output = result.stdout.strip()
+        if result.returncode != 0 or any(line.startswith('Error') for line in output.splitlines()):
+            error_msg = result.stderr.strip() or output
+            print(f"❌ 应用启动失败: {error_msg}")
+            return None
             
-        # 检查重启次数限制
-        if (self.last_restart and 
-            now - self.last_restart < timedelta(hours=1) and
-            self.restart_count >= self.config['monitor']['max_restarts']):
+        return parse_am_start(output)
+        
+    async def _wait_until_ready(self, started: float) -> Optional[int]:
+        """轮询等待应用进程出现
+        
+        Args:
+            started: 启动开始的monotonic时间
             
-            # 进入冷却期
-            cooldown_seconds = self.config['monitor']['cooldown_time']
-            self.cooldown_until = now + timedelta(seconds=cooldown_seconds)
-            print(f"🚫 重启次数过多，进入冷却期 {cooldown_seconds} 秒")
-            return False
+        Returns:
+            Optional[int]: 就绪的进程ID，超时返回None
+        """
+        package = self.config['app']['package_name']
+        while True:
+            result = await self._shell(f"pidof {package}")
+            pids = result.stdout.split()
+            if result.returncode == 0 and pids and pids[0].isdigit():
+                return int(pids[0])
+            if time.monotonic() - started >= self.ready_timeout:
+                return None
+            await asyncio.sleep(READY_POLL_INTERVAL)
             
-        # 重置计数器(如果距离上次重启超过1小时)
-        if not self.last_restart or now - self.last_restart > timedelta(hours=1):
-            self.restart_count = 0
+    async def restart_app(self, source: str = 'manual') -> bool:
+        """重启应用（经重启协调器，与其他来源的重启请求互斥并合并）
+        
+        Args:
+            source: 请求来源，如 'mqtt' / 'cli' / 'leak'
             
-        # 执行重启
-        self.restart_count += 1
-        print(f"🔄 尝试重启应用 (第 {self.restart_count} 次)")
+        Returns:
+            bool: 重启是否成功
+        """
+        return await self.coordinator.run(source, self._restart)
+        
+    async def _restart(self) -> bool:
+        """执行重启（调用方需持有协调器）
         
-        # 强制停止应用
-        await self._force_stop_app()
-        await asyncio.sleep(self.config['monitor']['restart_delay'])
+        Returns:
+            bool: 重启是否成功
+        """
+        # 由重启策略判定是否允许（先重新加载状态，CLI等其他进程的重启也计入）
+        self.policy.load()
+        decision = self.policy.check()
+        if not decision.allowed:
+            print(f"🚫 重启被策略拒绝 [{decision.policy}]: {decision.reason}")
+            return False
+            
+        # 执行重启（无论成功与否都计入策略，防止重启风暴）
+        self.policy.record_restart()
+        print(f"🔄 尝试重启应用 ({decision.reason})")
         
-        # 启动应用
-        success = await self.start_app()
+        restart_delay = self.config['monitor'].get('restart_delay', 0)
+        if restart_delay:
+            # 配置了停止后的额外等待时间
+            await self._force_stop_app()
+            await asyncio.sleep(restart_delay)
+            success = await self._launch_and_wait(stop_first=False)
+        else:
+            # am start -S 一次完成停止和启动
+            success = await self._launch_and_wait(stop_first=True)
         
         if success:
-            self.last_restart = now
             print(f"✅ 应用重启成功")
-            
-            # 如果重启成功，检查是否可以重置计数器
-            if self.restart_count >= self.config['monitor']['max_restarts']:
-                print("🎯 达到最大重启次数，下次重启将有冷却时间")
         else:
             print(f"❌ 应用重启失败")
             
@@ -174,20 +508,24 @@ class AppGuardian:
         """强制停止应用"""
         try:
             package = self.config['app']['package_name']
-            adb_prefix = self._get_adb_prefix()
-            cmd = f"{adb_prefix} shell am force-stop {package}"
-            
-            process = await asyncio.create_subprocess_shell(
-                cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            await process.communicate()
+            await self._shell(f"am force-stop {package}")
             print("🛑 应用已强制停止")
             
         except Exception as e:
             print(f"❌ 强制停止应用失败: {e}")
             
+    async def get_package_info(self, refresh: bool = False):
+        """获取缓存的应用包信息
+        
+        Args:
+            refresh: 是否强制重新执行 `dumpsys package`
+            
+        Returns:
+            Optional[PackageInfo]: 包信息，未安装或获取失败时返回None
+        """
+        generation = self.adb_manager.connection_generation if self.adb_manager else 0
+        return await self.package_cache.get(generation, refresh)
+        
     async def check_app_installation(self) -> bool:
         """检查应用是否已安装
         
@@ -195,18 +533,8 @@ class AppGuardian:
             bool: 应用是否已安装
         """
         try:
-            package = self.config['app']['package_name']
-            adb_prefix = self._get_adb_prefix()
-            cmd = f"{adb_prefix} shell pm list packages | grep {package}"
-            
-            process = await asyncio.create_subprocess_shell(
-                cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, _ = await process.communicate()
-            
-            return bool(stdout.decode('utf-8', errors='ignore').strip())
+            info = await self.get_package_info()
+            return info is not None and info.installed
             
         except Exception as e:
             print(f"❌ 检查应用安装状态失败: {e}")
@@ -220,44 +548,20 @@ class AppGuardian:
         """
         try:
             package = self.config['app']['package_name']
-            adb_prefix = self._get_adb_prefix()
-            
-            # 获取应用版本信息
-            version_cmd = f"{adb_prefix} shell dumpsys package {package} | grep versionName"
-            process = await asyncio.create_subprocess_shell(
-                version_cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, _ = await process.communicate()
-            version_output = stdout.decode('utf-8', errors='ignore').strip()
-            
-            version = "Unknown"
-            if "versionName=" in version_output:
-                version = version_output.split("versionName=")[1].split()[0]
-                
-            # 获取应用安装时间
-            install_cmd = f"{adb_prefix} shell dumpsys package {package} | grep firstInstallTime"
-            process = await asyncio.create_subprocess_shell(
-                install_cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, _ = await process.communicate()
-            install_output = stdout.decode('utf-8', errors='ignore').strip()
-            
-            install_time = "Unknown"
-            if "firstInstallTime=" in install_output:
-                install_time = install_output.split("firstInstallTime=")[1].strip()
+            info = await self.get_package_info()
                 
             return {
                 "package_name": package,
-                "version": version,
-                "install_time": install_time,
+                "version": info.version_name if info else "Unknown",
+                "version_code": info.version_code if info else None,
+                "install_time": info.first_install_time if info else "Unknown",
+                "update_time": info.last_update_time if info else "Unknown",
+                "installed": bool(info and info.installed),
+                "enabled": info.enabled_state if info else None,
                 "activity": self.config['app']['activity_name'],
-                "restart_count": self.restart_count,
-                "last_restart": self.last_restart.isoformat() if self.last_restart else None,
-                "cooldown_until": self.cooldown_until.isoformat() if self.cooldown_until else None
+                "restart_count": self.policy.total_restarts,
+                "last_restart": self.policy.get_status()['last_restart'],
+                "last_launch": self.last_launch
             }
             
         except Exception as e:
@@ -270,21 +574,25 @@ class AppGuardian:
         Returns:
             dict: 重启状态
         """
-        now = datetime.now()
+        policy_status = self.policy.get_status()
+        remaining = self.policy.retry_after()
         
         return {
-            "restart_count": self.restart_count,
+            "restart_count": self.policy.total_restarts,
             "max_restarts": self.config['monitor']['max_restarts'],
-            "last_restart": self.last_restart.isoformat() if self.last_restart else None,
-            "cooldown_until": self.cooldown_until.isoformat() if self.cooldown_until else None,
-            "in_cooldown": bool(self.cooldown_until and now < self.cooldown_until),
-            "cooldown_remaining": int((self.cooldown_until - now).total_seconds()) if self.cooldown_until and now < self.cooldown_until else 0,
-            "can_restart": not (self.cooldown_until and now < self.cooldown_until)
+            "last_restart": policy_status['last_restart'],
+            "cooldown_until": (datetime.now() + timedelta(seconds=remaining)).isoformat() if remaining else None,
+            "in_cooldown": remaining > 0,
+            "cooldown_remaining": remaining,
+            "can_restart": remaining == 0,
+            "last_decision": policy_status['last_decision'],
+            "policy": policy_status,
+            "restart_duration": self.restart_timings.summary(),
+            "coordinator": self.coordinator.get_stats(),
+            "last_launch": self.last_launch
         }
         
     async def clear_restart_history(self):
         """清除重启历史记录"""
-        self.restart_count = 0
-        self.last_restart = None
-        self.cooldown_until = None
+        self.policy.reset()
         print("🗑️ 重启历史记录已清除")
\ No newline at end of file
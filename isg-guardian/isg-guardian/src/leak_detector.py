@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+内存泄漏检测模块
+
+对每个进程实例（PID）的内存采样做滚动线性回归，包括:
+- 维护时间窗口内的增量回归统计量，单次采样O(1)更新
+- 估算内存增长速率、拟合优度和到达阈值的剩余时间
+- 判断是否应在配置的空闲时段内提前进行受控重启
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, time as dt_time, timedelta
+from typing import Deque, Optional, Tuple
+
+
+@dataclass
+class LeakEstimate:
+    """内存增长趋势估算结果
+
+    Attributes:
+        pid: 进程ID
+        samples: 参与回归的采样数
+        slope_mb_per_hour: 内存增长速率（MB/小时）
+        r_squared: 拟合优度（0~1）
+        current_mb: 回归线在当前时刻的内存值（MB）
+        threshold_mb: 内存阈值（MB）
+        seconds_to_threshold: 预计到达阈值的剩余秒数，无增长趋势时为None
+        predicted_at: 预计到达阈值的时间
+        leaking: 是否判定为持续泄漏
+    """
+    pid: int
+    samples: int
+    slope_mb_per_hour: float
+    r_squared: float
+    current_mb: float
+    threshold_mb: float
+    seconds_to_threshold: Optional[float] = None
+    predicted_at: Optional[datetime] = None
+    leaking: bool = False
+
+
+def parse_quiet_window(text: str) -> Optional[Tuple[dt_time, dt_time]]:
+    """解析 "HH:MM-HH:MM" 格式的时间段
+
+    Args:
+        text: 时间段文本，可跨越午夜，如 "23:30-01:00"
+
+    Returns:
+        Optional[Tuple[time, time]]: (开始, 结束)，格式无效时返回None
+    """
+    try:
+        start_text, end_text = text.split('-')
+        start = datetime.strptime(start_text.strip(), '%H:%M').time()
+        end = datetime.strptime(end_text.strip(), '%H:%M').time()
+        return start, end
+    except (AttributeError, ValueError):
+        return None
+
+
+class LeakDetector:
+    """内存泄漏趋势检测器"""
+
+    def __init__(self, config: dict):
+        """初始化检测器
+
+        Args:
+            config: 配置字典，读取 `leak_detection` 段
+        """
+        leak_config = config.get('leak_detection', {}) or {}
+        self.enabled = leak_config.get('enabled', True)
+        self.metric = leak_config.get('metric', 'rss')
+        self.threshold_mb = leak_config.get('threshold_mb', 1024)
+        self.window = leak_config.get('window', 7200)
+        self.min_samples = leak_config.get('min_samples', 20)
+        self.min_span = leak_config.get('min_span', 1800)
+        self.min_slope = leak_config.get('min_slope_mb_per_hour', 5)
+        self.min_r_squared = leak_config.get('min_r_squared', 0.6)
+        self.preemptive_restart = leak_config.get('preemptive_restart', False)
+        self.restart_horizon = leak_config.get('restart_horizon', 86400)
+        self.quiet_window = parse_quiet_window(leak_config.get('quiet_window', '03:00-05:00'))
+
+        self.pid: Optional[int] = None
+        self.last_estimate: Optional[LeakEstimate] = None
+        self._base: float = 0.0
+        self._samples: Deque[Tuple[float, float]] = deque()
+        self._sx = self._sy = self._sxx = self._sxy = self._syy = 0.0
+        self._restarted_pid: Optional[int] = None
+
+    def observe(self, status, timestamp: Optional[float] = None) -> Optional[LeakEstimate]:
+        """加入一条应用状态采样并更新估算
+
+        Args:
+            status: 应用状态对象
+            timestamp: 采样时间戳，默认当前时间
+
+        Returns:
+            Optional[LeakEstimate]: 采样足够时返回估算结果，否则None
+        """
+        if not self.enabled or not status.running or not status.pid:
+            return None
+
+        memory = status.memory_mb
+        if self.metric == 'pss' and getattr(status, 'pss_mb', None) is not None:
+            memory = status.pss_mb
+        if not memory:
+            return None
+
+        now = timestamp if timestamp is not None else time.time()
+        if status.pid != self.pid:
+            # 新的进程实例，重新开始回归
+            self._reset(status.pid, now)
+
+        x = now - self._base
+        self._samples.append((x, memory))
+        self._add(x, memory, 1)
+        while self._samples and x - self._samples[0][0] > self.window:
+            old_x, old_y = self._samples.popleft()
+            self._add(old_x, old_y, -1)
+
+        self.last_estimate = self._estimate(x, now)
+        return self.last_estimate
+
+    def should_restart(self, estimate: Optional[LeakEstimate], now: Optional[datetime] = None) -> bool:
+        """判断是否应在当前时刻进行受控重启
+
+        条件: 启用了提前重启、判定为泄漏、预计在重启窗口期内到达阈值、
+        当前处于空闲时段，且该进程实例尚未因泄漏重启过
+
+        Args:
+            estimate: 最新估算结果
+            now: 当前时间，默认 datetime.now()
+
+        Returns:
+            bool: 是否应重启
+        """
+        if not (self.preemptive_restart and estimate and estimate.leaking):
+            return False
+        if estimate.pid == self._restarted_pid:
+            return False
+        if estimate.seconds_to_threshold is None or estimate.seconds_to_threshold > self.restart_horizon:
+            return False
+        return self.in_quiet_window(now or datetime.now())
+
+    def mark_restarted(self, pid: int):
+        """记录已为该进程实例执行过提前重启
+
+        Args:
+            pid: 进程ID
+        """
+        self._restarted_pid = pid
+
+    def in_quiet_window(self, now: datetime) -> bool:
+        """当前时间是否处于空闲时段
+
+        Args:
+            now: 当前时间
+
+        Returns:
+            bool: 是否处于空闲时段
+        """
+        if self.quiet_window is None:
+            return False
+        start, end = self.quiet_window
+        current = now.time()
+        if start <= end:
+            return start <= current < end
+        return current >= start or current < end
+
+    def _reset(self, pid: int, now: float):
+        """为新的进程实例清空回归状态"""
+        self.pid = pid
+        self._base = now
+        self._samples.clear()
+        self._sx = self._sy = self._sxx = self._sxy = self._syy = 0.0
+
+    def _add(self, x: float, y: float, sign: int):
+        """增加或移除一个点的回归统计量"""
+        self._sx += sign * x
+        self._sy += sign * y
+        self._sxx += sign * x * x
+        self._sxy += sign * x * y
+        self._syy += sign * y * y
+
+    def _estimate(self, x: float, now: float) -> Optional[LeakEstimate]:
+        """根据当前统计量计算回归结果"""
+        n = len(self._samples)
+        if n < self.min_samples or x - self._samples[0][0] < self.min_span:
+            return None
+
+        var_x = n * self._sxx - self._sx * self._sx
+        var_y = n * self._syy - self._sy * self._sy
+        if var_x <= 0:
+            return None
+        cov = n * self._sxy - self._sx * self._sy
+        slope = cov / var_x
+        intercept = (self._sy - slope * self._sx) / n
+        r_squared = (cov * cov) / (var_x * var_y) if var_y > 0 else 0.0
+        current = intercept + slope * x
+
+        slope_per_hour = slope * 3600
+        estimate = LeakEstimate(
+            pid=self.pid,
+            samples=n,
+            slope_mb_per_hour=round(slope_per_hour, 2),
+            r_squared=round(min(r_squared, 1.0), 3),
+            current_mb=round(current, 1),
+            threshold_mb=self.threshold_mb
+        )
+        if slope > 0:
+            remaining = max((self.threshold_mb - current) / slope, 0.0)
+            estimate.seconds_to_threshold = round(remaining)
+            estimate.predicted_at = datetime.fromtimestamp(now) + timedelta(seconds=remaining)
+        estimate.leaking = slope_per_hour >= self.min_slope and r_squared >= self.min_r_squared
+        return estimate
@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+logcat流式采集模块
+
+维护一条长期运行的 `logcat -v epoch` 流，包括:
+- 将日志行解析为紧凑的记录对象
+- 按条数和字节数双重限制的环形缓冲区
+- 按PID、TAG、优先级建立索引，供崩溃检测和崩溃日志捕获即时查询
+- 流中断后从最后一条记录的时间戳处续接
+- 应用相关的记录同时交给飞行记录仪写入持久的环形文件
+- 流不可用时的增量读取：按游标记住上次读到的时间戳，用 -T 只取新日志，过滤在设备端完成
+"""
+
+import asyncio
+import re
+import shlex
+import subprocess
+import time
+from collections import deque
+from datetime import datetime
+from typing import Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Pattern
+
+
+# logcat -v epoch 输出格式:
+#   1691400000.123  1234  1250 E AndroidRuntime: FATAL EXCEPTION: main
+EPOCH_LINE = re.compile(
+    r'^\s*(?P<ts>\d+\.\d+)\s+(?P<pid>\d+)\s+(?P<tid>\d+)\s+(?P<priority>[VDIWEFS])\s+'
+    r'(?P<tag>.*?)\s*: (?P<message>.*)$'
+)
+
+# 优先级由低到高
+PRIORITY_LEVELS = {'V': 0, 'D': 1, 'I': 2, 'W': 3, 'E': 4, 'F': 5, 'S': 6}
+
+
+class LogRecord:
+    """单条logcat记录"""
+
+    __slots__ = ('timestamp', 'pid', 'tid', 'priority', 'tag', 'message')
+
+    def __init__(self, timestamp: float, pid: int, tid: int, priority: str, tag: str, message: str):
+        self.timestamp = timestamp
+        self.pid = pid
+        self.tid = tid
+        self.priority = priority
+        self.tag = tag
+        self.message = message
+
+    @property
+    def level(self) -> int:
+        """优先级数值，便于比较"""
+        return PRIORITY_LEVELS.get(self.priority, 0)
+
+    @property
+    def size(self) -> int:
+        """记录占用的近似字节数（用于缓冲区字节预算）"""
+        return len(self.tag) + len(self.message) + 24
+
+    def format(self) -> str:
+        """格式化为与 `logcat -v time` 接近的文本行"""
+        moment = datetime.fromtimestamp(self.timestamp).strftime('%m-%d %H:%M:%S.%f')[:-3]
+        return f"{moment} {self.pid:>5} {self.tid:>5} {self.priority} {self.tag}: {self.message}"
+
+
+def parse_epoch_line(line: str) -> Optional[LogRecord]:
+    """解析一行 `logcat -v epoch` 输出
+
+    Args:
+        line: 日志行
+
+    Returns:
+        Optional[LogRecord]: 解析结果，分隔行等无法解析时返回None
+    """
+    match = EPOCH_LINE.match(line)
+    if not match:
+        return None
+    return LogRecord(
+        float(match.group('ts')),
+        int(match.group('pid')),
+        int(match.group('tid')),
+        match.group('priority'),
+        match.group('tag'),
+        match.group('message')
+    )
+
+
+class LogRingBuffer:
+    """带索引的logcat环形缓冲区
+
+    记录按到达顺序保存，超出条数或字节预算时淘汰最旧的记录。
+    PID/TAG/优先级索引中的记录与主队列顺序一致，淘汰时同步从索引头部移除。
+    """
+
+    def __init__(self, max_records: int = 10000, max_bytes: int = 2 * 1024 * 1024):
+        """初始化缓冲区
+
+        Args:
+            max_records: 最大记录条数
+            max_bytes: 最大字节数
+        """
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.records: Deque[LogRecord] = deque()
+        self.total_bytes = 0
+        self.by_pid: Dict[int, Deque[LogRecord]] = {}
+        self.by_tag: Dict[str, Deque[LogRecord]] = {}
+        self.by_priority: Dict[str, Deque[LogRecord]] = {}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def latest_timestamp(self) -> Optional[float]:
+        """最新一条记录的设备时间戳"""
+        return self.records[-1].timestamp if self.records else None
+
+    def append(self, record: LogRecord):
+        """追加一条记录并按预算淘汰旧记录"""
+        self.records.append(record)
+        self.total_bytes += record.size
+        self.by_pid.setdefault(record.pid, deque()).append(record)
+        self.by_tag.setdefault(record.tag, deque()).append(record)
+        self.by_priority.setdefault(record.priority, deque()).append(record)
+
+        while self.records and (len(self.records) > self.max_records or self.total_bytes > self.max_bytes):
+            self._evict()
+
+    def _evict(self):
+        """淘汰最旧的一条记录"""
+        record = self.records.popleft()
+        self.total_bytes -= record.size
+        for index, key in ((self.by_pid, record.pid), (self.by_tag, record.tag),
+                           (self.by_priority, record.priority)):
+            bucket = index[key]
+            bucket.popleft()
+            if not bucket:
+                del index[key]
+
+    def query(self, pid: Optional[int] = None, tag: Optional[str] = None,
+              min_priority: Optional[str] = None, since: Optional[float] = None,
+              pattern: Optional[Pattern] = None, limit: Optional[int] = None) -> List[LogRecord]:
+        """按条件查询记录
+
+        Args:
+            pid: 进程ID
+            tag: 日志TAG
+            min_priority: 最低优先级，如 'E'
+            since: 起始设备时间戳
+            pattern: 对 "tag: message" 文本匹配的正则
+            limit: 最多返回最新的若干条
+
+        Returns:
+            List[LogRecord]: 按时间顺序排列的记录
+        """
+        # 从最小的索引开始过滤
+        candidates = self.records
+        if pid is not None:
+            candidates = self.by_pid.get(pid, ())
+        if tag is not None:
+            tagged = self.by_tag.get(tag, ())
+            if len(tagged) < len(candidates):
+                candidates = tagged
+
+        min_level = PRIORITY_LEVELS.get(min_priority, 0) if min_priority else 0
+        results = []
+        for record in reversed(candidates):
+            if since is not None and record.timestamp < since:
+                break
+            if pid is not None and record.pid != pid:
+                continue
+            if tag is not None and record.tag != tag:
+                continue
+            if record.level < min_level:
+                continue
+            if pattern is not None and not pattern.search(f"{record.tag}: {record.message}"):
+                continue
+            results.append(record)
+            if limit and len(results) >= limit:
+                break
+
+        results.reverse()
+        return results
+
+
+class LogcatStream:
+    """logcat流采集器
+
+    通过ADB管理器的流式shell持续读取logcat，写入环形缓冲区。
+    """
+
+    def __init__(self, config: dict, adb_manager, recorder=None):
+        """初始化采集器
+
+        Args:
+            config: 配置字典
+            adb_manager: ADB管理器实例
+            recorder: 飞行记录仪（FlightRecorder），流中的每条记录都交给它过滤后持久化
+        """
+        self.config = config
+        self.logcat_config = config.get('logcat', {}) or {}
+        self.enabled = self.logcat_config.get('stream', True)
+        self.backlog = self.logcat_config.get('backlog', 2000)
+        self.adb_manager = adb_manager
+        self.buffer = LogRingBuffer(
+            max_records=self.logcat_config.get('buffer_records', 10000),
+            max_bytes=self.logcat_config.get('buffer_kb', 2048) * 1024
+        )
+        self.recorder = recorder
+        self.lines_received = 0
+        self.restarts = 0
+        self.last_line_at: Optional[float] = None
+        self._streaming = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def active(self) -> bool:
+        """流是否正在运行且已收到数据（不活跃时调用方应回退到logcat -d）"""
+        return self._streaming and self.last_line_at is not None
+
+    async def start(self):
+        """启动logcat流"""
+        if not self.enabled:
+            print("ℹ️ logcat流式采集已禁用")
+            return
+        if self._task is None:
+            if self.recorder:
+                try:
+                    self.recorder.open()
+                except (OSError, ValueError) as e:
+                    print(f"⚠️ 飞行记录仪不可用: {e}")
+                    self.recorder = None
+            self._task = asyncio.ensure_future(self._run())
+            print("📜 logcat流式采集启动")
+
+    async def stop(self):
+        """停止logcat流"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._streaming = False
+        if self.recorder:
+            self.recorder.close()
+
+    def track_pid(self, pid: int):
+        """通知飞行记录仪应用的新进程PID
+
+        Args:
+            pid: 进程ID
+        """
+        if self.recorder:
+            self.recorder.track_pid(pid)
+
+    def query(self, **kwargs) -> List[LogRecord]:
+        """查询缓冲区记录，参数同 LogRingBuffer.query"""
+        return self.buffer.query(**kwargs)
+
+    def recent_since(self, seconds: float) -> Optional[float]:
+        """计算 "最近N秒" 对应的设备时间戳起点
+
+        以缓冲区最新记录为基准，避免主机与设备时钟不一致
+
+        Args:
+            seconds: 时间窗口（秒）
+
+        Returns:
+            Optional[float]: 起始设备时间戳，缓冲区为空时返回None
+        """
+        latest = self.buffer.latest_timestamp
+        return latest - seconds if latest is not None else None
+
+    def _build_command(self) -> str:
+        """构建logcat命令，续接时从最后一条记录之后开始"""
+        latest = self.buffer.latest_timestamp
+        if latest is not None:
+            return f"logcat -v epoch -T '{latest:.3f}'"
+        return f"logcat -v epoch -T {self.backlog}"
+
+    async def _run(self):
+        """读取循环，流结束或异常时退避重启"""
+        delay = 1
+        while True:
+            latest = self.buffer.latest_timestamp
+            try:
+                async for line in self.adb_manager.shell_stream(self._build_command()):
+                    record = parse_epoch_line(line)
+                    if record is None:
+                        continue
+                    # -T 续接时会包含边界时间戳上的记录，跳过已缓存的部分
+                    if latest is not None and record.timestamp <= latest:
+                        continue
+                    if not self._streaming:
+                        self._streaming = True
+                        delay = 1
+                    self.buffer.append(record)
+                    if self.recorder:
+                        self.recorder.consider(record)
+                    self.lines_received += 1
+                    self.last_line_at = time.monotonic()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ logcat流异常: {e}")
+
+            self._streaming = False
+            self.restarts += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
+
+    def get_stats(self) -> dict:
+        """获取采集统计
+
+        Returns:
+            dict: 缓冲区大小、接收行数、重启次数等
+        """
+        return {
+            'active': self.active,
+            'records': len(self.buffer),
+            'bytes': self.buffer.total_bytes,
+            'lines_received': self.lines_received,
+            'restarts': self.restarts,
+            'flight_recorder': self.recorder.get_stats() if self.recorder else None
+        }
+
+
+# 增量读取命令输出中设备当前时间的标记行
+DEVICE_TIME_MARKER = "@@device_time"
+
+
+class LogcatReader:
+    """基于游标的增量logcat读取器
+
+    每个游标记住上次读到的最后一条日志的时间戳，下次用 `logcat -d -T` 只取之后的日志；
+    按PID、正则、TAG:优先级和缓冲区的过滤都在设备端完成，只传输需要的行。
+    """
+
+    def __init__(self, shell: Callable[[str], Awaitable[subprocess.CompletedProcess]]):
+        """初始化读取器
+
+        Args:
+            shell: 执行设备端命令的协程函数
+        """
+        self.shell = shell
+        self.cursors: Dict[str, float] = {}
+        # 设备时钟 - 主机时钟（秒），每次读取时更新
+        self.clock_offset: Optional[float] = None
+        self.reads = 0
+        self.bytes_read = 0
+        self.last_read_bytes = 0
+
+    def build_command(self, buffers: Iterable[str] = ('main',), pid: Optional[int] = None,
+                      regex: Optional[str] = None, specs: Iterable[str] = (),
+                      start: Optional[float] = None, window: float = 120) -> str:
+        """构建设备端读取命令
+
+        Args:
+            buffers: logcat缓冲区，如 main / system / crash
+            pid: 只读取该进程的日志
+            regex: 设备端按消息内容过滤的正则
+            specs: TAG:优先级 过滤条件，如 '*:E'、'ActivityManager:I'
+            start: 起始设备时间戳，为空时由设备端按当前时间减去window计算
+            window: 没有起始时间戳时读取的时间窗口（秒）
+
+        Returns:
+            str: 设备端shell命令（先输出设备当前时间，再输出日志）
+        """
+        options = ['-d', '-v epoch'] + [f'-b {buffer}' for buffer in buffers]
+        if pid:
+            options.append(f'--pid={pid}')
+        if regex:
+            options.append(f'-e {shlex.quote(regex)}')
+        if start is not None:
+            options.append(f"-T '{start:.3f}'")
+        else:
+            options.append(f'-T "$(($(date +%s) - {int(window)})).000"')
+        options.extend(shlex.quote(spec) for spec in specs)
+        return f"echo {DEVICE_TIME_MARKER}; date +%s; logcat {' '.join(options)}"
+
+    async def read(self, cursor: Optional[str] = None, buffers: Iterable[str] = ('main',),
+                   pid: Optional[int] = None, regex: Optional[str] = None,
+                   specs: Iterable[str] = (), window: float = 120) -> List[LogRecord]:
+        """读取日志
+
+        Args:
+            cursor: 游标名称，为空时不记录位置（每次读取完整的时间窗口）
+            buffers: logcat缓冲区
+            pid: 只读取该进程的日志
+            regex: 设备端按消息内容过滤的正则
+            specs: TAG:优先级 过滤条件
+            window: 最多回看的时间窗口（秒），游标更早时也只读取窗口内的日志
+
+        Returns:
+            List[LogRecord]: 按时间顺序排列的新日志，失败时返回空列表
+        """
+        last = self.cursors.get(cursor) if cursor else None
+        start = None
+        if self.clock_offset is not None:
+            start = time.time() + self.clock_offset - window
+            if last is not None:
+                start = max(start, last)
+
+        result = await self.shell(self.build_command(buffers, pid, regex, specs, start, window))
+        self.reads += 1
+        self.last_read_bytes = len(result.stdout.encode('utf-8')) if result.stdout else 0
+        self.bytes_read += self.last_read_bytes
+        if result.returncode != 0 and not result.stdout:
+            return []
+
+        lines = result.stdout.splitlines()
+        if len(lines) >= 2 and lines[0].strip() == DEVICE_TIME_MARKER and lines[1].strip().isdigit():
+            self.clock_offset = int(lines[1].strip()) - time.time()
+            lines = lines[2:]
+
+        records = []
+        for line in lines:
+            record = parse_epoch_line(line)
+            # -T 会包含边界时间戳上的记录，跳过上次已读取的部分
+            if record is None or (last is not None and record.timestamp <= last):
+                continue
+            records.append(record)
+
+        if cursor and records:
+            self.cursors[cursor] = records[-1].timestamp
+        return records
+
+    def get_stats(self) -> dict:
+        """获取读取统计
+
+        Returns:
+            dict: 读取次数、累计和最近一次传输的字节数、各游标位置
+        """
+        return {
+            'reads': self.reads,
+            'bytes_read': self.bytes_read,
+            'last_read_bytes': self.last_read_bytes,
+            'cursors': dict(self.cursors)
+        }
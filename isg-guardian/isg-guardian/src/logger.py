@@ -3,20 +3,61 @@
 日志收集模块
 
 负责收集和管理应用日志，包括:
-- 记录应用状态日志
-- 捕获崩溃日志
+- 记录应用状态日志（批量写入，按大小轮转）
+- 捕获崩溃日志（立即快照，日志收集和写入在后台任务队列中与重启并行）
+- 按崩溃指纹去重：每种崩溃只压缩保存首次的完整报告，之后只累计次数（无堆栈的事件每次单独保存）
+- 报告附带飞行记录仪中崩溃前的应用日志（设备logcat缓冲区已被冲掉时仍可用）
+- 增量收集设备上的tombstone和ANR trace文件，按时间关联到崩溃报告
 - 管理日志文件生命周期
 """
 
 import json
 import asyncio
+import gzip
+import os
+import re
+import subprocess
+import time
 import aiofiles
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from adb_shell import run_adb_shell_once
+from background_worker import BackgroundWorker
+from crash_fingerprint import crash_fingerprint
+from crash_index import CrashIndex, crash_index_path
+from crash_signatures import SignatureEngine, SignatureMatch
+from flight_recorder import FlightMark
+from logcat_stream import LogcatReader
+from status_writer import COMPACT_FIELDS, StatusLogWriter, format_status_line, parse_size
+from trace_collector import TraceCollector
 # Import will be done locally to avoid circular imports
 
 
+@dataclass
+class CrashSnapshot:
+    """崩溃发生时立即记录的现场信息
+
+    Attributes:
+        status: 崩溃时的应用状态
+        detected_at: 检测到崩溃的时间
+        detected_monotonic: 检测时刻的单调时钟，用于计算捕获和重启耗时
+        crash_logs: 从logcat流缓冲区取得的崩溃日志，缓冲区不可用时为None（由后台任务回退到logcat -d）
+        system_logs: 从logcat流缓冲区取得的系统日志，同上
+        flight_mark: 崩溃时飞行记录仪的写入位置，崩溃前日志由后台任务读取
+        flight_logs: 从飞行记录仪文件取得的崩溃前日志，尚未读取时为None
+    """
+    status: object
+    detected_at: datetime = field(default_factory=datetime.now)
+    detected_monotonic: float = field(default_factory=time.monotonic)
+    crash_logs: Optional[List[str]] = None
+    system_logs: Optional[List[str]] = None
+    flight_mark: Optional[FlightMark] = None
+    flight_logs: Optional[List[str]] = None
+
+
 class CrashLogger:
     """崩溃日志收集器
     
@@ -35,86 +76,163 @@ class CrashLogger:
         self.status_log_file = Path(config['logging']['status_log_file'])
         self.adb_manager = adb_manager
         
-    def _get_adb_prefix(self) -> str:
-        """获取ADB命令前缀
+        logging_config = config['logging']
+        self.compact_status = logging_config.get('status_format', 'text') == 'compact'
+        self.status_writer = StatusLogWriter(
+            self.status_log_file,
+            max_file_size=parse_size(logging_config.get('max_file_size', '5MB')),
+            backup_count=logging_config.get('status_backup_count', 3),
+            compress=logging_config.get('compress_rotated', True),
+            flush_interval=logging_config.get('status_flush_interval', 60),
+            flush_bytes=parse_size(logging_config.get('status_flush_size', '16KB'))
+        )
+        if self.compact_status:
+            self.status_writer.header = f"# {COMPACT_FIELDS}"
+        self.capture_queue = BackgroundWorker(
+            'crash_capture',
+            max_queue=config['logging'].get('capture_queue', 20),
+            concurrency=config['logging'].get('capture_concurrency', 2),
+            on_drop=self._on_capture_dropped
+        )
+        self.restart_wait_timeout = config['logging'].get('capture_restart_timeout', 120)
+        self.flight_recorder_seconds = (config.get('logcat', {}) or {}).get('flight_recorder_seconds', 120)
+        self.crash_index = CrashIndex(crash_index_path(config))
+        self.signatures = SignatureEngine.from_config(config)
+        # logcat流不可用时的增量读取，使用独立的adb进程，不占用持久Shell通道
+        self.logcat_reader = LogcatReader(self._capture_shell)
+        # tombstone / ANR trace 通过exec-out拉取，同样不占用持久Shell通道
+        self.trace_collector = (
+            TraceCollector(config, self._capture_shell, adb_manager.exec_out) if adb_manager else None
+        )
+        
+    async def _shell(self, command: str) -> subprocess.CompletedProcess:
+        """在设备上执行shell命令
+        
+        优先复用ADB管理器的持久Shell通道
         
+        Args:
+            command: 设备端shell命令
+            
         Returns:
-            str: ADB命令前缀
+            subprocess.CompletedProcess: 命令执行结果
         """
         if self.adb_manager:
-            return self.adb_manager.get_adb_prefix()
-        else:
-            return "adb"
+            return await self.adb_manager.shell(command)
+        return await run_adb_shell_once(command)
+        
+    async def _capture_shell(self, command: str) -> subprocess.CompletedProcess:
+        """执行日志收集命令
+        
+        持久Shell通道上的命令是串行执行的，日志收集与重启并行时改用一次性adb进程，
+        避免logcat导出阻塞重启命令
+        
+        Args:
+            command: 设备端shell命令
+            
+        Returns:
+            subprocess.CompletedProcess: 命令执行结果
+        """
+        if self.adb_manager and not self.adb_manager.native and self.adb_manager.persistent_shell:
+            return await run_adb_shell_once(command, self.adb_manager.target_device)
+        return await self._shell(command)
         
     async def start(self):
         """启动日志收集器"""
         self.crash_log_dir.mkdir(parents=True, exist_ok=True)
         self.status_log_file.parent.mkdir(parents=True, exist_ok=True)
+        self.capture_queue.start()
+        try:
+            backfilled = self.crash_index.backfill(self.crash_log_dir)
+            if backfilled:
+                print(f"📇 已从现有崩溃报告建立索引 ({backfilled} 条)")
+        except Exception as e:
+            print(f"⚠️ 建立崩溃索引失败: {e}")
+        if self.trace_collector:
+            try:
+                await self.trace_collector.start()
+            except Exception as e:
+                print(f"⚠️ 初始化tombstone收集失败: {e}")
         print(f"📝 日志收集器启动 - 目录: {self.crash_log_dir}")
         
+    async def stop(self, timeout: float = 30.0):
+        """停止日志收集器，等待排队中的崩溃日志写完并写出缓冲的状态日志
+        
+        Args:
+            timeout: 等待的最长时间（秒）
+        """
+        await self.capture_queue.stop(timeout)
+        await self.status_writer.flush()
+        
     async def log_status(self, status):
         """记录应用状态
         
         Args:
             status: 应用状态对象
         """
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        status_line = (
-            f"{timestamp} | "
-            f"{'✅运行' if status.running else '❌停止'} | "
-            f"PID:{status.pid or 'N/A'} | "
-            f"运行:{status.uptime}s | "
-            f"内存:{status.memory_mb:.1f}MB"
-        )
+        await self.status_writer.write(format_status_line(status, self.compact_status))
         
-        try:
-            async with aiofiles.open(self.status_log_file, 'a', encoding='utf-8') as f:
-                await f.write(status_line + '\n')
-        except Exception as e:
-            print(f"❌ 写入状态日志失败: {e}")
+    def snapshot(self, status) -> CrashSnapshot:
+        """立即记录崩溃现场，不执行任何ADB调用
         
-    async def capture_crash_logs(self, status) -> str:
-        """捕获崩溃日志
+        logcat流可用时直接从内存缓冲区取出相关日志，避免重启后的新日志将其挤出；
+        飞行记录仪只记录当前写入位置，解码文件中的日志由后台任务完成
         
         Args:
             status: 崩溃时的应用状态
             
         Returns:
-            str: 崩溃日志文件路径
+            CrashSnapshot: 崩溃现场快照
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        crash_file = self.crash_log_dir / f"crash_{timestamp}.log"
+        recorder = self._get_flight_recorder()
+        snapshot = CrashSnapshot(status=status, flight_mark=recorder.mark() if recorder else None)
+        logcat = self._get_logcat_stream()
+        if logcat:
+            snapshot.crash_logs = self._get_buffered_crash_logs(logcat, getattr(status, 'pid', None))
+            if getattr(status, 'crash_type', None) == 'force_stop':
+                snapshot.system_logs = self._query_system_logs(logcat)
+        return snapshot
         
-        print(f"📝 正在捕获崩溃日志: {crash_file.name}")
+    def submit_capture(self, status, restart_result: Optional[asyncio.Future] = None) -> CrashSnapshot:
+        """记录崩溃现场并将日志收集和写入提交到后台任务队列
         
-        try:
-            # 获取应用相关的logcat日志
-            crash_logs = await self._get_crash_logcat()
-            
-            # 构建崩溃报告
-            crash_report = {
-                "timestamp": datetime.now().isoformat(),
-                "package_name": self.config['app']['package_name'],
-                "crash_type": self._detect_crash_type(crash_logs),
-                "uptime_before_crash": status.uptime,
-                "memory_usage": status.memory_mb,
-                "pid": status.pid,
-                "logcat_lines": len(crash_logs),
-                "crash_logs": crash_logs[-100:] if len(crash_logs) > 100 else crash_logs  # 保留最后100行
-            }
-            
-            # 保存到文件
-            await self._write_json_file(crash_file, crash_report)
-            
-            # 清理旧日志
-            await self._cleanup_old_logs()
+        Args:
+            status: 崩溃时的应用状态
+            restart_result: 重启结果Future（dict），报告在重启完成后写入并记录重启耗时
             
-            return str(crash_file)
+        Returns:
+            CrashSnapshot: 崩溃现场快照
+        """
+        snapshot = self.snapshot(status)
+        self.capture_queue.submit(self.write_crash_report, snapshot, restart_result)
+        return snapshot
+        
+    def _on_capture_dropped(self, func, args: tuple):
+        """收集队列已满时最早的崩溃报告被丢弃：记录警告，并在索引中保留这次崩溃以免计数缺失
+        
+        Args:
+            func: 被丢弃的任务函数
+            args: 任务参数，第一个为崩溃现场快照
+        """
+        snapshot = args[0] if args and isinstance(args[0], CrashSnapshot) else None
+        if snapshot is None:
+            print(f"⚠️ 崩溃日志收集队列已满，丢弃了一个任务 (累计丢弃 {self.capture_queue.dropped} 个)")
+            return
+        status = snapshot.status
+        crash_type = getattr(status, 'crash_type', None) or 'unknown'
+        print(f"⚠️ 崩溃日志收集队列已满，未写入报告: PID {getattr(status, 'pid', None)}, "
+              f"{snapshot.detected_at.strftime('%Y-%m-%d %H:%M:%S')} ({crash_type})")
+        self._index_crash(snapshot, crash_type, None, None, crash_type)
+        
+    async def capture_crash_logs(self, status) -> str:
+        """捕获崩溃日志
+        
+        Args:
+            status: 崩溃时的应用状态
             
-        except Exception as e:
-            print(f"❌ 捕获崩溃日志失败: {e}")
-            return ""
+        Returns:
+            str: 崩溃日志文件路径
+        """
+        return await self.write_crash_report(self.snapshot(status))
             
     async def capture_force_stop_event(self, status) -> str:
         """捕获强制停止事件
@@ -125,44 +243,130 @@ class CrashLogger:
         Returns:
             str: 事件日志文件路径
         """
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        crash_file = self.crash_log_dir / f"crash_{timestamp}.log"
+        return await self.write_crash_report(self.snapshot(status))
         
-        print(f"📝 记录应用停止事件: {crash_file.name}")
+    async def write_crash_report(self, snapshot: CrashSnapshot,
+                                 restart_result: Optional[asyncio.Future] = None) -> str:
+        """补全快照中缺少的日志，等待重启结果后写入崩溃报告
+        
+        Args:
+            snapshot: 崩溃现场快照
+            restart_result: 重启结果Future（dict），为空时不等待
+            
+        Returns:
+            str: 崩溃日志文件路径
+        """
+        status = snapshot.status
+        force_stop = getattr(status, 'crash_type', None) == 'force_stop'
+        
+        if force_stop:
+            print(f"📝 记录应用停止事件 (PID: {getattr(status, 'pid', None)})")
+        else:
+            print(f"📝 正在捕获崩溃日志 (PID: {status.pid})")
         
         try:
-            # 构建停止事件报告
-            event_report = {
-                "timestamp": datetime.now().isoformat(),
-                "package_name": self.config['app']['package_name'],
-                "crash_type": "force_stop",
-                "uptime_before_stop": status.uptime if hasattr(status, 'uptime') else 0,
-                "memory_usage": status.memory_mb if hasattr(status, 'memory_mb') else 0.0,
-                "pid": status.pid if hasattr(status, 'pid') else None,
-                "description": "应用被强制停止或意外终止"
-            }
+            # 从飞行记录仪读取截至崩溃时刻的日志（解码文件不在崩溃处理的关键路径上）
+            if snapshot.flight_logs is None:
+                snapshot.flight_logs = self._get_flight_logs(snapshot.flight_mark)
             
             # 获取应用相关的logcat日志
-            app_logs = await self._get_crash_logcat()
-            if app_logs:
-                event_report["crash_logs"] = app_logs[-100:] if len(app_logs) > 100 else app_logs
-                event_report["logcat_lines"] = len(app_logs)
-                
-            # 获取系统相关日志
-            recent_logs = await self._get_recent_system_logs()
-            if recent_logs:
-                event_report["system_logs"] = recent_logs[-50:]  # 保留最后50行
-                
-            # 保存到文件
-            await self._write_json_file(crash_file, event_report)
-            
-            # 清理旧日志
-            await self._cleanup_old_logs()
-            
+            crash_logs = snapshot.crash_logs
+            if crash_logs is None:
+                crash_logs = await self._get_crash_logcat(getattr(status, 'pid', None))
+            
+            if force_stop:
+                # 构建停止事件报告
+                report = {
+                    "timestamp": snapshot.detected_at.isoformat(),
+                    "package_name": self.config['app']['package_name'],
+                    "crash_type": "force_stop",
+                    "uptime_before_stop": getattr(status, 'uptime', 0),
+                    "memory_usage": getattr(status, 'memory_mb', 0.0),
+                    "pid": getattr(status, 'pid', None),
+                    "description": "应用被强制停止或意外终止"
+                }
+                if crash_logs:
+                    report["crash_logs"] = crash_logs[-100:] if len(crash_logs) > 100 else crash_logs
+                    report["logcat_lines"] = len(crash_logs)
+                    
+                # 获取系统相关日志
+                system_logs = snapshot.system_logs
+                if system_logs is None:
+                    system_logs = await self._get_recent_system_logs()
+                if system_logs:
+                    report["system_logs"] = system_logs[-50:]  # 保留最后50行
+            else:
+                # 构建崩溃报告，logcat中没有可识别的崩溃特征时再识别飞行记录仪中的日志
+                match = self._detect_crash_type(crash_logs, status.pid)
+                if match.rule in ('unknown', 'process_missing') and snapshot.flight_logs:
+                    flight_match = self._detect_crash_type(snapshot.flight_logs, status.pid)
+                    if flight_match.rule != 'unknown':
+                        match, crash_logs = flight_match, snapshot.flight_logs
+                report = {
+                    "timestamp": snapshot.detected_at.isoformat(),
+                    "package_name": self.config['app']['package_name'],
+                    "crash_type": match.rule,
+                    "severity": match.severity,
+                    "evidence": match.evidence[:5],
+                    "uptime_before_crash": status.uptime,
+                    "memory_usage": status.memory_mb,
+                    "pid": status.pid,
+                    "logcat_lines": len(crash_logs),
+                    "crash_logs": crash_logs[-100:] if len(crash_logs) > 100 else crash_logs  # 保留最后100行
+                }
+            
+            if snapshot.flight_logs:
+                report["flight_recorder"] = snapshot.flight_logs[-200:]  # 保留最后200行
+                report["flight_recorder_lines"] = len(snapshot.flight_logs)
+            
+            report["capture_time"] = round(time.monotonic() - snapshot.detected_monotonic, 3)
+            
+            # 等待并发进行的重启完成，记录应用是否已恢复
+            if restart_result is not None:
+                try:
+                    report["restart"] = await asyncio.wait_for(
+                        asyncio.shield(restart_result), timeout=self.restart_wait_timeout
+                    )
+                except asyncio.TimeoutError:
+                    report["restart"] = {"success": None, "error": "等待重启结果超时"}
+            
+            # 系统在进程退出后才写完tombstone/ANR trace，等重启结束后再同步
+            if not force_stop:
+                traces = await self._collect_traces(snapshot)
+                if traces:
+                    report["traces"] = traces
+            report["report_written_at"] = datetime.now().isoformat()
+            
+            # 同一指纹只保存首次的完整报告（报告已被清理时重新保存）；
+            # 没有指纹的事件无法判断是否重复，每次单独保存
+            fingerprint, signature = crash_fingerprint(report["crash_type"], crash_logs)
+            report["fingerprint"] = fingerprint
+            report["signature"] = signature
+            if fingerprint:
+                crash_file = self.crash_log_dir / f"sig_{fingerprint}.json.gz"
+            else:
+                stamp = snapshot.detected_at.strftime('%Y%m%d_%H%M%S_%f')
+                crash_file = self.crash_log_dir / f"event_{stamp}.json.gz"
+            
+            if fingerprint and crash_file.exists():
+                # 修改时间即最近出现时间，供清理按时间保留
+                os.utime(crash_file)
+                occurrences = self._index_crash(snapshot, report["crash_type"], crash_file.name,
+                                                fingerprint, signature)
+                print(f"📝 重复崩溃 [{fingerprint}] 第 {occurrences} 次: {signature} "
+                      f"(捕获耗时 {report['capture_time']:.2f}s)")
+            else:
+                # 写入成功后再记入索引，避免索引指向不存在的报告
+                if not await self._write_compressed_report(crash_file, report):
+                    return ""
+                self._index_crash(snapshot, report["crash_type"], crash_file.name, fingerprint, signature)
+                # 清理旧日志
+                await self._cleanup_old_logs()
+                print(f"📝 事件日志已保存: {crash_file.name} (捕获耗时 {report['capture_time']:.2f}s)")
             return str(crash_file)
             
         except Exception as e:
-            print(f"❌ 记录停止事件失败: {e}")
+            print(f"❌ 捕获崩溃日志失败: {e}")
             return ""
             
     async def _get_recent_system_logs(self) -> List[str]:
@@ -172,73 +376,193 @@ class CrashLogger:
             List[str]: 系统日志行列表
         """
         try:
-            # 获取最近2分钟的系统相关日志
-            adb_prefix = self._get_adb_prefix()
-            cmd = f"{adb_prefix} shell logcat -d -t 120 | grep -E '(ActivityManager|System)'"
-            process = await asyncio.create_subprocess_shell(
-                cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+            logcat = self._get_logcat_stream()
+            if logcat:
+                return self._query_system_logs(logcat)
+                
+            # 获取最近2分钟的系统相关日志（设备端按TAG过滤）
+            records = await self.logcat_reader.read(
+                buffers=('main', 'system'),
+                specs=('ActivityManager:I', 'System:V', 'System.err:V', 'SystemServer:V', '*:S'),
+                window=120
             )
-            stdout, _ = await process.communicate()
-            
-            if process.returncode == 0:
-                return stdout.decode('utf-8', errors='ignore').strip().split('\n')
-            else:
-                return []
+            return [record.format() for record in records]
                 
         except Exception as e:
             print(f"❌ 获取系统日志失败: {e}")
             return []
         
-    async def _get_crash_logcat(self) -> List[str]:
+    async def _collect_traces(self, snapshot: CrashSnapshot) -> List[Dict]:
+        """增量拉取新的tombstone/ANR trace文件，返回与本次崩溃时间接近的文件
+        
+        Args:
+            snapshot: 崩溃现场快照
+            
+        Returns:
+            List[Dict]: 关联的文件信息，收集器不可用时为空列表
+        """
+        if not self.trace_collector:
+            return []
+        try:
+            await self.trace_collector.sync()
+            traces = self.trace_collector.match(snapshot.detected_at.timestamp())
+        except Exception as e:
+            print(f"❌ 收集tombstone/ANR文件失败: {e}")
+            return []
+        if traces:
+            print(f"🪦 关联到 {len(traces)} 个tombstone/ANR文件: {', '.join(trace['local'] for trace in traces)}")
+        return traces
+        
+    def _index_crash(self, snapshot: CrashSnapshot, crash_type: str, report_name: Optional[str],
+                     fingerprint: Optional[str], signature: str) -> int:
+        """将崩溃记录追加到索引
+        
+        Returns:
+            int: 该指纹累计出现次数，索引不可用时为0
+        """
+        status = snapshot.status
+        try:
+            return self.crash_index.record(
+                snapshot.detected_at.timestamp(),
+                crash_type,
+                getattr(status, 'pid', None),
+                getattr(status, 'uptime', 0),
+                report_name,
+                fingerprint,
+                signature
+            )
+        except Exception as e:
+            print(f"❌ 更新崩溃索引失败: {e}")
+            return 0
+            
+    def _query_system_logs(self, logcat) -> List[str]:
+        """从logcat流缓冲区中取出最近2分钟的系统相关日志"""
+        records = logcat.query(
+            since=logcat.recent_since(120),
+            pattern=re.compile(r'(ActivityManager|System)')
+        )
+        return [record.format() for record in records]
+        
+    def _get_flight_recorder(self):
+        """获取已打开的飞行记录仪，不可用时返回None"""
+        recorder = self.adb_manager.logcat.recorder if self.adb_manager else None
+        if not recorder or not recorder.is_open:
+            return None
+        return recorder
+        
+    def _get_flight_logs(self, mark: Optional[FlightMark] = None) -> List[str]:
+        """从飞行记录仪文件读取崩溃前N秒的应用日志，无需任何ADB调用
+        
+        Args:
+            mark: 崩溃时的写入位置，只读取该时刻之前的日志；为空时读取到最新记录
+            
+        Returns:
+            List[str]: 日志行列表，记录仪不可用时为空列表
+        """
+        recorder = self._get_flight_recorder()
+        if not recorder:
+            return []
+        try:
+            records = recorder.read(self.flight_recorder_seconds, until=mark)
+        except Exception as e:
+            print(f"⚠️ 读取飞行记录仪失败: {e}")
+            return []
+        if records:
+            print(f"📼 飞行记录仪中获取到 {len(records)} 行崩溃前日志")
+        return [f"[FR] {record.format()}" for record in records]
+        
+    def _get_logcat_stream(self):
+        """获取正在运行的logcat流，不可用时返回None"""
+        if self.adb_manager and self.adb_manager.logcat.active:
+            return self.adb_manager.logcat
+        return None
+        
+    def _get_buffered_crash_logs(self, logcat, pid) -> List[str]:
+        """从logcat流缓冲区中提取崩溃相关日志，无需任何ADB调用
+        
+        Args:
+            logcat: logcat流实例
+            pid: 崩溃进程的PID（进程退出后其日志仍在缓冲区中）
+            
+        Returns:
+            List[str]: 日志行列表
+        """
+        package_name = self.config['app']['package_name']
+        package = re.escape(package_name)
+        all_logs = []
+        
+        if pid:
+            error_logs = [f"[PID-ERROR] {r.format()}" for r in logcat.query(pid=pid, min_priority='E')]
+            all_logs.extend(error_logs)
+            if error_logs:
+                print(f"📋 缓冲区中获取到 {len(error_logs)} 行iSG错误日志 (PID: {pid})")
+                
+        am_logs = [
+            f"[AM] {r.format()}" for r in logcat.query(
+                tag='ActivityManager', since=logcat.recent_since(600), pattern=re.compile(package)
+            )
+        ]
+        all_logs.extend(am_logs)
+        
+        sys_logs = [
+            f"[SYS] {r.format()}" for r in logcat.query(
+                since=logcat.recent_since(300), pattern=re.compile(f"(FATAL|CRASH|ANR).*{package}")
+            )
+        ]
+        all_logs.extend(sys_logs)
+        
+        if all_logs:
+            print(f"📋 缓冲区中总共获取到 {len(all_logs)} 行相关日志")
+            return all_logs
+        return [f"[INFO] logcat流正常，但未找到 {package_name} 相关日志"]
+        
+    async def _get_crash_logcat(self, pid: Optional[int] = None) -> List[str]:
         """获取崩溃相关的logcat日志
         
+        logcat流可用时直接查询内存缓冲区，否则增量读取并在设备端过滤
+        
+        Args:
+            pid: 崩溃进程的PID
+            
         Returns:
             List[str]: 日志行列表
         """
         try:
+            logcat = self._get_logcat_stream()
+            if logcat:
+                return self._get_buffered_crash_logs(logcat, pid)
+                
             package_name = self.config['app']['package_name']
-            adb_prefix = self._get_adb_prefix()
+            package = re.escape(package_name)
             all_logs = []
+            bytes_before = self.logcat_reader.bytes_read
             
             # 优先使用--pid方法获取iSG进程的错误日志
-            isg_error_logs = await self._get_isg_error_logs()
+            isg_error_logs = await self._get_isg_error_logs(pid)
             if isg_error_logs:
                 all_logs.extend(isg_error_logs)
                 print(f"📋 获取到 {len(isg_error_logs)} 行iSG错误日志")
             
-            # 方法2: 获取ActivityManager相关日志（应用启动/停止/崩溃）
-            cmd2 = f"{adb_prefix} shell logcat -d -t 600 | grep -E 'ActivityManager.*{package_name}'"
-            process2 = await asyncio.create_subprocess_shell(
-                cmd2,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+            # 方法2: 获取ActivityManager相关日志（应用启动/停止/崩溃），只读取上次捕获之后的新日志
+            am_records = await self.logcat_reader.read(
+                cursor='crash_am', buffers=('main', 'system'), regex=package,
+                specs=('ActivityManager:I', '*:S'), window=600
             )
-            stdout2, _ = await process2.communicate()
-            
-            if stdout2:
-                lines2 = stdout2.decode('utf-8', errors='ignore').strip().split('\n')
-                am_logs = [f"[AM] {line}" for line in lines2 if line.strip()]
-                all_logs.extend(am_logs)
-                if am_logs:
-                    print(f"📋 获取到 {len(am_logs)} 行ActivityManager日志")
+            am_logs = [f"[AM] {record.format()}" for record in am_records]
+            all_logs.extend(am_logs)
+            if am_logs:
+                print(f"📋 获取到 {len(am_logs)} 行ActivityManager日志")
             
             # 方法3: 获取系统级别的崩溃相关日志
-            cmd3 = f"{adb_prefix} shell logcat -d -t 300 | grep -E '(FATAL|CRASH|ANR).*{package_name}'"
-            process3 = await asyncio.create_subprocess_shell(
-                cmd3,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+            sys_records = await self.logcat_reader.read(
+                cursor='crash_sys', buffers=('main', 'system', 'crash'),
+                regex=f"(FATAL|CRASH|ANR).*{package}", window=300
             )
-            stdout3, _ = await process3.communicate()
-            
-            if stdout3:
-                lines3 = stdout3.decode('utf-8', errors='ignore').strip().split('\n')
-                sys_logs = [f"[SYS] {line}" for line in lines3 if line.strip()]
-                all_logs.extend(sys_logs)
-                if sys_logs:
-                    print(f"📋 获取到 {len(sys_logs)} 行系统崩溃日志")
+            sys_logs = [f"[SYS] {record.format()}" for record in sys_records]
+            all_logs.extend(sys_logs)
+            if sys_logs:
+                print(f"📋 获取到 {len(sys_logs)} 行系统崩溃日志")
+            print(f"📥 logcat增量读取共传输 {(self.logcat_reader.bytes_read - bytes_before) / 1024:.1f} KB")
             
             # 如果获取到日志，按时间排序并添加调试信息
             if all_logs:
@@ -247,19 +571,13 @@ class CrashLogger:
             else:
                 # 没有获取到日志时，尝试获取基本的logcat输出以验证ADB连接
                 print("⚠️ 未获取到应用相关日志，检查ADB连接...")
-                test_cmd = f"{adb_prefix} shell logcat -d -t 10"
-                test_process = await asyncio.create_subprocess_shell(
-                    test_cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                test_stdout, test_stderr = await test_process.communicate()
+                test_result = await self._capture_shell("logcat -d -t 10")
                 
-                if test_process.returncode == 0 and test_stdout:
+                if test_result.returncode == 0 and test_result.stdout:
                     print("✅ ADB连接正常，但应用日志为空")
                     return [f"[INFO] ADB连接正常，但未找到 {package_name} 相关日志"]
                 else:
-                    error_msg = test_stderr.decode('utf-8', errors='ignore').strip()
+                    error_msg = test_result.stderr.strip()
                     print(f"❌ ADB连接问题: {error_msg}")
                     return [f"[ERROR] ADB连接失败: {error_msg}"]
             
@@ -267,57 +585,43 @@ class CrashLogger:
             print(f"❌ 获取崩溃日志失败: {e}")
             return [f"[ERROR] logcat获取异常: {str(e)}"]
             
-    async def _get_isg_error_logs(self) -> List[str]:
+    async def _get_isg_error_logs(self, pid: Optional[int] = None) -> List[str]:
         """使用--pid参数获取iSG进程的错误日志
         
+        Args:
+            pid: 崩溃进程的PID（重启与日志收集并行，此时pidof已是新进程），为空时查询当前进程
+            
         Returns:
             List[str]: iSG进程错误日志列表
         """
         try:
             package_name = self.config['app']['package_name']
-            adb_prefix = self._get_adb_prefix()
-            
-            # 首先获取iSG进程的PID
-            pidof_cmd = f"{adb_prefix} shell pidof {package_name}"
-            pid_process = await asyncio.create_subprocess_shell(
-                pidof_cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            pid_stdout, _ = await pid_process.communicate()
-            
-            if pid_process.returncode != 0 or not pid_stdout.strip():
-                print("⚠️ iSG进程未运行，无法获取--pid日志")
-                return []
             
-            pid = pid_stdout.decode('utf-8', errors='ignore').strip().split()[0]
+            if pid:
+                pid = str(pid)
+            else:
+                # 首先获取iSG进程的PID
+                pid_result = await self._capture_shell(f"pidof {package_name}")
+                
+                if pid_result.returncode != 0 or not pid_result.stdout.strip():
+                    print("⚠️ iSG进程未运行，无法获取--pid日志")
+                    return []
+                
+                pid = pid_result.stdout.strip().split()[0]
             if not pid.isdigit():
                 print(f"⚠️ 获取到无效PID: {pid}")
                 return []
                 
             print(f"📱 iSG进程PID: {pid}")
             
-            # 使用--pid参数获取该进程的错误日志
-            logcat_cmd = f"{adb_prefix} shell logcat --pid={pid} -d -v time '*:E'"
-            print(f"🔧 执行命令: {logcat_cmd}")
-            
-            logcat_process = await asyncio.create_subprocess_shell(
-                logcat_cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+            # 使用--pid参数在设备端过滤该进程的错误日志（含crash缓冲区中的崩溃堆栈）
+            records = await self.logcat_reader.read(
+                buffers=('main', 'crash'), pid=int(pid), specs=('*:E',), window=600
             )
-            logcat_stdout, logcat_stderr = await logcat_process.communicate()
             
-            if logcat_process.returncode != 0:
-                error_msg = logcat_stderr.decode('utf-8', errors='ignore').strip()
-                print(f"❌ logcat --pid命令失败: {error_msg}")
-                return []
-            
-            if logcat_stdout:
-                lines = logcat_stdout.decode('utf-8', errors='ignore').strip().split('\n')
-                error_logs = [f"[PID-ERROR] {line}" for line in lines if line.strip()]
-                if error_logs:
-                    print(f"✅ 通过--pid获取到 {len(error_logs)} 行错误日志")
+            if records:
+                error_logs = [f"[PID-ERROR] {record.format()}" for record in records]
+                print(f"✅ 通过--pid获取到 {len(error_logs)} 行错误日志")
                 return error_logs
             else:
                 print("ℹ️ iSG进程当前没有错误日志")
@@ -327,54 +631,70 @@ class CrashLogger:
             print(f"❌ 获取iSG进程错误日志失败: {e}")
             return [f"[PID-ERROR] 获取进程日志异常: {str(e)}"]
             
-    def _detect_crash_type(self, logs: List[str]) -> str:
+    def _detect_crash_type(self, logs: List[str], pid: Optional[int] = None) -> SignatureMatch:
         """检测崩溃类型
         
         Args:
             logs: 日志行列表
+            pid: 崩溃进程的PID
             
         Returns:
-            str: 崩溃类型
+            SignatureMatch: 识别结果，未命中任何规则时类型为 process_missing / unknown
         """
         if not logs:
-            return "process_missing"
-            
-        log_text = '\n'.join(logs).upper()
-        
-        # 按严重程度检测
-        if 'FATAL EXCEPTION' in log_text:
-            return 'fatal_exception'
-        elif 'ANR' in log_text or 'APPLICATION NOT RESPONDING' in log_text:
-            return 'anr'
-        elif 'OUTOFMEMORYERROR' in log_text:
-            return 'oom'
-        elif 'SIGNAL' in log_text and 'SIGSEGV' in log_text:
-            return 'native_crash'
-        elif 'SIGABRT' in log_text:
-            return 'abort'
-        elif 'SIGKILL' in log_text:
-            return 'killed'
-        else:
-            return 'unknown'
+            return SignatureMatch("process_missing", "error", 0)
             
-    async def _write_json_file(self, file_path: Path, data: Dict):
-        """异步写入JSON文件
+        return self.signatures.classify(logs, pid) or SignatureMatch("unknown", "error", 0)
+            
+    async def _write_compressed_report(self, file_path: Path, data: Dict) -> bool:
+        """gzip压缩写入JSON报告（先写临时文件再替换，失败时不留下不完整的报告）
         
         Args:
             file_path: 文件路径
             data: 要写入的数据
+            
+        Returns:
+            bool: 是否写入成功
         """
+        tmp_path = file_path.with_name(file_path.name + '.tmp')
         try:
-            async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-                await f.write(json.dumps(data, indent=2, ensure_ascii=False))
+            payload = gzip.compress(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+            async with aiofiles.open(tmp_path, 'wb') as f:
+                await f.write(payload)
+            os.replace(tmp_path, file_path)
+            return True
         except Exception as e:
             print(f"❌ 写入崩溃日志失败: {e}")
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            return False
+            
+    def read_report(self, fingerprint: str) -> Optional[Dict]:
+        """读取某个崩溃指纹的完整报告
+        
+        Args:
+            fingerprint: 崩溃指纹
+            
+        Returns:
+            Optional[Dict]: 报告内容，已被清理时返回None
+        """
+        report_file = self.crash_log_dir / f"sig_{fingerprint}.json.gz"
+        try:
+            with gzip.open(report_file, 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
             
     async def _cleanup_old_logs(self):
-        """清理旧日志文件"""
+        """清理旧日志文件（崩溃次数保存在索引中，不受影响）"""
         try:
-            # 获取所有崩溃日志文件
-            log_files = list(self.crash_log_dir.glob("crash_*.log"))
+            # 获取所有崩溃日志文件（包括旧格式的 crash_*.log）
+            log_files = [
+                path for pattern in ("sig_*.json.gz", "event_*.json.gz", "crash_*.log")
+                for path in self.crash_log_dir.glob(pattern)
+            ]
             
             # 按修改时间排序（最新的在前）
             log_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
@@ -403,39 +723,32 @@ class CrashLogger:
         except Exception as e:
             print(f"❌ 清理日志失败: {e}")
             
-    async def get_crash_statistics(self) -> Dict:
-        """获取崩溃统计信息
+    async def get_crash_statistics(self, days: int = 7) -> Dict:
+        """获取崩溃统计信息（查询崩溃索引，不扫描日志目录）
         
+        Args:
+            days: 按类型、按天统计的天数
+            
         Returns:
             Dict: 统计信息
         """
         try:
-            log_files = list(self.crash_log_dir.glob("crash_*.log"))
-            today = datetime.now().strftime("%Y%m%d")
-            
-            # 统计今日崩溃
-            today_crashes = [f for f in log_files if today in f.name]
+            index = self.crash_index
+            time_range = index.time_range()
+            mtbf = index.mtbf(days)
             
-            # 统计崩溃类型
-            crash_types = {}
-            for log_file in log_files[-10:]:  # 最近10次崩溃
-                try:
-                    async with aiofiles.open(log_file, 'r', encoding='utf-8') as f:
-                        content = await f.read()
-                        data = json.loads(content)
-                        crash_type = data.get('crash_type', 'unknown')
-                        crash_types[crash_type] = crash_types.get(crash_type, 0) + 1
-                except:
-                    continue
-                    
             return {
-                "total_crashes": len(log_files),
-                "today_crashes": len(today_crashes),
-                "recent_crash_types": crash_types,
-                "oldest_log": min([f.stat().st_mtime for f in log_files]) if log_files else 0,
-                "newest_log": max([f.stat().st_mtime for f in log_files]) if log_files else 0
+                "total_crashes": index.total(),
+                "today_crashes": index.count_day(),
+                "recent_crash_types": index.counts_by_type(days),
+                "daily_crashes": index.counts_by_day(days),
+                "mtbf_seconds": round(mtbf) if mtbf is not None else None,
+                "recent_crashes": index.recent(10),
+                "top_signatures": index.top_signatures(5),
+                "oldest_log": time_range[0] if time_range else 0,
+                "newest_log": time_range[1] if time_range else 0
             }
             
         except Exception as e:
             print(f"❌ 获取统计信息失败: {e}")
-            return {}
\ No newline at end of file
+            return {}
@@ -4,15 +4,26 @@
 
 负责监控Android应用的进程状态，包括:
 - 使用ADB检查进程运行状态
-- 获取进程详细信息（PID、内存使用、运行时长等）
+- 获取进程详细信息（PID、内存、CPU、线程数、真实运行时长等，一次ADB调用完成）
 - 检测应用崩溃情况
+- 可选的快速退出检测（设备端持续监视进程，退出时立即通知）
 """
 
 import asyncio
 import subprocess
+import time
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Optional
+
+from adb_shell import run_adb_shell_once
+from crash_signatures import SEVERITY_LEVELS, SignatureEngine, SignatureMatch
+from logcat_stream import LogcatReader
+from process_sampler import ProcessSampler
+
+
+# 快速检测模式下设备端循环输出的进程退出标记
+DEATH_MARKER = "__ISG_PROCESS_EXITED__"
 
 
 @dataclass
@@ -24,9 +35,14 @@ class AppStatus:
         crashed: 应用是否崩溃
         pid: 进程ID
         uptime: 运行时长（秒）
-        memory_mb: 内存使用量（MB）
+        memory_mb: 内存使用量（MB，RSS）
         timestamp: 状态检查时间戳
         crash_type: 崩溃类型（'logcat_crash'或'force_stop'）
+        cpu_percent: CPU占用率（%）
+        threads: 线程数
+        fd_count: 文件描述符数量
+        pss_mb: PSS内存（MB）
+        start_time: 进程启动时间
     """
     running: bool = False
     crashed: bool = False
@@ -35,6 +51,11 @@ class AppStatus:
     memory_mb: float = 0.0
     timestamp: datetime = datetime.now()
     crash_type: Optional[str] = None
+    cpu_percent: Optional[float] = None
+    threads: int = 0
+    fd_count: Optional[int] = None
+    pss_mb: Optional[float] = None
+    start_time: Optional[datetime] = None
 
 
 class ProcessMonitor:
@@ -56,21 +77,113 @@ class ProcessMonitor:
         self.start_time = None
         self.last_seen_running = False
         self.adb_manager = adb_manager
+        self.signatures = SignatureEngine.from_config(config)
+        self.logcat_reader = LogcatReader(self._shell)
+        self.min_crash_severity = SEVERITY_LEVELS.get(
+            (config.get('crash_signatures', {}) or {}).get('min_severity', 'error'), 2
+        )
+        self.sampler = ProcessSampler(self._shell)
         
-    def _get_adb_prefix(self) -> str:
-        """获取ADB命令前缀
+        # 快速退出检测
+        monitor_config = config.get('monitor', {})
+        self.fast_detection = monitor_config.get('fast_detection', False)
+        self.fast_detection_interval = monitor_config.get('fast_detection_interval', 0.2)
+        self.death_callback: Optional[Callable] = None
+        self.last_death_detected_at: Optional[float] = None
+        self._watcher_task: Optional[asyncio.Task] = None
+        self._watched_pid: Optional[int] = None
         
+    async def _shell(self, command: str) -> subprocess.CompletedProcess:
+        """在设备上执行shell命令
+        
+        优先复用ADB管理器的持久Shell通道
+        
+        Args:
+            command: 设备端shell命令
+            
         Returns:
-            str: ADB命令前缀
+            subprocess.CompletedProcess: 命令执行结果
         """
         if self.adb_manager:
-            return self.adb_manager.get_adb_prefix()
-        else:
-            return "adb"
+            return await self.adb_manager.shell(command)
+        return await run_adb_shell_once(command)
         
     async def start(self):
         """启动监控器"""
         print(f"👀 开始监控应用: {self.package_name}")
+        if self.fast_detection:
+            if self.adb_manager:
+                print(f"⚡ 快速退出检测已启用 (设备端轮询间隔 {self.fast_detection_interval}s)")
+            else:
+                print("⚠️ 快速退出检测需要ADB管理器，已忽略")
+                
+    async def stop(self):
+        """停止监控器"""
+        self._stop_watcher()
+        
+    def set_death_callback(self, callback: Callable):
+        """设置进程退出回调（仅快速检测模式下触发）
+        
+        Args:
+            callback: 回调函数 callback(pid)，可以是协程函数
+        """
+        self.death_callback = callback
+        
+    def _start_watcher(self, pid: int):
+        """开始监视指定进程，替换之前的监视任务"""
+        if not self.fast_detection or not self.adb_manager or self._watched_pid == pid:
+            return
+        self._stop_watcher()
+        self._watched_pid = pid
+        self._watcher_task = asyncio.ensure_future(self._watch_process(pid))
+        
+    def _stop_watcher(self):
+        """停止当前的进程监视任务"""
+        if self._watcher_task and not self._watcher_task.done():
+            self._watcher_task.cancel()
+        self._watcher_task = None
+        self._watched_pid = None
+        
+    async def _watch_process(self, pid: int):
+        """通过独立的流式通道在设备端监视进程，进程消失时立即回调
+        
+        通道意外断开（而非进程退出）时退避后重新监视
+        
+        Args:
+            pid: 进程ID
+        """
+        command = (
+            f"while [ -d /proc/{pid} ]; do sleep {self.fast_detection_interval}; done; "
+            f"echo {DEATH_MARKER}"
+        )
+        delay = 1
+        while self._watched_pid == pid:
+            try:
+                async for line in self.adb_manager.shell_stream(command):
+                    if line.strip() == DEATH_MARKER:
+                        self.last_death_detected_at = time.monotonic()
+                        print(f"⚡ 快速检测到应用进程退出 (PID: {pid})")
+                        self._watched_pid = None
+                        await self._notify_death(pid)
+                        return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ 进程监视通道异常: {e}")
+                
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+            
+    async def _notify_death(self, pid: int):
+        """调用进程退出回调"""
+        if not self.death_callback:
+            return
+        try:
+            result = self.death_callback(pid)
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            print(f"❌ 进程退出回调执行失败: {e}")
         
     async def check_app_status(self) -> AppStatus:
         """检查应用状态
@@ -80,9 +193,7 @@ class ProcessMonitor:
         """
         try:
             # 使用pidof检查Android应用进程
-            adb_prefix = self._get_adb_prefix()
-            cmd = f"{adb_prefix} shell pidof {self.package_name}"
-            result = await self._run_command(cmd)
+            result = await self._shell(f"pidof {self.package_name}")
             
             if result.returncode == 0 and result.stdout.strip():
                 # 应用正在运行
@@ -95,9 +206,11 @@ class ProcessMonitor:
                     # 进程ID无效
                     return AppStatus(running=False, crashed=False)
             else:
-                # 应用未运行，检查是否是意外停止
+                # 应用未运行，检查是否是意外停止（记录观察到退出的时间，用于判断是否由其他进程的重启引起）
+                observed_at = datetime.now()
                 crashed = False
                 crash_type = None
+                crashed_pid = None
                 
                 if self.last_seen_running:
                     # 应用之前在运行，现在停止了，认为是崩溃/意外停止
@@ -106,16 +219,20 @@ class ProcessMonitor:
                     print(f"💥 检测到应用意外停止 (PID: {self.last_pid})")
                     
                     # 检查是否有真正的崩溃日志
-                    logcat_crash = await self._check_recent_crash()
+                    crashed_pid = self.last_pid
+                    logcat_crash = await self._check_recent_crash(crashed_pid)
                     if logcat_crash:
                         crash_type = "logcat_crash"
+                        print(f"🔍 崩溃特征: {logcat_crash.rule} ({logcat_crash.severity})")
                         
                     # 重置状态
+                    self._stop_watcher()
                     self.last_pid = None
                     self.start_time = None
                     
                 self.last_seen_running = False
-                return AppStatus(running=False, crashed=crashed, crash_type=crash_type)
+                return AppStatus(running=False, crashed=crashed, pid=crashed_pid, crash_type=crash_type,
+                                 timestamp=observed_at)
                 
         except Exception as e:
             print(f"❌ 检查应用状态失败: {e}")
@@ -135,95 +252,74 @@ class ProcessMonitor:
             self.last_pid = pid
             self.start_time = datetime.now()
             print(f"🆕 检测到新的应用进程: PID {pid}")
+            if self.adb_manager:
+                self.adb_manager.logcat.track_pid(pid)
             
-        # 计算运行时间
-        uptime = int((datetime.now() - self.start_time).total_seconds()) if self.start_time else 0
-        
-        # 获取内存使用
-        memory_mb = await self._get_memory_usage(pid)
+        # 快速检测模式下持续监视当前进程
+        self._start_watcher(pid)
+            
+        # 一次设备端命令采集内存、CPU、线程等全部指标
+        try:
+            sample = await self.sampler.sample(pid)
+        except Exception as e:
+            print(f"❌ 采集进程指标失败: {e}")
+            sample = None
+            
+        if sample is None:
+            # 进程恰好在两次命令之间退出，或指标读取失败
+            uptime = int((datetime.now() - self.start_time).total_seconds()) if self.start_time else 0
+            return AppStatus(running=True, pid=pid, uptime=uptime, timestamp=datetime.now())
+            
+        # 运行时间以进程真实启动时间为准，不受守护进程重启影响
+        self.start_time = sample.start_time or self.start_time
         
         return AppStatus(
             running=True,
             pid=pid,
-            uptime=uptime,
-            memory_mb=memory_mb,
-            timestamp=datetime.now()
+            uptime=sample.uptime,
+            memory_mb=sample.rss_mb,
+            timestamp=datetime.now(),
+            cpu_percent=sample.cpu_percent,
+            threads=sample.threads,
+            fd_count=sample.fd_count,
+            pss_mb=sample.pss_mb,
+            start_time=sample.start_time
         )
         
-    async def _check_recent_crash(self) -> bool:
+    async def _check_recent_crash(self, pid: Optional[int] = None) -> Optional[SignatureMatch]:
         """检查最近是否有崩溃
         
-        Returns:
-            bool: 是否检测到崩溃
-        """
-        try:
-            # 检查最近2分钟的logcat
-            crash_patterns = [
-                f'{self.package_name}.*FATAL',
-                f'{self.package_name}.*CRASH',
-                f'{self.package_name}.*ANR'
-            ]
-            
-            for pattern in crash_patterns:
-                cmd = f"adb shell logcat -d -t 120 | grep -E '{pattern}'"
-                result = await self._run_command(cmd)
-                if result.returncode == 0 and result.stdout.strip():
-                    return True
-                    
-            return False
-        except Exception as e:
-            print(f"❌ 检查崩溃状态失败: {e}")
-            return False
-        
-    async def _get_memory_usage(self, pid: int) -> float:
-        """获取进程内存使用
+        logcat流可用时直接查询内存缓冲区，否则增量读取上次检查之后的警告及以上级别日志，
+        均由崩溃特征引擎一次遍历完成识别
         
         Args:
-            pid: 进程ID
+            pid: 已退出进程的PID
             
         Returns:
-            float: 内存使用量（MB）
+            Optional[SignatureMatch]: 达到崩溃严重程度的识别结果，未检测到崩溃时返回None
         """
         try:
-            adb_prefix = self._get_adb_prefix()
-            cmd = f"{adb_prefix} shell cat /proc/{pid}/status"
-            result = await self._run_command(cmd)
-            
-            if result.returncode == 0:
-                for line in result.stdout.split('\n'):
-                    if line.startswith('VmRSS:'):
-                        parts = line.split()
-                        if len(parts) >= 2 and parts[1].isdigit():
-                            kb = int(parts[1])
-                            return kb / 1024.0  # 转换为MB
-        except Exception as e:
-            print(f"❌ 获取内存使用失败: {e}")
-            
-        return 0.0
-        
-    async def _run_command(self, command: str) -> subprocess.CompletedProcess:
-        """执行shell命令
-        
-        Args:
-            command: 要执行的命令
-            
-        Returns:
-            subprocess.CompletedProcess: 命令执行结果
-        """
-        try:
-            process = await asyncio.create_subprocess_shell(
-                command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
-            
-            return subprocess.CompletedProcess(
-                command, 
-                process.returncode, 
-                stdout.decode('utf-8', errors='ignore'), 
-                stderr.decode('utf-8', errors='ignore')
+            logcat = self.adb_manager.logcat if self.adb_manager else None
+            if logcat and logcat.active:
+                since = logcat.recent_since(120)
+                match = self.signatures.classify(logcat.query(since=since), pid)
+                if match and SEVERITY_LEVELS.get(match.severity, 0) >= self.min_crash_severity:
+                    return match
+                # 进程退出后其日志仍保留在缓冲区中，致命级别日志即视为崩溃
+                if pid:
+                    fatal = logcat.query(pid=pid, min_priority='F', since=since, limit=5)
+                    if fatal:
+                        return SignatureMatch('fatal_log', 'critical', 0, [record.format() for record in fatal])
+                return None
+                
+            # 增量读取最近2分钟内尚未检查过的日志
+            records = await self.logcat_reader.read(
+                cursor='crash_check', buffers=('main', 'system', 'crash'), specs=('*:W',), window=120
             )
+            match = self.signatures.classify(records, pid)
+            if match and SEVERITY_LEVELS.get(match.severity, 0) >= self.min_crash_severity:
+                return match
+            return None
         except Exception as e:
-            print(f"❌ 执行命令失败 [{command}]: {e}")
-            return subprocess.CompletedProcess(command, 1, "", str(e))
\ No newline at end of file
+            print(f"❌ 检查崩溃状态失败: {e}")
+            return None
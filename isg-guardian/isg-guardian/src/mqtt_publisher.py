@@ -12,8 +12,10 @@ import json
 import asyncio
 import subprocess
 from datetime import datetime
-from pathlib import Path
 from typing import Optional
+
+from command_runner import NOT_FOUND_RETURNCODE, get_runner
+from crash_index import CrashIndex, crash_index_path
 # Import will be done locally to avoid circular imports
 
 
@@ -23,13 +25,15 @@ class MQTTPublisher:
     使用mosquitto_pub命令行工具发布消息到MQTT代理
     """
     
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, crash_index: Optional[CrashIndex] = None):
         """初始化MQTT发布器
         
         Args:
             config: 配置字典
+            crash_index: 共享的崩溃索引，为空时按配置自行打开
         """
         self.config = config
+        self.crash_index = crash_index or CrashIndex(crash_index_path(config))
         self.mqtt_config = config['mqtt']
         self.broker_host = self.mqtt_config['broker']
         self.broker_port = self.mqtt_config['port']
@@ -98,6 +102,53 @@ class MQTTPublisher:
             "device": device_info
         }
         
+        # CPU占用传感器
+        cpu_config = {
+            "name": "iSG App CPU",
+            "state_topic": f"{self.topic_prefix}/{self.device_id}/cpu/state",
+            "unit_of_measurement": "%",
+            "unique_id": f"{self.device_id}_cpu",
+            "icon": "mdi:cpu-64-bit",
+            "state_class": "measurement",
+            "device": device_info
+        }
+        
+        # PSS内存传感器
+        pss_config = {
+            "name": "iSG App PSS",
+            "state_topic": f"{self.topic_prefix}/{self.device_id}/pss/state",
+            "unit_of_measurement": "MB",
+            "unique_id": f"{self.device_id}_pss",
+            "icon": "mdi:memory",
+            "state_class": "measurement",
+            "device": device_info
+        }
+        
+        # 可用率传感器（24小时内应用处于运行状态的采样比例，属性中包含内存/CPU统计）
+        availability_config = {
+            "name": "iSG App Availability",
+            "state_topic": f"{self.topic_prefix}/{self.device_id}/statistics/state",
+            "value_template": "{{ value_json.availability_24h }}",
+            "json_attributes_topic": f"{self.topic_prefix}/{self.device_id}/statistics/state",
+            "unit_of_measurement": "%",
+            "unique_id": f"{self.device_id}_availability",
+            "icon": "mdi:percent-circle",
+            "state_class": "measurement",
+            "device": device_info
+        }
+        
+        # 内存泄漏预测传感器（预计多少小时后到达内存阈值）
+        leak_config = {
+            "name": "iSG Memory Leak ETA",
+            "state_topic": f"{self.topic_prefix}/{self.device_id}/leak/state",
+            "value_template": "{{ value_json.hours_to_threshold }}",
+            "json_attributes_topic": f"{self.topic_prefix}/{self.device_id}/leak/state",
+            "unit_of_measurement": "h",
+            "unique_id": f"{self.device_id}_leak_eta",
+            "icon": "mdi:chart-line-variant",
+            "device": device_info
+        }
+        
         # 重启按钮
         restart_button_config = {
             "name": "Restart iSG App",
@@ -137,16 +188,32 @@ class MQTTPublisher:
             "device": device_info
         }
         
+        # 检查间隔传感器（自适应调度器当前使用的间隔）
+        check_interval_config = {
+            "name": "iSG Check Interval",
+            "state_topic": f"{self.topic_prefix}/{self.device_id}/check_interval/state",
+            "unit_of_measurement": "s",
+            "unique_id": f"{self.device_id}_check_interval",
+            "icon": "mdi:timer-sync-outline",
+            "state_class": "measurement",
+            "device": device_info
+        }
+        
         # 发布所有发现配置
         configs = [
             ("binary_sensor", "app_running", app_status_config),
             ("sensor", "crashes_today", crashes_today_config),
             ("sensor", "uptime", uptime_config),
             ("sensor", "memory", memory_config),
+            ("sensor", "cpu", cpu_config),
+            ("sensor", "pss", pss_config),
+            ("sensor", "availability", availability_config),
+            ("sensor", "leak", leak_config),
             ("button", "restart", restart_button_config),
             ("sensor", "guardian_status", guardian_status_config),
             ("binary_sensor", "adb_connection", adb_connection_config),
-            ("sensor", "device_info", device_info_config)
+            ("sensor", "device_info", device_info_config),
+            ("sensor", "check_interval", check_interval_config)
         ]
         
         success_count = 0
@@ -166,24 +233,101 @@ class MQTTPublisher:
             status: 应用状态对象
         """
         try:
-            # 发布应用运行状态
-            await self._publish("app_status/state", "ON" if status.running else "OFF")
-            
-            # 发布今日崩溃次数
             crashes_today = await self._get_crashes_today()
-            await self._publish("crashes_today/state", str(crashes_today))
             
-            # 发布运行时间
-            await self._publish("uptime/state", str(status.uptime))
+            # 采样不可用的指标不发布，保留上一次的值
+            optional = []
+            if status.cpu_percent is not None:
+                optional.append(self._publish("cpu/state", f"{status.cpu_percent:.1f}"))
+            if status.pss_mb is not None:
+                optional.append(self._publish("pss/state", f"{status.pss_mb:.1f}"))
+            
+            # 各主题互不依赖，并发发布（并发数受命令执行器限制）
+            await asyncio.gather(
+                *optional,
+                # 应用运行状态
+                self._publish("app_status/state", "ON" if status.running else "OFF"),
+                # 今日崩溃次数
+                self._publish("crashes_today/state", str(crashes_today)),
+                # 运行时间
+                self._publish("uptime/state", str(status.uptime)),
+                # 内存使用
+                self._publish("memory/state", f"{status.memory_mb:.1f}"),
+                # 守护进程状态时间戳
+                self._publish("guardian_status/state", "online")
+            )
             
-            # 发布内存使用
-            await self._publish("memory/state", f"{status.memory_mb:.1f}")
+        except Exception as e:
+            # 静默处理MQTT错误，不影响核心监控功能
+            pass
             
-            # 更新守护进程状态时间戳
+    async def publish_heartbeat(self):
+        """仅发布守护进程在线心跳（ADB不可用、无法获取应用状态时使用）"""
+        try:
             await self._publish("guardian_status/state", "online")
+        except Exception as e:
+            # 静默处理MQTT错误
+            pass
             
+    async def publish_check_interval(self, interval: float):
+        """发布当前检查间隔
+        
+        Args:
+            interval: 检查间隔（秒）
+        """
+        try:
+            await self._publish("check_interval/state", f"{interval:.0f}", retain=True)
         except Exception as e:
-            # 静默处理MQTT错误，不影响核心监控功能
+            # 静默处理MQTT错误
+            pass
+            
+    async def publish_statistics(self, hourly: dict, daily: dict):
+        """发布状态历史统计
+        
+        Args:
+            hourly: 最近1小时的汇总统计
+            daily: 最近24小时的汇总统计
+        """
+        try:
+            statistics = {
+                "timestamp": datetime.now().isoformat(),
+                "availability_24h": daily.get('availability'),
+                "availability_1h": hourly.get('availability'),
+                "memory_avg_1h": hourly.get('memory_avg'),
+                "memory_max_1h": hourly.get('memory_max'),
+                "memory_max_24h": daily.get('memory_max'),
+                "cpu_avg_1h": hourly.get('cpu_avg'),
+                "cpu_max_24h": daily.get('cpu_max')
+            }
+            await self._publish("statistics/state", json.dumps(statistics), retain=True)
+        except Exception as e:
+            # 静默处理MQTT错误
+            pass
+            
+    async def publish_leak_estimate(self, estimate):
+        """发布内存泄漏趋势估算
+        
+        Args:
+            estimate: 泄漏估算结果（LeakEstimate）
+        """
+        try:
+            hours = None
+            if estimate.leaking and estimate.seconds_to_threshold is not None:
+                hours = round(estimate.seconds_to_threshold / 3600, 1)
+            payload = {
+                "timestamp": datetime.now().isoformat(),
+                "hours_to_threshold": hours,
+                "leaking": estimate.leaking,
+                "slope_mb_per_hour": estimate.slope_mb_per_hour,
+                "r_squared": estimate.r_squared,
+                "current_mb": estimate.current_mb,
+                "threshold_mb": estimate.threshold_mb,
+                "predicted_at": estimate.predicted_at.isoformat() if estimate.predicted_at else None,
+                "pid": estimate.pid
+            }
+            await self._publish("leak/state", json.dumps(payload), retain=True)
+        except Exception as e:
+            # 静默处理MQTT错误
             pass
             
     async def publish_crash_alert(self, crash_type: str, crash_reason: str):
@@ -318,25 +462,20 @@ class MQTTPublisher:
                 cmd.append("-r")
                 
             # 异步执行命令 (静默执行，避免输出干扰)
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.DEVNULL,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            _, stderr = await process.communicate()
+            result = await get_runner().run(cmd, timeout=10, kind="mosquitto_pub")
             
+            if result.returncode == NOT_FOUND_RETURNCODE:
+                print("❌ mosquitto_pub 命令未找到，请安装: pkg install mosquitto")
+                return False
+                
             # 只在错误时输出
-            if process.returncode != 0:
-                error_msg = stderr.decode('utf-8', errors='ignore').strip()
+            if result.returncode != 0:
+                error_msg = result.stderr.strip()
                 print(f"❌ MQTT发布失败 [{topic}]: {error_msg}")
                 return False
                 
             return True
                 
-        except FileNotFoundError:
-            print("❌ mosquitto_pub 命令未找到，请安装: pkg install mosquitto")
-            return False
         except Exception as e:
             print(f"❌ MQTT发布异常: {e}")
             return False
@@ -348,14 +487,7 @@ class MQTTPublisher:
             int: 今日崩溃次数
         """
         try:
-            today = datetime.now().strftime("%Y%m%d")
-            crash_log_dir = Path(self.config['logging']['crash_log_dir'])
-            
-            if not crash_log_dir.exists():
-                return 0
-                
-            crash_files = list(crash_log_dir.glob(f"crash_{today}_*.log"))
-            return len(crash_files)
+            return self.crash_index.count_day()
             
         except Exception as e:
             print(f"❌ 获取崩溃统计失败: {e}")
@@ -17,6 +17,8 @@ from datetime import datetime
 from typing import Optional, Callable
 from pathlib import Path
 
+from command_runner import TIMEOUT_RETURNCODE, get_runner
+
 
 class MQTTSubscriber:
     """MQTT命令订阅器
@@ -209,7 +211,6 @@ class MQTTSubscriber:
             test_topic = f"{self.topic_prefix}/{self.device_id}/test_sub"
             
             cmd = [
-                "timeout", "5",  # 5秒超时
                 "mosquitto_sub",
                 "-h", self.broker_host,
                 "-p", str(self.broker_port),
@@ -223,19 +224,9 @@ class MQTTSubscriber:
                 if self.password:
                     cmd.extend(["-P", self.password])
                     
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            # 等待进程结束，但不超过6秒
-            try:
-                await asyncio.wait_for(process.wait(), timeout=6.0)
-                return True
-            except asyncio.TimeoutError:
-                process.terminate()
-                return False
+            # 5秒内收到消息或连接保持到超时都说明代理可达；连接失败会立即返回非0
+            result = await get_runner().run(cmd, timeout=5, kind="mosquitto_sub test", expect_timeout=True)
+            return result.returncode in (0, TIMEOUT_RETURNCODE)
                 
         except Exception as e:
             print(f"❌ MQTT订阅连接测试失败: {e}")
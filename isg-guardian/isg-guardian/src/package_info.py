@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+应用包信息模块
+
+一次 `dumpsys package` 解析出应用的结构化信息并缓存，包括:
+- 版本名、版本号、首次安装和最近更新时间、安装路径
+- 启用状态和安装状态
+- 通过检查安装路径的修改时间发现应用升级，ADB重连后重新加载
+"""
+
+import subprocess
+import time
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Optional
+
+
+# `User 0: ... enabled=N` 的取值含义（PackageManager.COMPONENT_ENABLED_STATE_*）
+ENABLED_STATES = {
+    '0': 'default',
+    '1': 'enabled',
+    '2': 'disabled',
+    '3': 'disabled_user',
+    '4': 'disabled_until_used'
+}
+
+
+@dataclass
+class PackageInfo:
+    """应用包信息
+
+    Attributes:
+        package_name: 包名
+        version_name: 版本名
+        version_code: 版本号
+        first_install_time: 首次安装时间
+        last_update_time: 最近更新时间
+        code_path: 安装路径
+        installed: 是否已为用户0安装
+        enabled_state: 启用状态（default/enabled/disabled/...）
+        code_mtime: 安装路径的修改时间，用于判断应用是否被更新
+    """
+    package_name: str
+    version_name: str = "Unknown"
+    version_code: Optional[int] = None
+    first_install_time: str = "Unknown"
+    last_update_time: str = "Unknown"
+    code_path: Optional[str] = None
+    installed: bool = True
+    enabled_state: str = 'default'
+    code_mtime: Optional[str] = None
+
+    @property
+    def enabled(self) -> bool:
+        """应用是否处于启用状态"""
+        return self.enabled_state in ('default', 'enabled')
+
+
+def parse_dumpsys_package(output: str, package_name: str) -> Optional[PackageInfo]:
+    """解析 `dumpsys package <pkg>` 输出中该包的信息段
+
+    只解析第一个 `Package [<pkg>]` 段（之后可能出现的 Hidden system packages 段是系统预装的旧版本）
+
+    Args:
+        output: 命令输出
+        package_name: 包名
+
+    Returns:
+        Optional[PackageInfo]: 包信息，未安装（无对应段）时返回None
+    """
+    header = f"Package [{package_name}]"
+    lines = output.splitlines()
+    start = next((i for i, line in enumerate(lines) if line.strip().startswith(header)), None)
+    if start is None:
+        return None
+
+    info = PackageInfo(package_name=package_name)
+    indent = len(lines[start]) - len(lines[start].lstrip())
+    for line in lines[start + 1:]:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if len(line) - len(line.lstrip()) <= indent:
+            # 下一个包或下一个顶层段
+            break
+
+        if stripped.startswith('versionCode='):
+            code = stripped.split()[0].split('=', 1)[1]
+            if code.isdigit():
+                info.version_code = int(code)
+        elif stripped.startswith('versionName='):
+            info.version_name = stripped.split('=', 1)[1]
+        elif stripped.startswith('firstInstallTime='):
+            info.first_install_time = stripped.split('=', 1)[1]
+        elif stripped.startswith('lastUpdateTime='):
+            info.last_update_time = stripped.split('=', 1)[1]
+        elif stripped.startswith('codePath='):
+            info.code_path = stripped.split('=', 1)[1]
+        elif stripped.startswith('User 0:'):
+            for field in stripped.split():
+                key, _, value = field.partition('=')
+                if key == 'installed':
+                    info.installed = value == 'true'
+                elif key == 'enabled':
+                    info.enabled_state = ENABLED_STATES.get(value, value)
+    return info
+
+
+class PackageInfoCache:
+    """应用包信息缓存
+
+    首次访问执行一次 `dumpsys package`；之后每隔 check_interval 秒用 `stat` 检查安装路径，
+    路径消失或修改时间变化（应用被升级/重装）时重新加载，期间的访问不产生任何ADB调用。
+    `stat` 失败（无法取得修改时间）时每次检查都重新执行 `dumpsys package`
+    """
+
+    def __init__(self, shell: Callable[[str], Awaitable[subprocess.CompletedProcess]],
+                 package_name: str, check_interval: float = 60):
+        """初始化包信息缓存
+
+        Args:
+            shell: 执行设备端命令的协程函数
+            package_name: 包名
+            check_interval: 检查应用是否被更新的最小间隔（秒），0表示每次访问都检查
+        """
+        self.shell = shell
+        self.package_name = package_name
+        self.check_interval = check_interval
+        self.info: Optional[PackageInfo] = None
+        self.generation: Optional[int] = None
+        self.checked_at: Optional[float] = None
+        self.hits = 0
+        self.checks = 0
+        self.loads = 0
+
+    def invalidate(self):
+        """使缓存失效，下次访问时重新加载"""
+        self.info = None
+        self.checked_at = None
+
+    async def get(self, generation: int = 0, refresh: bool = False) -> Optional[PackageInfo]:
+        """获取包信息
+
+        Args:
+            generation: ADB连接代数，与缓存时不同（发生过重连）时重新加载
+            refresh: 是否强制重新加载
+
+        Returns:
+            Optional[PackageInfo]: 包信息，未安装或获取失败时返回None
+        """
+        if refresh or generation != self.generation:
+            self.invalidate()
+            self.generation = generation
+
+        if self.info is not None:
+            if self.checked_at is not None and time.monotonic() - self.checked_at < self.check_interval:
+                self.hits += 1
+                return self.info
+            self.checks += 1
+            code_mtime = await self._code_mtime(self.info.code_path)
+            if code_mtime is not None and code_mtime == self.info.code_mtime:
+                self.checked_at = time.monotonic()
+                return self.info
+            # 修改时间变化，或无法获取（无法判断是否更新）时重新加载，以dumpsys中的更新时间为准
+            previous = self.info
+            info = await self._load()
+            if info and (info.last_update_time, info.version_code) != (previous.last_update_time,
+                                                                      previous.version_code):
+                print("📦 检测到应用已更新，已重新加载包信息")
+            return info
+
+        return await self._load()
+
+    async def _load(self) -> Optional[PackageInfo]:
+        """执行一次 `dumpsys package` 并缓存结果（未安装时不缓存）"""
+        self.loads += 1
+        self.info = None
+        result = await self.shell(f"dumpsys package {self.package_name}")
+        if result.returncode != 0:
+            print(f"❌ 获取应用包信息失败: {result.stderr.strip() or result.returncode}")
+            return None
+
+        info = parse_dumpsys_package(result.stdout, self.package_name)
+        if info is None:
+            return None
+        info.code_mtime = await self._code_mtime(info.code_path)
+        self.info = info
+        self.checked_at = time.monotonic()
+        return info
+
+    async def _code_mtime(self, code_path: Optional[str]) -> Optional[str]:
+        """获取安装路径的修改时间，路径不存在时返回None"""
+        if not code_path:
+            return None
+        result = await self.shell(f"stat -c %Y {code_path} 2>/dev/null")
+        mtime = result.stdout.strip()
+        return mtime if result.returncode == 0 and mtime.isdigit() else None
+
+    def get_stats(self) -> dict:
+        """获取缓存统计
+
+        Returns:
+            dict: 命中、检查、加载次数和缓存的包信息
+        """
+        return {
+            'hits': self.hits,
+            'checks': self.checks,
+            'loads': self.loads,
+            'info': asdict(self.info) if self.info else None
+        }
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+进程指标采样模块
+
+一次设备端命令读取目标进程的全部 /proc 指标，包括:
+- /proc/<pid>/stat: CPU时间、线程数、进程启动时刻
+- /proc/<pid>/statm、status: 常驻内存
+- /proc/<pid>/smaps_rollup: PSS（需要足够权限，读取失败时为空）
+- /proc/<pid>/fd: 打开的文件描述符数量（同上）
+- /proc/uptime: 设备开机时长，用于计算CPU占用率和进程真实启动时间
+"""
+
+import subprocess
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+
+# Android内核的时钟频率，getconf不可用时使用
+DEFAULT_CLK_TCK = 100
+PAGE_SIZE_KB = 4
+
+
+@dataclass
+class ProcessSample:
+    """单次进程采样结果
+
+    Attributes:
+        pid: 进程ID
+        rss_mb: 常驻内存（MB）
+        pss_mb: 按比例分摊的内存（MB），无权限读取时为None
+        cpu_percent: 自上次采样以来的CPU占用率（%，多核可超过100），首次采样为None
+        threads: 线程数
+        fd_count: 文件描述符数量，无权限读取时为None
+        uptime: 进程实际运行时长（秒）
+        start_time: 进程启动时间（按主机时钟换算）
+    """
+    pid: int
+    rss_mb: float = 0.0
+    pss_mb: Optional[float] = None
+    cpu_percent: Optional[float] = None
+    threads: int = 0
+    fd_count: Optional[int] = None
+    uptime: int = 0
+    start_time: Optional[datetime] = None
+
+
+def build_sample_command(pid: int) -> str:
+    """构建一次读取全部指标的设备端命令
+
+    各段以 `@<名称>` 行分隔；进程不存在时不输出任何内容。
+    不使用exit，避免结束持久Shell通道。
+
+    Args:
+        pid: 进程ID
+
+    Returns:
+        str: 设备端shell命令
+    """
+    proc = f"/proc/{pid}"
+    return (
+        f"if [ -d {proc} ]; then "
+        f"echo @stat; cat {proc}/stat; "
+        f"echo @statm; cat {proc}/statm; "
+        f"echo @status; cat {proc}/status; "
+        f"echo @smaps; cat {proc}/smaps_rollup 2>/dev/null; "
+        f"echo @fd; ls {proc}/fd 2>/dev/null | wc -l; "
+        f"echo @uptime; cat /proc/uptime; "
+        f"echo @clk; getconf CLK_TCK 2>/dev/null; "
+        f"fi"
+    )
+
+
+def split_sections(output: str) -> Dict[str, str]:
+    """按 `@<名称>` 分隔行拆分命令输出
+
+    Args:
+        output: 命令输出
+
+    Returns:
+        Dict[str, str]: 段名 -> 段内容
+    """
+    sections: Dict[str, list] = {}
+    current = None
+    for line in output.splitlines():
+        if line.startswith('@') and line[1:].isalpha():
+            current = line[1:]
+            sections[current] = []
+        elif current is not None:
+            sections[current].append(line)
+    return {name: '\n'.join(lines).strip() for name, lines in sections.items()}
+
+
+def parse_kb_field(text: str, field: str) -> Optional[int]:
+    """从 `Name:   1234 kB` 格式的文本中提取数值
+
+    Args:
+        text: status / smaps_rollup 内容
+        field: 字段名，如 'VmRSS'
+
+    Returns:
+        Optional[int]: 数值（kB），不存在时返回None
+    """
+    prefix = f"{field}:"
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                return int(parts[1])
+    return None
+
+
+class ProcessSampler:
+    """进程指标采样器
+
+    保存上一次采样的CPU时间，用于计算两次采样之间的CPU占用率
+    """
+
+    def __init__(self, shell: Callable[[str], Awaitable[subprocess.CompletedProcess]]):
+        """初始化采样器
+
+        Args:
+            shell: 执行设备端命令的协程函数
+        """
+        self.shell = shell
+        self._last_pid: Optional[int] = None
+        self._last_jiffies = 0
+        self._last_uptime = 0.0
+
+    async def sample(self, pid: int) -> Optional[ProcessSample]:
+        """采样指定进程
+
+        Args:
+            pid: 进程ID
+
+        Returns:
+            Optional[ProcessSample]: 采样结果，进程不存在或命令失败时返回None
+        """
+        result = await self.shell(build_sample_command(pid))
+        if result.returncode != 0 or not result.stdout.strip():
+            return None
+        return self.parse(pid, result.stdout)
+
+    def parse(self, pid: int, output: str) -> Optional[ProcessSample]:
+        """解析采样命令输出
+
+        Args:
+            pid: 进程ID
+            output: 命令输出
+
+        Returns:
+            Optional[ProcessSample]: 采样结果，stat无法解析时返回None
+        """
+        sections = split_sections(output)
+
+        # comm字段可能包含空格和括号，从最后一个 ')' 之后开始按空格拆分
+        # 拆分后下标0对应第3个字段(state)
+        stat = sections.get('stat', '')
+        fields = stat.rpartition(')')[2].split()
+        if len(fields) < 20:
+            return None
+        utime, stime = int(fields[11]), int(fields[12])
+        threads = int(fields[17])
+        starttime = int(fields[19])
+
+        uptime_text = sections.get('uptime', '').split()
+        device_uptime = float(uptime_text[0]) if uptime_text else 0.0
+        clk = sections.get('clk', '')
+        hz = int(clk) if clk.isdigit() and int(clk) > 0 else DEFAULT_CLK_TCK
+
+        sample = ProcessSample(pid=pid, threads=threads)
+
+        # 常驻内存优先取status中的VmRSS，缺失时用statm的页数换算
+        rss_kb = parse_kb_field(sections.get('status', ''), 'VmRSS')
+        if rss_kb is None:
+            statm = sections.get('statm', '').split()
+            if len(statm) >= 2 and statm[1].isdigit():
+                rss_kb = int(statm[1]) * PAGE_SIZE_KB
+        sample.rss_mb = (rss_kb or 0) / 1024.0
+
+        pss_kb = parse_kb_field(sections.get('smaps', ''), 'Pss')
+        if pss_kb is not None:
+            sample.pss_mb = pss_kb / 1024.0
+
+        fd_text = sections.get('fd', '')
+        if fd_text.isdigit() and int(fd_text) > 0:
+            sample.fd_count = int(fd_text)
+
+        # 进程真实启动时间: 开机时长 - 进程启动时刻(开机后的时钟滴答数)
+        if device_uptime:
+            age = max(device_uptime - starttime / hz, 0.0)
+            sample.uptime = int(age)
+            sample.start_time = datetime.now() - timedelta(seconds=age)
+
+        # CPU占用率: 两次采样之间进程CPU时间增量 / 设备时间增量
+        jiffies = utime + stime
+        if pid == self._last_pid and device_uptime > self._last_uptime:
+            elapsed = device_uptime - self._last_uptime
+            sample.cpu_percent = round((jiffies - self._last_jiffies) / hz / elapsed * 100, 1)
+        self._last_pid = pid
+        self._last_jiffies = jiffies
+        self._last_uptime = device_uptime
+
+        return sample
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+重启策略模块
+
+决定是否允许一次自动重启，包括:
+- 滑动窗口限流：窗口内最多重启N次，超出后冷却
+- 指数退避：连续重启的最小间隔逐次翻倍，稳定一段时间后复位
+- 令牌桶：按速率补充重启额度，允许短时突发
+- 策略可组合，状态原子写入数据目录，守护进程重启后继续生效
+"""
+
+import json
+import os
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, List, Optional
+
+
+@dataclass
+class PolicyDecision:
+    """一次重启判定结果
+
+    Attributes:
+        allowed: 是否允许重启
+        policy: 做出判定的策略名称
+        reason: 判定原因
+        retry_after: 拒绝时距离下次允许重启的秒数
+        timestamp: 判定时间
+    """
+    allowed: bool
+    policy: str
+    reason: str
+    retry_after: int = 0
+    timestamp: str = ""
+
+
+class RestartPolicy:
+    """重启策略基类"""
+
+    name = "base"
+
+    def check(self, now: float) -> PolicyDecision:
+        """判断当前是否允许重启（只读，不修改策略状态）
+
+        Args:
+            now: 当前时间戳
+
+        Returns:
+            PolicyDecision: 判定结果
+        """
+        return PolicyDecision(True, self.name, "允许")
+
+    def settle(self, now: float, decision: PolicyDecision):
+        """所有策略的判定汇总后更新状态（如进入冷却期）
+
+        Args:
+            now: 判定时间戳
+            decision: 汇总后的判定结果
+        """
+
+    def record(self, now: float):
+        """记录一次已执行的重启
+
+        Args:
+            now: 重启时间戳
+        """
+
+    def reset(self):
+        """清除策略状态"""
+
+    def to_state(self) -> dict:
+        """导出需要持久化的状态"""
+        return {}
+
+    def load_state(self, state: dict):
+        """从持久化状态恢复"""
+
+
+class SlidingWindowPolicy(RestartPolicy):
+    """滑动窗口限流：窗口内重启次数达到上限后进入冷却期，冷却结束后重新计数"""
+
+    name = "sliding_window"
+
+    def __init__(self, max_restarts: int, window: float, cooldown: float):
+        """初始化策略
+
+        Args:
+            max_restarts: 窗口内最多重启次数
+            window: 窗口长度（秒）
+            cooldown: 冷却时长（秒）
+        """
+        self.max_restarts = max_restarts
+        self.window = window
+        self.cooldown = cooldown
+        self.restarts: Deque[float] = deque()
+        self.cooldown_until = 0.0
+
+    def _prune(self, now: float):
+        if self.cooldown_until and now >= self.cooldown_until:
+            # 冷却结束后重新开始计数
+            self.restarts.clear()
+            self.cooldown_until = 0.0
+        while self.restarts and now - self.restarts[0] > self.window:
+            self.restarts.popleft()
+
+    def _window_count(self, now: float) -> int:
+        """窗口内的重启次数（不修改状态）"""
+        if self.cooldown_until and now >= self.cooldown_until:
+            return 0
+        return sum(1 for restart in self.restarts if now - restart <= self.window)
+
+    def check(self, now: float) -> PolicyDecision:
+        if now < self.cooldown_until:
+            remaining = int(self.cooldown_until - now)
+            return PolicyDecision(False, self.name, f"冷却中，还需等待 {remaining} 秒", remaining)
+        count = self._window_count(now)
+        if count >= self.max_restarts:
+            return PolicyDecision(
+                False, self.name,
+                f"{int(self.window)} 秒内已重启 {count} 次，进入冷却期 {int(self.cooldown)} 秒",
+                int(self.cooldown)
+            )
+        return PolicyDecision(True, self.name, f"窗口内第 {count + 1}/{self.max_restarts} 次重启")
+
+    def settle(self, now: float, decision: PolicyDecision):
+        if decision.allowed or now < self.cooldown_until:
+            return
+        self._prune(now)
+        if len(self.restarts) >= self.max_restarts:
+            self.cooldown_until = now + self.cooldown
+
+    def record(self, now: float):
+        self._prune(now)
+        self.restarts.append(now)
+
+    def reset(self):
+        self.restarts.clear()
+        self.cooldown_until = 0.0
+
+    def to_state(self) -> dict:
+        return {'restarts': list(self.restarts), 'cooldown_until': self.cooldown_until}
+
+    def load_state(self, state: dict):
+        self.restarts = deque(state.get('restarts', []))
+        self.cooldown_until = state.get('cooldown_until', 0.0)
+
+
+class ExponentialBackoffPolicy(RestartPolicy):
+    """指数退避：第n次连续重启至少间隔 base * 2^(n-1) 秒"""
+
+    name = "exponential_backoff"
+
+    def __init__(self, base_delay: float, max_delay: float, reset_after: float):
+        """初始化策略
+
+        Args:
+            base_delay: 首次退避时长（秒）
+            max_delay: 最大退避时长（秒）
+            reset_after: 距上次重启超过该时长视为恢复稳定，连续次数复位（秒）
+        """
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.reset_after = reset_after
+        self.consecutive = 0
+        self.last_restart = 0.0
+
+    def _consecutive(self, now: float) -> int:
+        """当前的连续重启次数，距上次重启超过 reset_after 时视为0"""
+        if self.consecutive and now - self.last_restart > self.reset_after:
+            return 0
+        return self.consecutive
+
+    def _delay(self, consecutive: int) -> float:
+        if not consecutive:
+            return 0.0
+        return min(self.base_delay * (2 ** (consecutive - 1)), self.max_delay)
+
+    def check(self, now: float) -> PolicyDecision:
+        consecutive = self._consecutive(now)
+        delay = self._delay(consecutive)
+        allowed_at = self.last_restart + delay
+        if now < allowed_at:
+            remaining = int(allowed_at - now) + 1
+            return PolicyDecision(
+                False, self.name,
+                f"连续第 {consecutive + 1} 次重启需间隔 {int(delay)} 秒，还需等待 {remaining} 秒",
+                remaining
+            )
+        return PolicyDecision(True, self.name, f"连续第 {consecutive + 1} 次重启")
+
+    def record(self, now: float):
+        self.consecutive = self._consecutive(now) + 1
+        self.last_restart = now
+
+    def reset(self):
+        self.consecutive = 0
+        self.last_restart = 0.0
+
+    def to_state(self) -> dict:
+        return {'consecutive': self.consecutive, 'last_restart': self.last_restart}
+
+    def load_state(self, state: dict):
+        self.consecutive = state.get('consecutive', 0)
+        self.last_restart = state.get('last_restart', 0.0)
+
+
+class TokenBucketPolicy(RestartPolicy):
+    """令牌桶：每次重启消耗一个令牌，令牌按固定速率补充"""
+
+    name = "token_bucket"
+
+    def __init__(self, capacity: float, refill_per_hour: float):
+        """初始化策略
+
+        Args:
+            capacity: 桶容量（允许的突发重启次数）
+            refill_per_hour: 每小时补充的令牌数
+        """
+        self.capacity = capacity
+        self.refill_rate = refill_per_hour / 3600.0
+        self.tokens = capacity
+        self.updated = time.time()
+
+    def _available(self, now: float) -> float:
+        """按当前时间补充后的令牌数（不修改状态）"""
+        if now > self.updated:
+            return min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        return self.tokens
+
+    def _refill(self, now: float):
+        self.tokens = self._available(now)
+        self.updated = now
+
+    def check(self, now: float) -> PolicyDecision:
+        tokens = self._available(now)
+        if tokens < 1:
+            remaining = int((1 - tokens) / self.refill_rate) + 1 if self.refill_rate else 3600
+            return PolicyDecision(False, self.name, f"重启额度已用完，{remaining} 秒后恢复", remaining)
+        return PolicyDecision(True, self.name, f"剩余重启额度 {tokens:.1f}")
+
+    def record(self, now: float):
+        self._refill(now)
+        self.tokens = max(self.tokens - 1, 0.0)
+
+    def reset(self):
+        self.tokens = self.capacity
+        self.updated = time.time()
+
+    def to_state(self) -> dict:
+        return {'tokens': self.tokens, 'updated': self.updated}
+
+    def load_state(self, state: dict):
+        self.tokens = min(state.get('tokens', self.capacity), self.capacity)
+        self.updated = state.get('updated', time.time())
+
+
+class RestartPolicyEngine:
+    """重启策略引擎
+
+    询问所有已配置的策略，全部允许才可重启。各策略的判定是只读的，汇总出最终结果后
+    才统一更新状态（如进入冷却期），状态变化后持久化。
+    """
+
+    def __init__(self, config: dict, state_file: Optional[Path] = None):
+        """初始化策略引擎
+
+        Args:
+            config: 配置字典，读取 `monitor` 段的 max_restarts/cooldown_time 和 restart_policy
+            state_file: 状态持久化文件路径，为空时只保存在内存中
+        """
+        monitor_config = config.get('monitor', {})
+        policy_config = monitor_config.get('restart_policy', {}) or {}
+        self.state_file = state_file
+        self.policies: List[RestartPolicy] = []
+
+        types = policy_config.get('type', 'sliding_window')
+        for policy_type in ([types] if isinstance(types, str) else types):
+            if policy_type == 'sliding_window':
+                self.policies.append(SlidingWindowPolicy(
+                    monitor_config.get('max_restarts', 3),
+                    policy_config.get('window', 3600),
+                    monitor_config.get('cooldown_time', 300)
+                ))
+            elif policy_type == 'exponential_backoff':
+                self.policies.append(ExponentialBackoffPolicy(
+                    policy_config.get('backoff_base', 10),
+                    policy_config.get('backoff_max', 600),
+                    policy_config.get('backoff_reset', 1800)
+                ))
+            elif policy_type == 'token_bucket':
+                self.policies.append(TokenBucketPolicy(
+                    policy_config.get('bucket_capacity', 3),
+                    policy_config.get('bucket_refill_per_hour', 2)
+                ))
+            else:
+                print(f"⚠️ 未知的重启策略: {policy_type}")
+
+        self.total_restarts = 0
+        self.last_restart: Optional[float] = None
+        self.last_decision: Optional[PolicyDecision] = None
+        self.decisions: Deque[PolicyDecision] = deque(maxlen=20)
+
+    def check(self) -> PolicyDecision:
+        """判断当前是否允许重启
+
+        Returns:
+            PolicyDecision: 第一个拒绝的策略的判定，全部允许时为汇总的允许判定
+        """
+        now = time.time()
+        results = [policy.check(now) for policy in self.policies]
+        decision = next((result for result in results if not result.allowed), None)
+        if decision is None:
+            decision = PolicyDecision(True, '+'.join(p.name for p in self.policies) or 'none',
+                                      '; '.join(result.reason for result in results) or "允许")
+        decision.timestamp = datetime.fromtimestamp(now).isoformat()
+
+        for policy in self.policies:
+            policy.settle(now, decision)
+        self.last_decision = decision
+        self.decisions.append(decision)
+        if not decision.allowed:
+            # 冷却期起点等状态可能已更新
+            self.save()
+        return decision
+
+    def record_restart(self):
+        """记录一次已执行的重启（无论成功与否都计入，防止重启风暴）"""
+        now = time.time()
+        for policy in self.policies:
+            policy.record(now)
+        self.total_restarts += 1
+        self.last_restart = now
+        self.save()
+
+    def reset(self):
+        """清除全部策略状态和重启计数"""
+        for policy in self.policies:
+            policy.reset()
+        self.total_restarts = 0
+        self.last_restart = None
+        self.last_decision = None
+        self.decisions.clear()
+        self.save()
+
+    def retry_after(self) -> int:
+        """最近一次被拒绝时距离允许重启的秒数（按当前时间折算）"""
+        if not self.last_decision or self.last_decision.allowed:
+            return 0
+        elapsed = time.time() - datetime.fromisoformat(self.last_decision.timestamp).timestamp()
+        return max(int(self.last_decision.retry_after - elapsed), 0)
+
+    def save(self):
+        """原子地写入状态文件（先写临时文件再替换）"""
+        if self.state_file is None:
+            return
+        state = {
+            'total_restarts': self.total_restarts,
+            'last_restart': self.last_restart,
+            'last_decision': asdict(self.last_decision) if self.last_decision else None,
+            'policies': {policy.name: policy.to_state() for policy in self.policies}
+        }
+        tmp_path = self.state_file.with_suffix(self.state_file.suffix + '.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_file)
+        except OSError as e:
+            print(f"❌ 保存重启策略状态失败: {e}")
+
+    def load(self) -> bool:
+        """从状态文件恢复
+
+        Returns:
+            bool: 是否成功恢复
+        """
+        if self.state_file is None or not self.state_file.exists():
+            return False
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.total_restarts = state.get('total_restarts', 0)
+            self.last_restart = state.get('last_restart')
+            if state.get('last_decision'):
+                self.last_decision = PolicyDecision(**state['last_decision'])
+            saved = state.get('policies', {})
+            for policy in self.policies:
+                if policy.name in saved:
+                    policy.load_state(saved[policy.name])
+            return True
+        except (OSError, ValueError, TypeError) as e:
+            print(f"⚠️ 重启策略状态文件无法读取，已忽略: {e}")
+            return False
+
+    def get_status(self) -> dict:
+        """获取策略状态
+
+        Returns:
+            dict: 各策略状态、最近判定及原因
+        """
+        return {
+            'policies': [policy.name for policy in self.policies],
+            'total_restarts': self.total_restarts,
+            'last_restart': datetime.fromtimestamp(self.last_restart).isoformat() if self.last_restart else None,
+            'last_decision': asdict(self.last_decision) if self.last_decision else None,
+            'recent_decisions': [asdict(decision) for decision in self.decisions],
+            'state': {policy.name: policy.to_state() for policy in self.policies}
+        }
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+自适应调度模块
+
+根据应用稳定性动态调整主循环的检查间隔，包括:
+- 以周期开始时刻为基准计算截止时间，周期耗时不会累积为漂移
+- 崩溃、重启、内存异常后收紧到最小间隔
+- 持续稳定超过观察窗口后逐步放宽到最大间隔
+- 记录单个周期耗时，超出时间预算的周期计为超时
+"""
+
+import time
+from typing import Optional
+
+
+class AdaptiveScheduler:
+    """自适应检查间隔调度器"""
+
+    def __init__(self, config: dict):
+        """初始化调度器
+
+        Args:
+            config: 配置字典，读取 `monitor.check_interval` 和 `monitor.adaptive_interval`
+        """
+        monitor_config = config.get('monitor', {})
+        adaptive_config = monitor_config.get('adaptive_interval', {}) or {}
+
+        self.base_interval = monitor_config.get('check_interval', 30)
+        self.enabled = adaptive_config.get('enabled', True)
+        self.min_interval = min(adaptive_config.get('min_interval', 5), self.base_interval)
+        self.max_interval = max(adaptive_config.get('max_interval', 120), self.base_interval)
+        self.stable_window = adaptive_config.get('stable_window', 600)
+        self.relax_factor = adaptive_config.get('relax_factor', 1.5)
+        self.memory_jump_mb = adaptive_config.get('memory_jump_mb', 100)
+        self.cycle_budget = monitor_config.get('cycle_budget', 10)
+
+        self.interval = self.base_interval
+        self.last_unstable_at = time.monotonic()
+        self.last_reason: Optional[str] = None
+        self.cycle_started_at: Optional[float] = None
+        self.overruns = 0
+        self.budget_overruns = 0
+        self.last_cycle_duration = 0.0
+        self._last_pid: Optional[int] = None
+        self._last_memory_mb: Optional[float] = None
+
+    def cycle_started(self):
+        """标记一个监控周期开始（截止时间以此为基准）"""
+        self.cycle_started_at = time.monotonic()
+
+    def cycle_finished(self) -> float:
+        """标记监控周期结束，检查是否超出时间预算
+
+        Returns:
+            float: 本周期耗时（秒）
+        """
+        if self.cycle_started_at is None:
+            return 0.0
+        self.last_cycle_duration = time.monotonic() - self.cycle_started_at
+        if self.cycle_budget and self.last_cycle_duration > self.cycle_budget:
+            self.budget_overruns += 1
+            print(f"🐢 监控周期耗时 {self.last_cycle_duration:.1f} 秒，超出预算 {self.cycle_budget} 秒 "
+                  f"(累计 {self.budget_overruns} 次)")
+        return self.last_cycle_duration
+
+    def next_delay(self) -> float:
+        """计算距离下一周期截止时间的剩余等待时间
+
+        Returns:
+            float: 等待秒数，周期耗时超过间隔时为0
+        """
+        now = time.monotonic()
+        started = self.cycle_started_at if self.cycle_started_at is not None else now
+        delay = started + self.interval - now
+        if delay < 0:
+            self.overruns += 1
+            return 0.0
+        return delay
+
+    def observe(self, status) -> bool:
+        """根据本轮应用状态调整检查间隔
+
+        Args:
+            status: 应用状态对象
+
+        Returns:
+            bool: 检查间隔是否发生变化
+        """
+        previous = self.interval
+        if not self.enabled:
+            return False
+
+        reason = None
+        if status.crashed:
+            reason = "crash"
+        elif not status.running:
+            reason = "stopped"
+        elif self._last_pid is not None and status.pid != self._last_pid:
+            reason = "restart"
+        elif (self._last_memory_mb is not None and
+              status.memory_mb - self._last_memory_mb >= self.memory_jump_mb):
+            reason = "memory"
+
+        if status.running:
+            self._last_pid = status.pid
+            self._last_memory_mb = status.memory_mb
+        else:
+            self._last_pid = None
+            self._last_memory_mb = None
+
+        if reason:
+            self.mark_unstable(reason)
+        elif time.monotonic() - self.last_unstable_at >= self.stable_window:
+            self.interval = min(self.interval * self.relax_factor, self.max_interval)
+
+        return self.interval != previous
+
+    def mark_unstable(self, reason: str):
+        """记录一次不稳定事件，立即收紧检查间隔
+
+        Args:
+            reason: 事件原因，如 'crash' / 'restart' / 'memory'
+        """
+        if not self.enabled:
+            return
+        if self.interval != self.min_interval:
+            print(f"⏱️ 检测到不稳定 ({reason})，检查间隔收紧为 {self.min_interval} 秒")
+        self.interval = self.min_interval
+        self.last_unstable_at = time.monotonic()
+        self.last_reason = reason
+
+    def get_status(self) -> dict:
+        """获取调度器状态
+
+        Returns:
+            dict: 当前间隔、稳定时长、超时周期数等
+        """
+        return {
+            'enabled': self.enabled,
+            'interval': round(self.interval, 1),
+            'base_interval': self.base_interval,
+            'stable_for': int(time.monotonic() - self.last_unstable_at),
+            'last_reason': self.last_reason,
+            'overruns': self.overruns,
+            'last_cycle_duration': round(self.last_cycle_duration, 3),
+            'cycle_budget': self.cycle_budget,
+            'budget_overruns': self.budget_overruns
+        }
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+状态日志写入模块
+
+批量写入应用状态日志，减少闪存写入次数，包括:
+- 内存缓冲，达到大小或时间阈值时一次性追加写入，停止时写出剩余内容
+- 按 `max_file_size` 轮转日志文件，可选gzip压缩轮转出的旧文件
+- 可选的紧凑格式（逗号分隔，便于程序解析）
+- 读取最后一条状态记录，紧凑格式转换为可读格式
+"""
+
+import asyncio
+import gzip
+import os
+import re
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from typing import List, Optional, Union
+
+
+SIZE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMG]?)I?B?\s*$', re.IGNORECASE)
+SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+# 紧凑格式的字段顺序
+COMPACT_FIELDS = "timestamp,running,pid,uptime,memory_mb,cpu_percent,pss_mb,threads,fd_count"
+
+
+def parse_size(value: Union[str, int, float, None], default: int = 5 * 1024 * 1024) -> int:
+    """解析 "5MB"、"512KB"、"1048576" 格式的大小
+
+    Args:
+        value: 大小文本或字节数
+        default: 无法解析时的默认值（字节）
+
+    Returns:
+        int: 字节数
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = SIZE_PATTERN.match(value or '')
+    if not match:
+        return default
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def format_status_line(status, compact: bool = False, now: Optional[datetime] = None) -> str:
+    """格式化一行状态日志
+
+    Args:
+        status: 应用状态对象
+        compact: 是否使用紧凑格式
+        now: 记录时间，默认当前时间
+
+    Returns:
+        str: 不含换行符的日志行
+    """
+    now = now or datetime.now()
+    if compact:
+        def field(value, fmt="{}"):
+            return "" if value is None else fmt.format(value)
+        return ",".join((
+            str(int(now.timestamp())),
+            "1" if status.running else "0",
+            field(status.pid),
+            str(status.uptime),
+            f"{status.memory_mb:.1f}",
+            field(status.cpu_percent, "{:.1f}"),
+            field(status.pss_mb, "{:.1f}"),
+            str(status.threads or 0),
+            field(status.fd_count)
+        ))
+
+    status_line = (
+        f"{now.strftime('%Y-%m-%d %H:%M:%S')} | "
+        f"{'✅运行' if status.running else '❌停止'} | "
+        f"PID:{status.pid or 'N/A'} | "
+        f"运行:{status.uptime}s | "
+        f"内存:{status.memory_mb:.1f}MB"
+    )
+    if status.running:
+        cpu = f"{status.cpu_percent:.1f}%" if status.cpu_percent is not None else "N/A"
+        pss = f"{status.pss_mb:.1f}MB" if status.pss_mb is not None else "N/A"
+        status_line += f" | CPU:{cpu} | PSS:{pss} | 线程:{status.threads}"
+        if status.fd_count is not None:
+            status_line += f" | FD:{status.fd_count}"
+    return status_line
+
+
+def parse_compact_line(line: str) -> Optional[str]:
+    """将紧凑格式的一行转换为可读格式
+
+    Args:
+        line: 紧凑格式的日志行
+
+    Returns:
+        Optional[str]: 可读格式的日志行，不是紧凑格式时返回None
+    """
+    names = COMPACT_FIELDS.split(',')
+    values = line.strip().split(',')
+    if len(values) != len(names):
+        return None
+    fields = dict(zip(names, values))
+
+    def number(name, cast=float):
+        return cast(fields[name]) if fields[name] else None
+
+    try:
+        status = SimpleNamespace(
+            running=fields['running'] == '1',
+            pid=number('pid', int),
+            uptime=int(fields['uptime']),
+            memory_mb=float(fields['memory_mb']),
+            cpu_percent=number('cpu_percent'),
+            pss_mb=number('pss_mb'),
+            threads=number('threads', int) or 0,
+            fd_count=number('fd_count', int)
+        )
+        now = datetime.fromtimestamp(int(fields['timestamp']))
+    except (ValueError, OverflowError, OSError):
+        return None
+    return format_status_line(status, now=now)
+
+
+def read_last_status(path: Path, tail_bytes: int = 4096) -> Optional[str]:
+    """读取状态日志的最后一条记录（只读取文件末尾）
+
+    Args:
+        path: 状态日志文件路径
+        tail_bytes: 从文件末尾读取的字节数
+
+    Returns:
+        Optional[str]: 可读格式的最后一条记录，文件不存在或为空时返回None
+    """
+    try:
+        with open(path, 'rb') as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(size - tail_bytes, 0))
+            lines = f.read().decode('utf-8', 'replace').splitlines()
+    except OSError:
+        return None
+    for line in reversed(lines):
+        line = line.strip()
+        if line and not line.startswith('#'):
+            return parse_compact_line(line) or line
+    return None
+
+
+class StatusLogWriter:
+    """带缓冲和轮转的日志写入器"""
+
+    def __init__(self, path: Path, max_file_size: int = 5 * 1024 * 1024, backup_count: int = 3,
+                 compress: bool = True, flush_interval: float = 60, flush_bytes: int = 16384):
+        """初始化写入器
+
+        Args:
+            path: 日志文件路径
+            max_file_size: 单文件最大字节数，0表示不轮转
+            backup_count: 保留的轮转文件数
+            compress: 是否gzip压缩轮转出的文件
+            flush_interval: 缓冲内容最长保留时间（秒），0表示每行立即写入
+            flush_bytes: 缓冲达到该字节数时立即写入
+        """
+        self.path = Path(path)
+        self.max_file_size = max_file_size
+        self.backup_count = max(backup_count, 1)
+        self.compress = compress
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        self.header: Optional[str] = None
+
+        self._buffer: List[str] = []
+        self._buffered_bytes = 0
+        self._first_buffered: Optional[float] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+        self.lines_written = 0
+        self.flushes = 0
+        self.rotations = 0
+
+    async def write(self, line: str):
+        """写入一行（先进入缓冲区）
+
+        Args:
+            line: 不含换行符的日志行
+        """
+        data = line + '\n'
+        self._buffer.append(data)
+        self._buffered_bytes += len(data.encode('utf-8'))
+        if self._first_buffered is None:
+            self._first_buffered = time.monotonic()
+
+        if (self._buffered_bytes >= self.flush_bytes
+                or time.monotonic() - self._first_buffered >= self.flush_interval):
+            await self.flush()
+
+    async def flush(self):
+        """将缓冲内容写入文件（在线程池中执行，不阻塞事件循环）"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._buffer:
+                return
+            lines = self._buffer
+            self._buffer = []
+            self._buffered_bytes = 0
+            self._first_buffered = None
+            try:
+                await asyncio.get_event_loop().run_in_executor(None, self._write_lines, lines)
+                self.lines_written += len(lines)
+                self.flushes += 1
+            except OSError as e:
+                print(f"❌ 写入状态日志失败: {e}")
+
+    def _write_lines(self, lines: List[str]):
+        """追加写入，写入前超过大小上限时先轮转"""
+        data = ''.join(lines).encode('utf-8')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if self.max_file_size and size and size + len(data) > self.max_file_size:
+            self._rotate()
+            size = 0
+        with open(self.path, 'ab') as f:
+            if size == 0 and self.header:
+                f.write((self.header + '\n').encode('utf-8'))
+            f.write(data)
+
+    def _rotate(self):
+        """轮转日志文件: log -> log.1(.gz) -> log.2(.gz) ..."""
+        suffix = '.gz' if self.compress else ''
+        oldest = self._backup_path(self.backup_count, suffix)
+        if oldest.exists():
+            oldest.unlink()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self._backup_path(index, suffix)
+            if source.exists():
+                os.replace(source, self._backup_path(index + 1, suffix))
+
+        target = self._backup_path(1, suffix)
+        if self.compress:
+            tmp_path = target.with_name(target.name + '.tmp')
+            with open(self.path, 'rb') as src, gzip.open(tmp_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(tmp_path, target)
+            self.path.unlink()
+        else:
+            os.replace(self.path, target)
+        self.rotations += 1
+
+    def _backup_path(self, index: int, suffix: str) -> Path:
+        return self.path.with_name(f"{self.path.name}.{index}{suffix}")
+
+    def get_stats(self) -> dict:
+        """获取写入统计
+
+        Returns:
+            dict: 已写入行数、写入次数、轮转次数和缓冲中的行数
+        """
+        return {
+            'lines_written': self.lines_written,
+            'flushes': self.flushes,
+            'rotations': self.rotations,
+            'buffered': len(self._buffer)
+        }
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+状态时间序列模块
+
+以紧凑的定长数组保存应用状态采样，包括:
+- 原始采样环形存储（时间、运行状态、PID、运行时长、内存、CPU）
+- 自动降采样为1分钟、15分钟两级聚合（最小/最大/平均值、运行比例）
+- 按时间范围查询，自动选择覆盖该范围的最细粒度
+- 持久化到数据目录，守护进程重启后保留历史，CLI可直接读取
+
+默认容量（原始2880条、1分钟1440条、15分钟2976条，约31天）总内存约250KB
+"""
+
+import json
+import os
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# 原始采样的列定义: (列名, array类型码)
+RAW_COLUMNS = (
+    ('timestamp', 'd'),
+    ('running', 'b'),
+    ('pid', 'i'),
+    ('uptime', 'i'),
+    ('memory', 'f'),
+    ('cpu', 'f'),
+)
+
+# 聚合桶的列定义
+AGGREGATE_COLUMNS = (
+    ('timestamp', 'd'),
+    ('count', 'H'),
+    ('running', 'H'),
+    ('memory_min', 'f'),
+    ('memory_max', 'f'),
+    ('memory_sum', 'f'),
+    ('cpu_min', 'f'),
+    ('cpu_max', 'f'),
+    ('cpu_sum', 'f'),
+    ('cpu_count', 'H'),
+)
+
+# 降采样层级: (名称, 桶宽度秒数)
+AGGREGATE_TIERS = (('1m', 60), ('15m', 900))
+
+# CPU缺失（首次采样或未运行）时的占位值
+NO_VALUE = -1.0
+
+FILE_VERSION = 1
+
+
+class RingColumns:
+    """按列存储的定长环形缓冲区"""
+
+    __slots__ = ('capacity', 'names', 'columns', 'start', 'size')
+
+    def __init__(self, capacity: int, spec: Tuple[Tuple[str, str], ...]):
+        """初始化缓冲区
+
+        Args:
+            capacity: 最大行数
+            spec: 列定义 ((列名, 类型码), ...)
+        """
+        self.capacity = capacity
+        self.names = tuple(name for name, _ in spec)
+        self.columns = {name: array(code, [0]) * capacity for name, code in spec}
+        self.start = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, values: tuple):
+        """追加一行，满时覆盖最旧的一行
+
+        Args:
+            values: 与列定义顺序一致的值
+        """
+        if self.size < self.capacity:
+            index = (self.start + self.size) % self.capacity
+            self.size += 1
+        else:
+            index = self.start
+            self.start = (self.start + 1) % self.capacity
+        for name, value in zip(self.names, values):
+            self.columns[name][index] = value
+
+    def first_timestamp(self) -> Optional[float]:
+        """最旧一行的时间戳"""
+        return self.columns['timestamp'][self.start] if self.size else None
+
+    def rows(self, since: Optional[float] = None, until: Optional[float] = None) -> Iterator[tuple]:
+        """按时间顺序遍历行
+
+        Args:
+            since: 起始时间戳（含）
+            until: 结束时间戳（含）
+
+        Yields:
+            tuple: 与列定义顺序一致的值
+        """
+        columns = [self.columns[name] for name in self.names]
+        timestamps = self.columns['timestamp']
+        for offset in range(self.size):
+            index = (self.start + offset) % self.capacity
+            ts = timestamps[index]
+            if since is not None and ts < since:
+                continue
+            if until is not None and ts > until:
+                break
+            yield tuple(column[index] for column in columns)
+
+    def nbytes(self) -> int:
+        """占用的数组字节数"""
+        return sum(column.itemsize * len(column) for column in self.columns.values())
+
+    def dump(self) -> Tuple[dict, bytes]:
+        """按时间顺序导出全部行
+
+        Returns:
+            Tuple[dict, bytes]: (列元数据, 各列依次拼接的字节)
+        """
+        meta = {'size': self.size, 'columns': []}
+        chunks = []
+        for name in self.names:
+            column = self.columns[name]
+            ordered = column[self.start:self.start + self.size]
+            if self.start + self.size > self.capacity:
+                ordered += column[:self.start + self.size - self.capacity]
+            data = ordered.tobytes()
+            meta['columns'].append([name, column.typecode, len(data)])
+            chunks.append(data)
+        return meta, b''.join(chunks)
+
+    def restore(self, meta: dict, data: bytes):
+        """从导出数据恢复，超出容量时只保留最新的行
+
+        Args:
+            meta: dump() 导出的列元数据
+            data: dump() 导出的字节
+        """
+        size = meta['size']
+        keep = min(size, self.capacity)
+        offset = 0
+        loaded = {}
+        for name, typecode, length in meta['columns']:
+            column = array(typecode)
+            column.frombytes(data[offset:offset + length])
+            offset += length
+            loaded[name] = column
+        if set(loaded) != set(self.names):
+            raise ValueError("列定义不一致")
+
+        for name in self.names:
+            self.columns[name][:keep] = loaded[name][size - keep:size]
+        self.start = 0
+        self.size = keep
+
+
+class _Bucket:
+    """正在累积的聚合桶"""
+
+    __slots__ = ('start', 'count', 'running', 'memory_min', 'memory_max', 'memory_sum',
+                 'cpu_min', 'cpu_max', 'cpu_sum', 'cpu_count')
+
+    def __init__(self, start: float):
+        self.start = start
+        self.count = 0
+        self.running = 0
+        self.memory_min = float('inf')
+        self.memory_max = 0.0
+        self.memory_sum = 0.0
+        self.cpu_min = float('inf')
+        self.cpu_max = 0.0
+        self.cpu_sum = 0.0
+        self.cpu_count = 0
+
+    def add(self, running: bool, memory: float, cpu: float):
+        """累积一条原始采样"""
+        self.count += 1
+        if not running:
+            return
+        self.running += 1
+        self.memory_min = min(self.memory_min, memory)
+        self.memory_max = max(self.memory_max, memory)
+        self.memory_sum += memory
+        if cpu != NO_VALUE:
+            self.cpu_count += 1
+            self.cpu_min = min(self.cpu_min, cpu)
+            self.cpu_max = max(self.cpu_max, cpu)
+            self.cpu_sum += cpu
+
+    def merge(self, row: tuple):
+        """合并一个更细粒度的聚合行"""
+        _, count, running, mem_min, mem_max, mem_sum, cpu_min, cpu_max, cpu_sum, cpu_count = row
+        self.count += count
+        if running:
+            self.running += running
+            self.memory_min = min(self.memory_min, mem_min)
+            self.memory_max = max(self.memory_max, mem_max)
+            self.memory_sum += mem_sum
+        if cpu_count:
+            self.cpu_count += cpu_count
+            self.cpu_min = min(self.cpu_min, cpu_min)
+            self.cpu_max = max(self.cpu_max, cpu_max)
+            self.cpu_sum += cpu_sum
+
+    def to_row(self) -> tuple:
+        """转换为聚合列定义顺序的行"""
+        memory_min = self.memory_min if self.running else 0.0
+        cpu_min = self.cpu_min if self.cpu_count else 0.0
+        return (self.start, min(self.count, 65535), min(self.running, 65535),
+                memory_min, self.memory_max, self.memory_sum,
+                cpu_min, self.cpu_max, self.cpu_sum, min(self.cpu_count, 65535))
+
+
+class TimeSeriesStore:
+    """应用状态时间序列存储"""
+
+    def __init__(self, config: dict, path: Optional[Path] = None):
+        """初始化存储
+
+        Args:
+            config: 配置字典，读取 `history` 段
+            path: 持久化文件路径，为空时不持久化
+        """
+        history_config = config.get('history', {}) or {}
+        self.path = path
+        self.save_interval = history_config.get('save_interval', 300)
+        self.raw = RingColumns(history_config.get('raw_samples', 2880), RAW_COLUMNS)
+        self.tiers: Dict[str, RingColumns] = {
+            '1m': RingColumns(history_config.get('minute_buckets', 1440), AGGREGATE_COLUMNS),
+            '15m': RingColumns(history_config.get('quarter_buckets', 2976), AGGREGATE_COLUMNS),
+        }
+        self._buckets: Dict[str, Optional[_Bucket]] = {name: None for name, _ in AGGREGATE_TIERS}
+        self._last_saved = time.monotonic()
+
+    def append(self, status, timestamp: Optional[float] = None) -> bool:
+        """记录一条应用状态采样
+
+        Args:
+            status: 应用状态对象
+            timestamp: 采样时间戳，默认当前时间
+
+        Returns:
+            bool: 是否有1分钟聚合桶完成（可用于限制下游发布频率）
+        """
+        ts = timestamp if timestamp is not None else time.time()
+        running = bool(status.running)
+        memory = float(status.memory_mb or 0.0)
+        cpu = status.cpu_percent if getattr(status, 'cpu_percent', None) is not None else NO_VALUE
+        self.raw.append((ts, running, status.pid or 0, int(status.uptime or 0), memory, cpu))
+
+        # 原始采样累积到1分钟桶，1分钟桶完成后再合并到15分钟桶
+        flushed = False
+        minute_row = self._roll('1m', 60, ts)
+        if minute_row is not None:
+            flushed = True
+            quarter_row = self._roll('15m', 900, minute_row[0])
+            if quarter_row is not None:
+                self.tiers['15m'].append(quarter_row)
+            self._buckets['15m'].merge(minute_row)
+        self._buckets['1m'].add(running, memory, cpu)
+        return flushed
+
+    def _roll(self, name: str, width: int, ts: float) -> Optional[tuple]:
+        """在时间戳跨越桶边界时结束当前桶
+
+        Returns:
+            Optional[tuple]: 已结束桶的聚合行（仅1分钟层写入其层级）
+        """
+        start = ts - ts % width
+        bucket = self._buckets[name]
+        if bucket is not None and bucket.start == start:
+            return None
+        self._buckets[name] = _Bucket(start)
+        if bucket is None or not bucket.count:
+            return None
+        row = bucket.to_row()
+        if name == '1m':
+            self.tiers['1m'].append(row)
+        return row
+
+    def query(self, since: float, until: Optional[float] = None,
+              resolution: Optional[str] = None) -> List[dict]:
+        """查询时间范围内的采样
+
+        Args:
+            since: 起始时间戳
+            until: 结束时间戳，默认到最新
+            resolution: 'raw' / '1m' / '15m'，默认选择能覆盖起始时间的最细粒度
+
+        Returns:
+            List[dict]: 按时间顺序排列的点，每个点包含内存/CPU的最小、最大、平均值和运行比例
+        """
+        resolution = resolution or self._pick_resolution(since)
+        if resolution == 'raw':
+            points = []
+            for ts, running, pid, uptime, memory, cpu in self.raw.rows(since, until):
+                cpu_value = None if cpu == NO_VALUE else round(cpu, 1)
+                points.append({
+                    'timestamp': ts, 'running_ratio': 1.0 if running else 0.0, 'pid': pid,
+                    'uptime': uptime, 'samples': 1,
+                    'memory_min': round(memory, 1), 'memory_max': round(memory, 1),
+                    'memory_avg': round(memory, 1),
+                    'cpu_min': cpu_value, 'cpu_max': cpu_value, 'cpu_avg': cpu_value
+                })
+            return points
+
+        rows = list(self.tiers[resolution].rows(since, until))
+        # 包含尚未结束的桶，查询结果覆盖到最新采样
+        pending = self._pending_row(resolution)
+        if pending is not None and pending[0] >= since and (until is None or pending[0] <= until):
+            rows.append(pending)
+        return [self._aggregate_point(row) for row in rows]
+
+    def summary(self, seconds: float) -> dict:
+        """统计最近一段时间的内存、CPU和运行比例
+
+        Args:
+            seconds: 时间窗口（秒）
+
+        Returns:
+            dict: 窗口内的汇总统计
+        """
+        since = time.time() - seconds
+        total = _Bucket(since)
+        for point in self.query(since):
+            samples, running = point['samples'], round(point['running_ratio'] * point['samples'])
+            total.count += samples
+            if running:
+                total.running += running
+                total.memory_min = min(total.memory_min, point['memory_min'])
+                total.memory_max = max(total.memory_max, point['memory_max'])
+                total.memory_sum += point['memory_avg'] * running
+            if point['cpu_avg'] is not None:
+                total.cpu_count += running or 1
+                total.cpu_min = min(total.cpu_min, point['cpu_min'])
+                total.cpu_max = max(total.cpu_max, point['cpu_max'])
+                total.cpu_sum += point['cpu_avg'] * (running or 1)
+
+        return {
+            'window': int(seconds),
+            'samples': total.count,
+            'availability': round(total.running / total.count * 100, 1) if total.count else None,
+            'memory_min': round(total.memory_min, 1) if total.running else None,
+            'memory_max': round(total.memory_max, 1) if total.running else None,
+            'memory_avg': round(total.memory_sum / total.running, 1) if total.running else None,
+            'cpu_max': round(total.cpu_max, 1) if total.cpu_count else None,
+            'cpu_avg': round(total.cpu_sum / total.cpu_count, 1) if total.cpu_count else None
+        }
+
+    def _pick_resolution(self, since: float) -> str:
+        """选择能覆盖起始时间的最细粒度"""
+        for name, ring in (('raw', self.raw), ('1m', self.tiers['1m'])):
+            first = ring.first_timestamp()
+            if first is not None and first <= since:
+                return name
+            if len(ring) < ring.capacity:
+                # 层级尚未写满，说明更早的数据本来就不存在
+                return name
+        return '15m'
+
+    def _pending_row(self, resolution: str) -> Optional[tuple]:
+        """获取指定层级尚未结束的桶（15分钟层包含进行中的1分钟桶）"""
+        bucket = self._buckets.get(resolution)
+        if bucket is None:
+            return None
+        if resolution == '15m' and self._buckets['1m'] is not None and self._buckets['1m'].count:
+            merged = _Bucket(bucket.start)
+            merged.merge(bucket.to_row())
+            merged.merge(self._buckets['1m'].to_row())
+            bucket = merged
+        return bucket.to_row() if bucket.count else None
+
+    def _rebuild_pending(self):
+        """恢复后用1分钟层重建未结束的15分钟桶，避免重启丢失最近一刻钟的聚合"""
+        minute = self.tiers['1m']
+        if not len(minute):
+            return
+        last = minute.columns['timestamp'][(minute.start + minute.size - 1) % minute.capacity]
+        start = last - last % 900
+        bucket = _Bucket(start)
+        for row in minute.rows(since=start):
+            bucket.merge(row)
+        self._buckets['15m'] = bucket
+
+    @staticmethod
+    def _aggregate_point(row: tuple) -> dict:
+        """聚合行转换为查询结果点"""
+        ts, count, running, mem_min, mem_max, mem_sum, cpu_min, cpu_max, cpu_sum, cpu_count = row
+        return {
+            'timestamp': ts, 'running_ratio': round(running / count, 3) if count else 0.0,
+            'samples': count,
+            'memory_min': round(mem_min, 1), 'memory_max': round(mem_max, 1),
+            'memory_avg': round(mem_sum / running, 1) if running else 0.0,
+            'cpu_min': round(cpu_min, 1) if cpu_count else None,
+            'cpu_max': round(cpu_max, 1) if cpu_count else None,
+            'cpu_avg': round(cpu_sum / cpu_count, 1) if cpu_count else None
+        }
+
+    def nbytes(self) -> int:
+        """全部层级占用的数组字节数"""
+        return self.raw.nbytes() + sum(ring.nbytes() for ring in self.tiers.values())
+
+    def maybe_save(self) -> bool:
+        """距离上次保存超过保存间隔时持久化
+
+        Returns:
+            bool: 是否执行了保存
+        """
+        if time.monotonic() - self._last_saved < self.save_interval:
+            return False
+        self.save()
+        return True
+
+    def save(self):
+        """原子地写入持久化文件（先写临时文件再替换）"""
+        if self.path is None:
+            return
+        header = {'version': FILE_VERSION, 'tiers': {}}
+        chunks = []
+        for name, ring in (('raw', self.raw), *self.tiers.items()):
+            meta, data = ring.dump()
+            header['tiers'][name] = meta
+            chunks.append(data)
+
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(json.dumps(header).encode('utf-8') + b'\n')
+                for data in chunks:
+                    f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"❌ 保存状态历史失败: {e}")
+        self._last_saved = time.monotonic()
+
+    def load(self) -> bool:
+        """从持久化文件恢复历史
+
+        Returns:
+            bool: 是否成功恢复
+        """
+        if self.path is None or not self.path.exists():
+            return False
+        try:
+            with open(self.path, 'rb') as f:
+                header = json.loads(f.readline().decode('utf-8'))
+                if header.get('version') != FILE_VERSION:
+                    return False
+                for name, ring in (('raw', self.raw), *self.tiers.items()):
+                    meta = header['tiers'][name]
+                    length = sum(column[2] for column in meta['columns'])
+                    ring.restore(meta, f.read(length))
+            self._rebuild_pending()
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ 状态历史文件无法读取，已忽略: {e}")
+            return False
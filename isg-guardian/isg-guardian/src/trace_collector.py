@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+崩溃现场文件收集模块
+
+收集设备上的 tombstone（native崩溃）和 ANR trace 文件，包括:
+- 一条shell命令列出目录中所有文件的修改时间和大小
+- 本地索引记录已拉取文件的路径、修改时间和大小，只拉取新增或被覆盖的文件
+- 通过 exec-out 在设备端gzip压缩后传输，设备不支持gzip时拉取原文件后在本地压缩
+- 按修改时间将文件关联到对应的崩溃报告
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import shlex
+import stat
+import subprocess
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from status_writer import parse_size
+
+
+GZIP_MAGIC = b'\x1f\x8b'
+# 列出文件的命令输出中设备当前时间的标记行
+DEVICE_TIME_MARKER = "@@device_time"
+
+
+@dataclass
+class TraceFile:
+    """设备上的一个崩溃现场文件
+
+    Attributes:
+        path: 设备上的路径
+        mtime: 修改时间（设备时间戳）
+        size: 文件大小（字节）
+        local: 本地保存的文件名（gzip压缩），未拉取时为None
+        pulled_at: 拉取时间
+    """
+    path: str
+    mtime: int
+    size: int
+    local: Optional[str] = None
+    pulled_at: Optional[str] = None
+
+    @property
+    def kind(self) -> str:
+        """文件类型: tombstone / anr / 目录名"""
+        name = Path(self.path).parent.name
+        return 'tombstone' if name == 'tombstones' else name
+
+
+class TraceCollector:
+    """tombstone / ANR trace 增量收集器"""
+
+    def __init__(self, config: dict, shell: Callable[[str], Awaitable[subprocess.CompletedProcess]],
+                 exec_out: Callable[[str], Awaitable[subprocess.CompletedProcess]]):
+        """初始化收集器
+
+        Args:
+            config: 配置字典，读取 `traces` 配置段
+            shell: 执行设备端命令的协程函数（列出文件）
+            exec_out: 以bytes返回命令输出的协程函数（拉取文件）
+        """
+        traces_config = config.get('traces', {}) or {}
+        self.enabled = traces_config.get('enabled', True)
+        self.directories = traces_config.get('directories', ['/data/tombstones', '/data/anr'])
+        self.local_dir = Path(traces_config.get('local_dir', 'data/traces'))
+        self.index_file = self.local_dir / 'index.json'
+        self.match_window = traces_config.get('match_window', 300)
+        self.max_files = traces_config.get('max_files', 30)
+        self.max_pull_size = parse_size(traces_config.get('max_pull_size', '16MB'))
+        self.shell = shell
+        self.exec_out = exec_out
+
+        self.files: Dict[str, TraceFile] = {}
+        # 设备时间 - 主机时间，用于将文件修改时间换算为主机时间
+        self.clock_offset = 0.0
+        self.device_gzip: Optional[bool] = None
+        self.pulled = 0
+        self.bytes_transferred = 0
+        self.skipped = 0
+        self._loaded = False
+        # 索引文件已存在（之前的运行已记录过设备上的文件）时为真
+        self._baselined = False
+        # 早于守护进程启动的文件在首次同步时只记录不拉取
+        self._started_at = time.time()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def start(self):
+        """加载索引
+
+        启动时ADB可能尚未连接，首次运行的基线（设备上已有的历史文件）在第一次成功列出文件时建立
+        """
+        if self.enabled:
+            self._load()
+
+    def _load(self):
+        """从索引文件恢复"""
+        if self._loaded:
+            return
+        self._loaded = True
+        self._baselined = self.index_file.exists()
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            self.files = {item['path']: TraceFile(**item) for item in state.get('files', [])}
+            self.clock_offset = state.get('clock_offset', 0.0)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            print(f"⚠️ tombstone索引文件无法读取，已忽略: {e}")
+
+    def _save(self):
+        """原子地写入索引文件（先写临时文件再替换）"""
+        self.local_dir.mkdir(parents=True, exist_ok=True)
+        state = {
+            'clock_offset': self.clock_offset,
+            'files': [asdict(trace) for trace in self.files.values()]
+        }
+        tmp_path = self.index_file.with_suffix('.json.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_file)
+        except OSError as e:
+            print(f"❌ 保存tombstone索引失败: {e}")
+
+    async def list_remote(self) -> Optional[Dict[str, Tuple[int, int]]]:
+        """列出设备上的文件
+
+        Returns:
+            Optional[Dict[str, Tuple[int, int]]]: 路径 -> (修改时间, 大小)，命令执行失败时返回None
+        """
+        patterns = ' '.join(f"{shlex.quote(directory.rstrip('/'))}/*" for directory in self.directories)
+        result = await self.shell(
+            f"echo {DEVICE_TIME_MARKER}; date +%s; stat -c '%Y %s %f %n' {patterns} 2>/dev/null"
+        )
+        lines = result.stdout.splitlines()
+        if len(lines) < 2 or lines[0].strip() != DEVICE_TIME_MARKER or not lines[1].strip().isdigit():
+            return None
+        self.clock_offset = int(lines[1].strip()) - time.time()
+
+        listing = {}
+        for line in lines[2:]:
+            parts = line.strip().split(' ', 3)
+            if len(parts) != 4 or not parts[0].isdigit() or not parts[1].isdigit():
+                continue
+            mtime, size, mode, path = parts
+            try:
+                if not stat.S_ISREG(int(mode, 16)):
+                    continue
+            except ValueError:
+                continue
+            if path.endswith('.pb'):
+                # Android 12+ 同时生成protobuf格式的tombstone，文本版本已包含相同内容
+                continue
+            listing[path] = (int(mtime), int(size))
+        return listing
+
+    async def sync(self) -> List[TraceFile]:
+        """拉取新增或被覆盖（修改时间/大小变化）的文件
+
+        Returns:
+            List[TraceFile]: 本次拉取的文件
+        """
+        if not self.enabled:
+            return []
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self._load()
+            listing = await self.list_remote()
+            if listing is None:
+                return []
+
+            pulled = []
+            changed = False
+            if not self._baselined:
+                changed = self._baseline(listing)
+            for path, (mtime, size) in sorted(listing.items(), key=lambda item: item[1][0]):
+                known = self.files.get(path)
+                if known and known.mtime == mtime and known.size == size:
+                    continue
+                trace = TraceFile(path, mtime, size)
+                if size > self.max_pull_size:
+                    print(f"⚠️ 跳过过大的文件 {path} ({size / 1024 / 1024:.1f} MB)")
+                    self.skipped += 1
+                elif await self._pull(trace):
+                    pulled.append(trace)
+                else:
+                    # 拉取失败时不记入索引，下次同步重试
+                    continue
+                if known and known.local:
+                    # tombstone文件名循环复用，被覆盖的旧文件保留本地副本，直到超出数量上限
+                    self.files[f"{path}@{known.mtime}"] = known
+                self.files[path] = trace
+                changed = True
+
+            changed = self._cleanup(listing) or changed
+            if changed:
+                self._save()
+            return pulled
+
+    def _baseline(self, listing: Dict[str, Tuple[int, int]]) -> bool:
+        """首次成功列出文件时，只记录守护进程启动前就已存在的文件，不拉取历史文件
+
+        Args:
+            listing: 设备上当前的文件列表
+
+        Returns:
+            bool: 是否有新记录的文件
+        """
+        self._baselined = True
+        device_started_at = self._started_at + self.clock_offset
+        existing = {path: entry for path, entry in listing.items()
+                    if entry[0] < device_started_at and path not in self.files}
+        for path, (mtime, size) in existing.items():
+            self.files[path] = TraceFile(path, mtime, size)
+        print(f"🪦 已记录设备上现有的 {len(existing)} 个tombstone/ANR文件，之后只收集新文件")
+        # 即使没有历史文件也写入索引，之后的运行不再建立基线
+        return True
+
+    async def _pull(self, trace: TraceFile) -> bool:
+        """拉取单个文件并以gzip格式保存到本地
+
+        Args:
+            trace: 文件信息，成功时填入本地文件名和拉取时间
+
+        Returns:
+            bool: 是否成功
+        """
+        path = shlex.quote(trace.path)
+        data = None
+        if self.device_gzip is not False:
+            result = await self.exec_out(f"gzip -c {path}")
+            if result.returncode == 0 and result.stdout[:2] == GZIP_MAGIC:
+                self.device_gzip = True
+                data = result.stdout
+            elif self.device_gzip is None:
+                print("ℹ️ 设备不支持gzip，改为拉取原文件后在本地压缩")
+                self.device_gzip = False
+        if data is None:
+            result = await self.exec_out(f"cat {path}")
+            if result.returncode != 0 or not result.stdout:
+                print(f"❌ 拉取 {trace.path} 失败: {result.stderr or result.returncode}")
+                return False
+            data = gzip.compress(result.stdout)
+            self.bytes_transferred += len(result.stdout)
+        else:
+            self.bytes_transferred += len(data)
+
+        name = f"{Path(trace.path).name}_{trace.mtime}.gz"
+        self.local_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.local_dir / (name + '.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.local_dir / name)
+        except OSError as e:
+            print(f"❌ 保存 {name} 失败: {e}")
+            return False
+
+        trace.local = name
+        trace.pulled_at = datetime.now().isoformat()
+        self.pulled += 1
+        print(f"🪦 已拉取 {trace.path} ({trace.size / 1024:.0f} KB，传输 {len(data) / 1024:.0f} KB)")
+        return True
+
+    def _cleanup(self, listing: Dict[str, Tuple[int, int]]) -> bool:
+        """删除超出数量上限的本地文件，索引中保留记录以免重复拉取
+
+        Args:
+            listing: 设备上当前的文件列表
+
+        Returns:
+            bool: 索引是否有变化
+        """
+        changed = False
+        local = sorted((trace for trace in self.files.values() if trace.local), key=lambda trace: trace.mtime)
+        for trace in local[:max(len(local) - self.max_files, 0)]:
+            try:
+                (self.local_dir / trace.local).unlink()
+            except FileNotFoundError:
+                pass
+            trace.local = None
+            changed = True
+
+        # 已从设备上删除（或已被覆盖）且本地没有副本的记录不再需要
+        stale = [path for path, trace in self.files.items() if path not in listing and not trace.local]
+        for path in stale:
+            del self.files[path]
+        return changed or bool(stale)
+
+    def match(self, timestamp: float, window: Optional[float] = None) -> List[dict]:
+        """查找修改时间与崩溃时间接近的已拉取文件
+
+        Args:
+            timestamp: 崩溃时间（主机时间戳）
+            window: 时间窗口（秒），默认使用配置值
+
+        Returns:
+            List[dict]: 文件信息（类型、设备路径、本地文件名、修改时间、大小）
+        """
+        window = self.match_window if window is None else window
+        matched = []
+        for trace in sorted(self.files.values(), key=lambda trace: trace.mtime):
+            if not trace.local:
+                continue
+            host_mtime = trace.mtime - self.clock_offset
+            if abs(host_mtime - timestamp) <= window:
+                matched.append({
+                    'kind': trace.kind,
+                    'path': trace.path,
+                    'local': trace.local,
+                    'mtime': datetime.fromtimestamp(host_mtime).isoformat(),
+                    'size': trace.size
+                })
+        return matched
+
+    def get_stats(self) -> dict:
+        """获取收集统计
+
+        Returns:
+            dict: 索引中的文件数、本地保存数、拉取次数、传输字节数和跳过的文件数
+        """
+        return {
+            'indexed': len(self.files),
+            'local': sum(1 for trace in self.files.values() if trace.local),
+            'pulled': self.pulled,
+            'bytes_transferred': self.bytes_transferred,
+            'skipped': self.skipped,
+            'device_gzip': self.device_gzip
+        }
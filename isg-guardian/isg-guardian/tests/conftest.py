@@ -0,0 +1,6 @@
+"""测试配置: 模块位于 src/ 目录，按主程序的方式加入导入路径"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
@@ -0,0 +1,67 @@
+"""崩溃指纹测试"""
+
+from crash_fingerprint import crash_fingerprint
+
+
+def _error(message: str, pid: int = 4321, tag: str = 'AndroidRuntime', second: int = 1) -> str:
+    return f"[PID-ERROR] 01-02 03:04:{second:02d}.567  {pid}  {pid} E {tag}: {message}"
+
+
+def _noise(count: int = 45):
+    return [_error(f"Request {i} failed: IOException: timeout after {i}ms", tag='OkHttp', second=i % 60)
+            for i in range(count)]
+
+
+def _crash(exception: str, frames, pid: int = 4321):
+    lines = [
+        _error("FATAL EXCEPTION: main", pid),
+        _error(f"Process: com.isg.app, PID: {pid}", pid),
+        _error(exception, pid),
+    ]
+    return lines + [_error(f"\tat {frame}", pid) for frame in frames]
+
+
+NPE_FRAMES = ['com.isg.app.Sensor.read(Sensor.java:42)', 'com.isg.app.Poller.run(Poller.java:17)',
+              'android.os.Handler.handleCallback(Handler.java:938)']
+OOM_FRAMES = ['java.util.Arrays.copyOf(Arrays.java:3332)', 'com.isg.app.Cache.put(Cache.java:88)',
+              'android.os.Handler.handleCallback(Handler.java:938)']
+NPE = "java.lang.NullPointerException: Attempt to invoke virtual method on a null object reference"
+OOM = "java.lang.OutOfMemoryError: Failed to allocate a 1048592 byte allocation"
+
+
+def test_errors_before_crash_block_do_not_change_fingerprint():
+    plain = _crash(NPE, NPE_FRAMES)
+    with_noise = [_error("android.database.sqlite.SQLiteException: no such table: events", tag='SQLiteLog')]
+    with_noise += _crash(NPE, NPE_FRAMES, pid=5555)
+
+    assert crash_fingerprint('java_crash', plain)[0] is not None
+    assert crash_fingerprint('java_crash', plain)[0] == crash_fingerprint('java_crash', with_noise)[0]
+
+
+def test_different_crashes_after_same_noise_have_different_fingerprints():
+    npe = crash_fingerprint('java_crash', _noise() + _crash(NPE, NPE_FRAMES))
+    oom = crash_fingerprint('java_crash', _noise() + _crash(OOM, OOM_FRAMES))
+
+    assert npe[0] != oom[0]
+    assert 'NullPointerException' in npe[1]
+    assert 'OutOfMemoryError' in oom[1]
+
+
+def test_noise_without_crash_block_has_no_fingerprint():
+    assert crash_fingerprint('unknown', _noise())[0] is None
+
+
+def test_native_crash_block_uses_top_frames():
+    def tombstone(frame):
+        return [
+            "[SYS] 01-02 03:04:05.678  6000  6000 F DEBUG: *** *** *** *** *** *** *** *** *** ***",
+            "[SYS] 01-02 03:04:05.678  6000  6000 F DEBUG: signal 11 (SIGSEGV), code 1, fault addr 0x0",
+            f"[SYS] 01-02 03:04:05.678  6000  6000 F DEBUG:       #00 pc 0x00012345  {frame}",
+        ]
+
+    first = crash_fingerprint('native_crash', _noise(5) + tombstone('/system/lib64/libc.so (strlen+16)'))
+    again = crash_fingerprint('native_crash', _noise(9) + tombstone('/system/lib64/libc.so (strlen+16)'))
+    other = crash_fingerprint('native_crash', tombstone('/data/app/lib/arm64/libisg.so (decode+8)'))
+
+    assert first[0] == again[0]
+    assert first[0] != other[0]
@@ -0,0 +1,50 @@
+"""飞行记录仪测试"""
+
+from flight_recorder import FlightRecorder
+from logcat_stream import LogRecord
+
+
+def _fill(recorder: FlightRecorder, count: int, start: float = 1000.0, pid: int = 100) -> float:
+    timestamp = start
+    for i in range(count):
+        timestamp += 0.01
+        recorder.append(LogRecord(timestamp, pid, pid, 'E', 'Tag', 'm' * (10 + i % 90)))
+    return timestamp
+
+
+def _full_decode(recorder: FlightRecorder):
+    records = []
+    if recorder.lap:
+        found = recorder._next_valid(recorder.write_offset, recorder.capacity)
+        if found:
+            records = recorder._scan(found[1], recorder.capacity)
+    return records + recorder._scan(0, recorder.write_offset)
+
+
+def _key(records):
+    return [(record.timestamp, record.pid, record.message) for record in records]
+
+
+def test_windowed_read_matches_full_decode_after_wrap(tmp_path):
+    recorder = FlightRecorder(tmp_path / 'ring.bin', 256 * 1024)
+    recorder.open()
+    latest = _fill(recorder, 8000)
+    assert recorder.lap >= 1
+
+    for seconds in (1, 10, 30, 10 ** 6):
+        expected = [record for record in _full_decode(recorder) if record.timestamp >= latest - seconds]
+        assert _key(recorder.read(seconds)) == _key(expected)
+    recorder.close()
+
+
+def test_read_until_mark_ignores_later_records(tmp_path):
+    recorder = FlightRecorder(tmp_path / 'ring.bin', 256 * 1024)
+    recorder.open()
+    crashed_at = _fill(recorder, 3000)
+    mark = recorder.mark()
+    _fill(recorder, 500, start=crashed_at, pid=200)
+
+    records = recorder.read(5, until=mark)
+    assert records and records[-1].timestamp == crashed_at
+    assert all(record.pid == 100 and record.timestamp >= crashed_at - 5 for record in records)
+    recorder.close()
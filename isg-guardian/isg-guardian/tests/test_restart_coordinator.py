@@ -0,0 +1,70 @@
+"""重启协调器测试"""
+
+import asyncio
+import time
+
+from guardian import RestartCoordinator
+
+
+class Operation:
+    """记录调用次数的重启操作"""
+
+    def __init__(self, duration: float = 0.0, result: bool = True):
+        self.duration = duration
+        self.result = result
+        self.calls = 0
+
+    async def __call__(self) -> bool:
+        self.calls += 1
+        await asyncio.sleep(self.duration)
+        return self.result
+
+
+def test_exit_during_other_process_restart_reuses_its_result(tmp_path):
+    # 两个协调器分别打开锁文件，与CLI和守护进程之间的互斥相同
+    cli = RestartCoordinator(tmp_path / 'restart.lock')
+    daemon = RestartCoordinator(tmp_path / 'restart.lock')
+    cli_restart = Operation(duration=0.3)
+    crash_restart = Operation()
+
+    async def scenario():
+        cli_task = asyncio.ensure_future(cli.run('cli', cli_restart))
+        await asyncio.sleep(0.1)
+        # 守护进程在CLI重启期间观察到进程退出，等待锁后不再重启
+        crashed = await daemon.run('crash', crash_restart, observed_at=time.time())
+        return await cli_task, crashed
+
+    assert asyncio.run(scenario()) == (True, True)
+    assert cli_restart.calls == 1
+    assert crash_restart.calls == 0
+    assert daemon.get_stats()['coalesced'] == 1
+
+
+def test_exit_observed_during_restart_after_lock_released(tmp_path):
+    cli = RestartCoordinator(tmp_path / 'restart.lock')
+    daemon = RestartCoordinator(tmp_path / 'restart.lock')
+    crash_restart = Operation()
+
+    async def scenario():
+        cli_task = asyncio.ensure_future(cli.run('cli', Operation(duration=0.2, result=False)))
+        await asyncio.sleep(0.1)
+        observed_at = time.time()
+        await cli_task
+        # 崩溃处理在CLI释放锁之后才开始
+        return await daemon.run('crash', crash_restart, observed_at=observed_at)
+
+    assert asyncio.run(scenario()) is False
+    assert crash_restart.calls == 0
+
+
+def test_exit_after_other_restart_finished_is_handled(tmp_path):
+    cli = RestartCoordinator(tmp_path / 'restart.lock')
+    daemon = RestartCoordinator(tmp_path / 'restart.lock')
+    crash_restart = Operation()
+
+    async def scenario():
+        await cli.run('cli', Operation())
+        return await daemon.run('crash', crash_restart, observed_at=time.time())
+
+    assert asyncio.run(scenario()) is True
+    assert crash_restart.calls == 1